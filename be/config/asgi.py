@@ -7,10 +7,36 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import asyncio
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from data_collection.bulk_writer import close_bulk_writers  # noqa: E402
+from data_collection.freshness import get_freshness_recorder  # noqa: E402
+from data_collection.routing import websocket_urlpatterns  # noqa: E402
+
+
+async def lifespan_app(scope, receive, send):
+    # 종료 시 BulkWriter와 freshness recorder에 남은 값을 기록한다
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_bulk_writers()
+            await asyncio.to_thread(get_freshness_recorder().flush)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': URLRouter(websocket_urlpatterns),
+    'lifespan': lifespan_app,
+})
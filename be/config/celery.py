@@ -10,15 +10,27 @@ app.autodiscover_tasks()
 
 app.conf.beat_schedule = {
     'fetch-funding-rate-every-5-min': {
-        'task': 'data_collection.tasks.fetch_funding_rate',
+        'task': 'data_collection.tasks.fetch_all_funding_rates',
         'schedule': crontab(minute='*/5'),
     },
     'fetch-open-interest-every-5-min': {
-        'task': 'data_collection.tasks.fetch_open_interest',
+        'task': 'data_collection.tasks.fetch_all_open_interest',
         'schedule': crontab(minute='*/5'),
     },
     'fetch-orderbook-every-5-min': {
-        'task': 'data_collection.tasks.fetch_orderbook',
+        'task': 'data_collection.tasks.fetch_all_orderbooks',
         'schedule': crontab(minute='*/5'),
     },
+    'refresh-symbol-registry-every-5-min': {
+        'task': 'data_collection.tasks.refresh_symbol_registry',
+        'schedule': crontab(minute='*/5'),
+    },
+    'maintain-partitions-hourly': {
+        'task': 'data_collection.tasks.maintain_partitions',
+        'schedule': crontab(minute=5),
+    },
+    'backfill-gaps-hourly': {
+        'task': 'data_collection.tasks.backfill_gaps',
+        'schedule': crontab(minute=20),
+    },
 }
\ No newline at end of file
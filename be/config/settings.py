@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
 import django
@@ -54,6 +55,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'drf_spectacular',
     'django_celery_beat',
+    'channels',
     'data_collection',
 ]
 
@@ -62,6 +64,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag 없는 GET 응답에 content ETag + 304 처리
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -73,6 +76,16 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson이 있으면 orjson으로 인코딩/디코딩 (data_collection/codec.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'data_collection.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'data_collection.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -154,6 +167,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
@@ -172,6 +186,116 @@ DATABASES = {
 
 REDIS_URL = os.getenv('REDIS_URL')
 
+# 수집기(websocket/binance_fastapi_ws.py FastAPI 앱) -> 웹소켓 consumer 심볼 그룹 팬아웃
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {
+            'hosts': [REDIS_URL],
+            'capacity': 1000,  # 채널별 대기 메시지 상한
+            'expiry': 10,
+        },
+    },
+}
+
+# 웹소켓 클라이언트 전송 (심볼별 conflation, 초당 최대 전송 수)
+WS_DEFAULT_MAX_RATE = float(os.getenv('WS_DEFAULT_MAX_RATE', 4))  # subscribe에 max_rate가 없을 때
+WS_MAX_RATE = float(os.getenv('WS_MAX_RATE', 20))  # 클라이언트가 요청할 수 있는 상한
+WS_SEND_QUEUE_SIZE = int(os.getenv('WS_SEND_QUEUE_SIZE', 256))  # 연결별 송신 대기 frame 상한
+WS_OVERFLOW_POLICY = os.getenv('WS_OVERFLOW_POLICY', 'conflate')  # 큐가 넘칠 때: drop_oldest | conflate | disconnect
+WS_CLIENT_STATS_INTERVAL = float(os.getenv('WS_CLIENT_STATS_INTERVAL', 5))  # 초, 연결별 큐 통계를 Redis에 기록하는 주기
+
+# Binance REST (data_collection.binance_rest)
+BINANCE_FAPI_BASE_URL = os.getenv('BINANCE_FAPI_BASE_URL', 'https://fapi.binance.com')  # 오프라인 테스트: binance_stub_server
+BINANCE_REST_POOL_SIZE = int(os.getenv('BINANCE_REST_POOL_SIZE', 20))
+BINANCE_REST_TIMEOUT = float(os.getenv('BINANCE_REST_TIMEOUT', 10))
+BINANCE_WEIGHT_LIMIT = int(os.getenv('BINANCE_WEIGHT_LIMIT', 2400))  # IP당 분당 request weight
+BINANCE_WEIGHT_HEADROOM = float(os.getenv('BINANCE_WEIGHT_HEADROOM', 0.9))  # 한도의 이 비율까지만 사용
+BINANCE_WEIGHT_POLICY = os.getenv('BINANCE_WEIGHT_POLICY', 'wait')  # wait: 다음 분까지 대기, shed: 즉시 거절
+BINANCE_WEIGHT_MAX_WAIT = float(os.getenv('BINANCE_WEIGHT_MAX_WAIT', 65))  # 초, 대기 상한
+
+# 심볼 레지스트리 (exchangeInfo 캐시, refresh_symbol_registry 태스크가 갱신)
+SYMBOL_REGISTRY_LOCAL_TTL = float(os.getenv('SYMBOL_REGISTRY_LOCAL_TTL', 30))  # 초, 프로세스 메모리 캐시
+
+# Binance combined stream
+BINANCE_WS_BASE_URL = os.getenv('BINANCE_WS_BASE_URL', 'wss://fstream.binance.com')
+BINANCE_MAX_STREAMS_PER_CONNECTION = int(os.getenv('BINANCE_MAX_STREAMS_PER_CONNECTION', 200))
+BINANCE_WS_MAX_CONNECTION_AGE = float(os.getenv('BINANCE_WS_MAX_CONNECTION_AGE', 23 * 3600))  # 초, 24시간 강제 종료 전에 재연결
+BINANCE_WS_ROTATION_JITTER = float(os.getenv('BINANCE_WS_ROTATION_JITTER', 1800))  # 초, 연결들이 동시에 교체되지 않도록
+BINANCE_WS_IDLE_TIMEOUT = float(os.getenv('BINANCE_WS_IDLE_TIMEOUT', 60))  # 초, 연결 전체에 메시지가 없으면 재연결
+BINANCE_WS_STREAM_STALE_AFTER = float(os.getenv('BINANCE_WS_STREAM_STALE_AFTER', 300))  # 초, health에 stale stream으로 표시
+
+# 수집기 태스크 supervisor (jitter backoff 재시작, /health)
+SUPERVISOR_BACKOFF_BASE = float(os.getenv('SUPERVISOR_BACKOFF_BASE', 1))  # 초, 첫 재시도 대기
+SUPERVISOR_BACKOFF_MAX = float(os.getenv('SUPERVISOR_BACKOFF_MAX', 60))  # 초, 재시도 대기 상한
+SUPERVISOR_STABLE_AFTER = float(os.getenv('SUPERVISOR_STABLE_AFTER', 60))  # 초, 이만큼 돌다 실패하면 backoff 초기화
+SUPERVISOR_HEALTH_INTERVAL = float(os.getenv('SUPERVISOR_HEALTH_INTERVAL', 5))  # 초, 수집기 상태를 Redis에 기록하는 주기
+
+# 로컬 오더북 (@depth diff + REST 스냅샷)
+ORDERBOOK_DEPTH_LEVELS = int(os.getenv('ORDERBOOK_DEPTH_LEVELS', 20))  # Redis/DB에 기록할 상위 호가 수
+ORDERBOOK_SNAPSHOT_LIMIT = int(os.getenv('ORDERBOOK_SNAPSHOT_LIMIT', 1000))  # REST depth limit
+ORDERBOOK_PUBLISH_INTERVAL = float(os.getenv('ORDERBOOK_PUBLISH_INTERVAL', 0.5))  # 초, Redis 갱신 주기
+ORDERBOOK_PERSIST_INTERVAL = float(os.getenv('ORDERBOOK_PERSIST_INTERVAL', 60))  # 초, DB 저장 주기
+ORDERBOOK_STORAGE_FORMAT = os.getenv('ORDERBOOK_STORAGE_FORMAT', 'json')  # json | packed
+ORDERBOOK_KEYFRAME_INTERVAL = int(os.getenv('ORDERBOOK_KEYFRAME_INTERVAL', 30))  # packed: keyframe 간격 (스냅샷 수)
+ORDERBOOK_FANOUT_INTERVAL = float(os.getenv('ORDERBOOK_FANOUT_INTERVAL', 0.1))  # 초, 웹소켓 그룹으로 book 상태를 발행하는 최소 간격
+ORDERBOOK_RESYNC_GRACE = float(os.getenv('ORDERBOOK_RESYNC_GRACE', 30))  # 초, 스냅샷 동기화가 이보다 오래 걸리면 health degraded
+ORDERBOOK_RESYNC_WINDOW = float(os.getenv('ORDERBOOK_RESYNC_WINDOW', 300))  # 초, 재동기화 횟수를 세는 구간
+ORDERBOOK_RESYNC_ALERT = int(os.getenv('ORDERBOOK_RESYNC_ALERT', 20))  # ORDERBOOK_RESYNC_WINDOW 동안 재동기화가 이만큼이면 health degraded
+
+# 체결 집계 (거래소 체결 시각 기준 OHLCV bar)
+TRADE_AGG_INTERVALS = os.getenv('TRADE_AGG_INTERVALS', '1s,1m,5m').split(',')
+TRADE_AGG_PERSIST_INTERVALS = os.getenv('TRADE_AGG_PERSIST_INTERVALS', '1s,1m,5m').split(',')  # DB 저장 해상도
+TRADE_AGG_GRACE_MS = int(os.getenv('TRADE_AGG_GRACE_MS', 500))  # 늦게 도착하는 체결 허용 시간
+
+# 과거 시계열 gap backfill (backfill 명령 / backfill_gaps 태스크)
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 8))  # 동시 REST chunk 조회 수 (weight budget 공유)
+BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', 2000))  # INSERT 한 번에 쓰는 행 수
+BACKFILL_LOOKBACK_HOURS = int(os.getenv('BACKFILL_LOOKBACK_HOURS', 24))  # 태스크가 gap을 찾는 기간
+BACKFILL_LOCK_TIMEOUT = int(os.getenv('BACKFILL_LOCK_TIMEOUT', 3600))  # 초, 동시 실행 방지 lock 만료
+# 연속 행 간격이 이보다 크면 gap (초)
+BACKFILL_GAP_THRESHOLDS = {
+    'funding_rate': int(os.getenv('BACKFILL_GAP_FUNDING_RATE', 9 * 3600)),
+    'open_interest': int(os.getenv('BACKFILL_GAP_OPEN_INTEREST', 15 * 60)),
+    'trade_volume': int(os.getenv('BACKFILL_GAP_TRADE_VOLUME', 60)),
+}
+
+# 시계열 테이블 timestamp range 파티셔닝 (manage_partitions / maintain_partitions 태스크)
+# interval: hourly|daily, premake: 미리 만들 파티션 수, retention: 보존 기간 (None이면 무기한)
+TIMESERIES_PARTITIONING = {
+    'data_collection_orderbook': {
+        'interval': os.getenv('PARTITION_INTERVAL_ORDERBOOK', 'hourly'),
+        'premake': int(os.getenv('PARTITION_PREMAKE_ORDERBOOK', 48)),
+        'retention': timedelta(days=int(os.getenv('PARTITION_RETENTION_DAYS_ORDERBOOK', 30))),
+    },
+    'data_collection_tradevolume': {
+        'interval': os.getenv('PARTITION_INTERVAL_TRADEVOLUME', 'daily'),
+        'premake': int(os.getenv('PARTITION_PREMAKE_TRADEVOLUME', 7)),
+        'retention': None,
+    },
+    'data_collection_liquidation': {
+        'interval': os.getenv('PARTITION_INTERVAL_LIQUIDATION', 'daily'),
+        'premake': int(os.getenv('PARTITION_PREMAKE_LIQUIDATION', 7)),
+        'retention': None,
+    },
+    'data_collection_fundingrate': {
+        'interval': os.getenv('PARTITION_INTERVAL_FUNDINGRATE', 'daily'),
+        'premake': int(os.getenv('PARTITION_PREMAKE_FUNDINGRATE', 7)),
+        'retention': None,
+    },
+    'data_collection_openinterest': {
+        'interval': os.getenv('PARTITION_INTERVAL_OPENINTEREST', 'daily'),
+        'premake': int(os.getenv('PARTITION_PREMAKE_OPENINTEREST', 7)),
+        'retention': None,
+    },
+}
+
+# 수집 경로 DB 쓰기 버퍼 (bulk_create)
+BULK_WRITER_BATCH_SIZE = int(os.getenv('BULK_WRITER_BATCH_SIZE', 500))
+BULK_WRITER_FLUSH_INTERVAL = float(os.getenv('BULK_WRITER_FLUSH_INTERVAL', 1.0))  # 초
+BULK_WRITER_MAX_PENDING = int(os.getenv('BULK_WRITER_MAX_PENDING', 10000))  # 초과 시 수집 루프 대기
+BULK_WRITER_STATS_INTERVAL = float(os.getenv('BULK_WRITER_STATS_INTERVAL', 60))  # 초, rows/s 로그 주기
+
 # DATABASES = {
 #     'default': {
 #         'ENGINE': 'django.db.backends.sqlite3',
@@ -228,6 +352,65 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_ENABLE_UTC = True
+BATCH_TASK_CONCURRENCY = int(os.getenv('BATCH_TASK_CONCURRENCY', 16))  # 전 심볼 배치 태스크의 REST 동시 호출 수
+
+# historical API 페이지 크기
+HISTORICAL_DEFAULT_LIMIT = int(os.getenv('HISTORICAL_DEFAULT_LIMIT', 100))
+HISTORICAL_MAX_LIMIT = int(os.getenv('HISTORICAL_MAX_LIMIT', 1000))
+HISTORICAL_VALUES_SERIALIZATION = os.getenv('HISTORICAL_VALUES_SERIALIZATION', 'true').lower() == 'true'  # values_list + ValuesSerializer (false: ModelSerializer)
+AGGREGATE_DEFAULT_BUCKETS = int(os.getenv('AGGREGATE_DEFAULT_BUCKETS', 500))  # start 생략 시 end부터 거슬러 올라갈 bucket 수
+AGGREGATE_MAX_BUCKETS = int(os.getenv('AGGREGATE_MAX_BUCKETS', 5000))
+REALTIME_BATCH_MAX_KEYS = int(os.getenv('REALTIME_BATCH_MAX_KEYS', 2000))  # realtime batch 요청당 MGET 키 수 상한
+
+# 수집 상태(freshness) 레지스트리
+FRESHNESS_FLUSH_INTERVAL = float(os.getenv('FRESHNESS_FLUSH_INTERVAL', 1.0))  # 초, writer -> Redis 기록 주기
+FRESHNESS_STALE_AFTER = {  # 초, 이 시간 이상 갱신이 없으면 stale (None이면 판정 안 함)
+    'orderbook': 15,
+    'trade_volume': 15,
+    'funding_rate': 600,
+    'open_interest': 600,
+    'liquidation': None,  # 청산은 이벤트가 드물어 판정하지 않음
+    'ws_delivery': None,
+}
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))  # export 서버 사이드 커서 fetch 크기 (= parquet row group)
+
+# HTTP 캐시 헤더
+REALTIME_CACHE_MAX_AGE = {  # 초, realtime 응답 Cache-Control max-age
+    'orderbook': 1,
+    'trade_volume': 1,
+    'liquidation': 1,
+    'funding_rate': 30,  # 배치 태스크가 5분마다 갱신
+    'open_interest': 30,
+    'metrics': 1,
+    'liquidation_stats': 1,
+}
+HISTORICAL_CACHE_MAX_AGE = int(os.getenv('HISTORICAL_CACHE_MAX_AGE', 5))  # 초, 아직 열려 있는 구간
+HISTORICAL_CLOSED_AFTER = int(os.getenv('HISTORICAL_CLOSED_AFTER', 300))  # 초, end가 이만큼 지난 구간은 수집이 끝난 것으로 본다
+HISTORICAL_CLOSED_MAX_AGE = int(os.getenv('HISTORICAL_CLOSED_MAX_AGE', 300))  # 초, 닫혔지만 backfill이 아직 채울 수 있는 구간 (재검증)
+HISTORICAL_IMMUTABLE_AFTER = int(os.getenv('HISTORICAL_IMMUTABLE_AFTER', (BACKFILL_LOOKBACK_HOURS + 1) * 3600))  # 초, backfill 기간 + 여유가 지난 구간만 immutable
+
+# async 뷰 (ASGI) 의 redis.asyncio 커넥션 풀
+ASYNC_REDIS_MAX_CONNECTIONS = int(os.getenv('ASYNC_REDIS_MAX_CONNECTIONS', 100))  # 이벤트 루프당 최대 연결 수
+ASYNC_REDIS_POOL_TIMEOUT = float(os.getenv('ASYNC_REDIS_POOL_TIMEOUT', 5.0))  # 초, 풀이 가득 찼을 때 연결을 기다리는 시간
+
+# 파생 지표 엔진 (data_collection/metrics.py)
+METRICS_PUBLISH_INTERVAL = float(os.getenv('METRICS_PUBLISH_INTERVAL', 1.0))  # 초, 계산/Redis 기록 주기
+METRICS_TTL = int(os.getenv('METRICS_TTL', 10))  # 초, {symbol}_metrics 키 TTL
+METRICS_WINDOWS = {'1m': 60, '5m': 300}  # 초, VWAP/CVD 구간
+METRICS_BOOK_LEVELS = int(os.getenv('METRICS_BOOK_LEVELS', 10))  # imbalance 계산에 쓸 상위 호가 수
+METRICS_TRADE_BUFFER = int(os.getenv('METRICS_TRADE_BUFFER', 50000))  # 심볼당 체결 ring buffer 크기
+METRICS_LIQUIDATION_BUFFER = int(os.getenv('METRICS_LIQUIDATION_BUFFER', 4096))  # 심볼당 청산 ring buffer 크기
+METRICS_LIQUIDATION_WINDOW = int(os.getenv('METRICS_LIQUIDATION_WINDOW', 300))  # 초, 청산 통계 구간
+METRICS_LIQUIDATION_CLUSTER_BPS = float(os.getenv('METRICS_LIQUIDATION_CLUSTER_BPS', 10))  # 청산 cluster 가격 폭 (bp)
+METRICS_LIQUIDATION_CLUSTERS = int(os.getenv('METRICS_LIQUIDATION_CLUSTERS', 3))  # 응답에 포함할 상위 cluster 수
+
+# 전 심볼 청산 (!forceOrder@arr, data_collection/liquidations.py)
+LIQUIDATION_FLUSH_INTERVAL = float(os.getenv('LIQUIDATION_FLUSH_INTERVAL', 0.5))  # 초, Redis 일괄 기록 주기
+LIQUIDATION_EVENTS_MAX_LENGTH = int(os.getenv('LIQUIDATION_EVENTS_MAX_LENGTH', 1000))  # 심볼별 최근 이벤트 stream 길이 상한
+LIQUIDATION_EVENTS_MAX_AGE = int(os.getenv('LIQUIDATION_EVENTS_MAX_AGE', 3600))  # 초, 이보다 오래된 이벤트는 stream에서 제거
+LIQUIDATION_WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}  # 초, 롱/숏 notional 집계 구간
+LIQUIDATION_RECENT_DEFAULT = int(os.getenv('LIQUIDATION_RECENT_DEFAULT', 20))  # realtime 응답의 최근 이벤트 수 기본값
 
 LOGGING = {
     'version': 1,
@@ -0,0 +1,162 @@
+# data_collection/aggregation.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Aggregate, Avg, Count, DateTimeField, F, FloatField, Func, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from data_collection.models import FundingRate, Liquidation, OpenInterest, TradeVolume
+from data_collection.trade_aggregator import INTERVAL_MS
+
+# 요청 interval -> (date_trunc 단위, 배수)
+BUCKETS = {
+    '1m': ('minute', 1),
+    '5m': ('minute', 5),
+    '1h': ('hour', 1),
+    '1d': ('day', 1),
+}
+BUCKET_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# forceOrder의 S는 청산 주문 방향: SELL = 롱 청산, BUY = 숏 청산
+LONG_SIDES = ('SELL', 'LONG')
+SHORT_SIDES = ('BUY', 'SHORT')
+
+
+class EpochBucket(Func):
+    """date_trunc로 표현할 수 없는 N분 bucket (epoch 초 기준 floor)"""
+    template = "to_timestamp(floor(extract(epoch from %(expressions)s) / %(seconds)s) * %(seconds)s)"
+    output_field = DateTimeField()
+
+
+class First(Aggregate):
+    """bucket 안에서 시간순 첫 값. First(value, time_field) (PostgreSQL)"""
+    template = '(array_agg(%(expressions)s ASC))[1]'
+    arg_joiner = ' ORDER BY '
+    output_field = FloatField()
+
+
+class Last(First):
+    template = '(array_agg(%(expressions)s DESC))[1]'
+
+
+def time_bucket(field, interval):
+    unit, step = BUCKETS[interval]
+    if step == 1:
+        return Trunc(field, unit, output_field=DateTimeField())
+    return EpochBucket(field, seconds=BUCKET_SECONDS[unit] * step)
+
+
+def trade_volume_source_interval(interval):
+    """요청 interval을 나눠떨어지게 하는 가장 큰 저장 해상도의 bar를 읽는다."""
+    unit, step = BUCKETS[interval]
+    width_ms = BUCKET_SECONDS[unit] * step * 1000
+    persisted = [i for i in settings.TRADE_AGG_PERSIST_INTERVALS if i in INTERVAL_MS]
+    candidates = [i for i in persisted if width_ms % INTERVAL_MS[i] == 0]
+    return max(candidates or persisted, key=INTERVAL_MS.get)
+
+
+def _notional():
+    return F('price') * F('quantity')
+
+
+class Metric:
+    def __init__(self, model, time_field, columns, source_filter=None):
+        self.model = model
+        self.time_field = time_field
+        self.columns = columns
+        self.source_filter = source_filter
+
+    def queryset(self, symbol, interval, start, end):
+        queryset = self.model.objects.filter(**{
+            'symbol': symbol,
+            f'{self.time_field}__gte': start,
+            f'{self.time_field}__lt': end,
+        })
+        if self.source_filter is not None:
+            queryset = queryset.filter(**self.source_filter(interval))
+        return (
+            queryset.annotate(bucket=time_bucket(self.time_field, interval))
+            .values('bucket')
+            .annotate(**self.columns)
+            .order_by('bucket')
+        )
+
+
+METRICS = {
+    'trade_volume': Metric(
+        TradeVolume, 'bucket_start',
+        {
+            'open': First('open', 'bucket_start'),
+            'high': Max('high'),
+            'low': Min('low'),
+            'close': Last('close', 'bucket_start'),
+            'volume': Sum('volume'),
+            'buy_volume': Sum('buy_volume'),
+            'sell_volume': Sum('sell_volume'),
+            'trade_count': Sum('trade_count'),
+        },
+        source_filter=lambda interval: {'interval': trade_volume_source_interval(interval)},
+    ),
+    'open_interest': Metric(
+        OpenInterest, 'timestamp',
+        {
+            'mean': Avg('open_interest'),
+            'max': Max('open_interest'),
+            'min': Min('open_interest'),
+            'last': Last('open_interest', 'timestamp'),
+        },
+    ),
+    'funding_rate': Metric(
+        FundingRate, 'timestamp',
+        {
+            'mean': Avg('funding_rate'),
+            'max': Max('funding_rate'),
+            'last': Last('funding_rate', 'timestamp'),
+        },
+    ),
+    'liquidation': Metric(
+        Liquidation, 'timestamp',
+        {
+            'long_notional': Sum(_notional(), filter=Q(side__in=LONG_SIDES), output_field=FloatField()),
+            'short_notional': Sum(_notional(), filter=Q(side__in=SHORT_SIDES), output_field=FloatField()),
+            'long_count': Count('id', filter=Q(side__in=LONG_SIDES)),
+            'short_count': Count('id', filter=Q(side__in=SHORT_SIDES)),
+        },
+    ),
+}
+
+
+def bucket_width(interval):
+    unit, step = BUCKETS[interval]
+    return timedelta(seconds=BUCKET_SECONDS[unit] * step)
+
+
+def aggregate_metric(metric, symbol, interval, start=None, end=None):
+    """metric을 interval bucket으로 DB에서 집계해 컬럼 형식(dict of arrays)으로 반환한다."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric} (choose from {', '.join(METRICS)})")
+    if interval not in BUCKETS:
+        raise ValueError(f"Unknown interval: {interval} (choose from {', '.join(BUCKETS)})")
+    width = bucket_width(interval)
+    end = end or timezone.now()
+    start = start or end - width * settings.AGGREGATE_DEFAULT_BUCKETS
+    if start >= end:
+        raise ValueError("start must be earlier than end")
+    if (end - start) / width > settings.AGGREGATE_MAX_BUCKETS:
+        raise ValueError(f"Range too large: at most {settings.AGGREGATE_MAX_BUCKETS} {interval} buckets per request")
+
+    definition = METRICS[metric]
+    columns = list(definition.columns)
+    result = {
+        "symbol": symbol,
+        "metric": metric,
+        "interval": interval,
+        "timestamps": [],
+        "values": {column: [] for column in columns},
+    }
+    for row in definition.queryset(symbol, interval, start, end):
+        result["timestamps"].append(int(row['bucket'].timestamp() * 1000))
+        for column in columns:
+            result["values"][column].append(row[column])
+    return result
@@ -0,0 +1,121 @@
+# data_collection/async_views.py
+import asyncio
+import weakref
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views import View
+
+from .models import Liquidation
+from .serializers import LiquidationSerializer
+from .http_cache import etag_matches
+from .symbols import get_symbol_registry
+from .realtime import abatch_response, aliquidation_response, arealtime_response, parse_batch_query, parse_recent
+from .freshness import STREAMS as FRESHNESS_STREAMS, aread_freshness, freshness_report
+
+# ASGI 서버(uvicorn/daphne config.asgi:application)에서 쓰는 async 버전 뷰.
+# DRF APIView는 async 핸들러를 지원하지 않아 Django View를 쓴다. 응답 형식은 sync 뷰와 같다.
+
+# 이벤트 루프별 redis.asyncio 클라이언트 (연결은 루프에 묶여 있어 루프끼리 공유할 수 없다)
+_redis_clients = weakref.WeakKeyDictionary()
+
+NO_REALTIME_MESSAGES = {
+    'orderbook': "No orderbook data available",
+    'funding_rate': "No funding rate data available",
+    'trade_volume': "No trade volume data available",
+    'metrics': "No metrics data available",
+}
+
+
+def get_async_redis():
+    loop = asyncio.get_running_loop()
+    client = _redis_clients.get(loop)
+    if client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.ASYNC_REDIS_MAX_CONNECTIONS,
+            timeout=settings.ASYNC_REDIS_POOL_TIMEOUT,
+        )
+        client = _redis_clients[loop] = aioredis.Redis(connection_pool=pool)
+    return client
+
+
+class AsyncRealtimeView(View):
+    """/api/realtime/{orderbook,funding_rate,trade_volume,metrics}/ 의 async 버전 (symbol 하나)"""
+    data_type = None
+
+    async def get(self, request):
+        symbol = request.GET.get('symbol', 'BTCUSDT').upper()
+        response = await arealtime_response(request, get_async_redis(), self.data_type, symbol)
+        if response is not None:
+            return response
+        return JsonResponse({"status": "no_realtime_data", "message": NO_REALTIME_MESSAGES[self.data_type]}, status=404)
+
+
+class AsyncRealtimeLiquidationView(View):
+    async def get(self, request):
+        symbol = request.GET.get('symbol', 'BTCUSDT').upper()
+        try:
+            recent = parse_recent(request.GET.get('recent'))
+        except ValueError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+        response = await aliquidation_response(request, get_async_redis(), symbol, recent)
+        if response is not None:
+            return response
+
+        # Redis 데이터 없으면 PostgreSQL에서 최신 데이터 조회 (async ORM)
+        last_liquidation = await Liquidation.objects.filter(symbol=symbol).order_by('-timestamp').afirst()
+        return JsonResponse({
+            "status": "no_realtime_data",
+            "message": "No real-time liquidation data available",
+            "last_liquidation": LiquidationSerializer(last_liquidation).data if last_liquidation else None
+        })
+
+
+class AsyncRealtimeBatchView(View):
+    async def get(self, request):
+        redis_client = get_async_redis()
+        registry = get_symbol_registry()
+        # 기본 심볼 목록이 필요할 때만 레지스트리를 읽는다
+        data = await registry.aload(redis_client) if not request.GET.get('symbols') else None
+        try:
+            symbols, data_types = parse_batch_query(
+                request.GET.get('symbols'), request.GET.get('types'),
+                lambda: registry.usdt_symbols(data=data),
+            )
+        except ValueError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+        return await abatch_response(request, redis_client, symbols, data_types)
+
+
+class AsyncDataStatusView(View):
+    async def get(self, request):
+        stream = request.GET.get('stream')
+        symbol = request.GET.get('symbol', '').upper()
+        stale_only = request.GET.get('stale', '').lower() in ('1', 'true')
+        if stream and stream not in FRESHNESS_STREAMS:
+            return JsonResponse({"status": "error", "message": f"Unknown stream: {stream}"}, status=400)
+        try:
+            freshness = await aread_freshness(get_async_redis(), [stream] if stream else FRESHNESS_STREAMS)
+        except redis.RedisError as e:
+            return JsonResponse({"status": "error", "error": str(e)}, status=503)
+
+        return JsonResponse(freshness_report(freshness, symbol, stale_only), json_dumps_params={'ensure_ascii': False})
+
+
+class AsyncSymbolListView(View):
+    async def get(self, request):
+        registry = get_symbol_registry()
+        data = await registry.aload(get_async_redis())
+        detail = request.GET.get('detail', '').lower() in ('1', 'true')
+        etag = f'"{data["etag"]}{"-detail" if detail else ""}"'
+        headers = {'ETag': etag, 'Cache-Control': f'max-age={int(settings.SYMBOL_REGISTRY_LOCAL_TTL)}'}
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return HttpResponseNotModified(headers=headers)
+
+        symbols = registry.usdt_symbols(data=data)
+        if detail:
+            symbols = [data['symbols'][symbol] for symbol in symbols]
+        return JsonResponse(symbols, safe=False, headers=headers)
@@ -0,0 +1,378 @@
+# data_collection/backfill.py
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Max, Min, Window
+from django.db.models.functions import Lag
+from redis.exceptions import LockError, LockNotOwnedError
+
+from data_collection import partitions
+from data_collection.models import FundingRate, OpenInterest, TradeVolume
+from data_collection.trade_aggregator import INTERVAL_MS, TradeBar
+
+logger = logging.getLogger('data_collection')
+
+BACKFILL_LOCK_KEY = 'backfill:lock'
+
+
+def _ms(value):
+    return int(value.timestamp() * 1000)
+
+
+def _datetime(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=dt_timezone.utc)
+
+
+class BackfillDataset(ABC):
+    """테이블 하나의 gap 기준 시각 필드와 REST 조회/행 변환 방법.
+
+    chunk: REST 호출 한 번(또는 페이지 묶음)이 맡는 시간 폭, max_age: 거래소가 보관하는 기간.
+    """
+    name = None
+    model = None
+    time_field = 'timestamp'
+    chunk = None
+    max_age = None
+
+    @property
+    def threshold(self):
+        return timedelta(seconds=settings.BACKFILL_GAP_THRESHOLDS[self.name])
+
+    def queryset(self):
+        return self.model.objects.all()
+
+    @abstractmethod
+    def fetch(self, client, symbol, start_ms, end_ms):
+        """[start_ms, end_ms] 구간의 행(dict) 목록"""
+
+    def key(self, row):
+        return row[self.time_field]
+
+    def existing_keys(self, symbol, start, end):
+        values = self.queryset().filter(
+            symbol=symbol, **{f'{self.time_field}__gte': start, f'{self.time_field}__lte': end}
+        ).values_list(self.time_field, flat=True)
+        return set(values)
+
+
+def funding_rate_rows(items):
+    """/fapi/v1/fundingRate 정산 기록 -> FundingRate 행 (timestamp = 정산 시각)"""
+    return [
+        {
+            "symbol": item['symbol'],
+            "timestamp": _datetime(item['fundingTime']),
+            "funding_rate": float(item['fundingRate']),
+            "funding_time": _datetime(item['fundingTime']),
+        }
+        for item in items
+    ]
+
+
+class FundingRateBackfill(BackfillDataset):
+    name = 'funding_rate'
+    model = FundingRate
+    time_field = 'funding_time'
+    chunk = timedelta(days=30)
+
+    def fetch(self, client, symbol, start_ms, end_ms):
+        return funding_rate_rows(client.funding_rate(symbol=symbol, startTime=start_ms, endTime=end_ms, limit=1000))
+
+
+class OpenInterestBackfill(BackfillDataset):
+    name = 'open_interest'
+    model = OpenInterest
+    chunk = timedelta(minutes=5 * 500)
+    max_age = timedelta(days=30)  # openInterestHist는 최근 30일만 제공
+
+    def fetch(self, client, symbol, start_ms, end_ms):
+        items = client.open_interest_hist(symbol=symbol, period='5m', startTime=start_ms, endTime=end_ms, limit=500)
+        return [
+            {"symbol": symbol, "timestamp": _datetime(item['timestamp']), "open_interest": float(item['sumOpenInterest'])}
+            for item in items
+        ]
+
+
+class TradeVolumeBackfill(BackfillDataset):
+    """aggTrades를 TRADE_AGG_PERSIST_INTERVALS bar로 다시 집계한다. gap은 가장 짧은 해상도로 찾는다."""
+    name = 'trade_volume'
+    model = TradeVolume
+    time_field = 'bucket_start'
+
+    def __init__(self):
+        self.intervals = sorted(settings.TRADE_AGG_PERSIST_INTERVALS, key=INTERVAL_MS.__getitem__)
+        # aggTrades startTime~endTime은 1시간 미만이어야 하고 fetch가 양 끝을 가장 긴 bar 경계로 넓히므로
+        # 넓힌 뒤에도 1시간을 넘지 않게 그만큼 줄인다
+        self.chunk = timedelta(hours=1) - timedelta(milliseconds=INTERVAL_MS[self.intervals[-1]])
+
+    def queryset(self):
+        return self.model.objects.filter(interval=self.intervals[0])
+
+    def fetch(self, client, symbol, start_ms, end_ms):
+        # 가장 긴 bar 경계로 넓혀 경계 bar도 온전한 체결로 만든다
+        width = INTERVAL_MS[self.intervals[-1]]
+        start_ms -= start_ms % width
+        end_ms = min(end_ms - end_ms % width + width, int(time.time() * 1000)) - 1
+        bars = {interval: {} for interval in self.intervals}
+        params = {"startTime": start_ms, "endTime": end_ms}
+        while True:
+            trades = client.agg_trades(symbol=symbol, limit=1000, **params)
+            for trade in trades:
+                ts = trade['T']
+                if ts > end_ms:
+                    break
+                price, quantity = float(trade['p']), float(trade['q'])
+                for interval, interval_bars in bars.items():
+                    start = ts - ts % INTERVAL_MS[interval]
+                    bar = interval_bars.get(start)
+                    if bar is None:
+                        bar = interval_bars[start] = TradeBar(start, price)
+                    bar.add(price, quantity, trade['m'])
+                    bar.trade_count += trade['l'] - trade['f']  # aggTrade 하나에 묶인 체결 수
+            if len(trades) < 1000 or trades[-1]['T'] >= end_ms:
+                break
+            params = {"fromId": trades[-1]['a'] + 1}
+
+        rows = []
+        for interval, interval_bars in bars.items():
+            width = INTERVAL_MS[interval]
+            for bar in interval_bars.values():
+                # 열린 bar는 수집기가 닫는다
+                if bar.start + width > end_ms + 1:
+                    continue
+                rows.append({
+                    "symbol": symbol,
+                    "timestamp": _datetime(bar.start + width),
+                    "interval": interval,
+                    "bucket_start": _datetime(bar.start),
+                    "open": bar.open,
+                    "high": bar.high,
+                    "low": bar.low,
+                    "close": bar.close,
+                    "volume": bar.buy_volume + bar.sell_volume,
+                    "buy_volume": bar.buy_volume,
+                    "sell_volume": bar.sell_volume,
+                    "trade_count": bar.trade_count,
+                })
+        return rows
+
+    def key(self, row):
+        return row['interval'], row['bucket_start']
+
+    def existing_keys(self, symbol, start, end):
+        # 경계를 넓혀 조회하므로 가장 긴 bar 폭만큼 여유를 둔다
+        margin = timedelta(milliseconds=INTERVAL_MS[self.intervals[-1]])
+        return set(self.model.objects.filter(
+            symbol=symbol, interval__in=self.intervals, bucket_start__gte=start - margin, bucket_start__lte=end + margin,
+        ).values_list('interval', 'bucket_start'))
+
+
+# Liquidation은 거래소에 과거 강제 청산 조회 API가 없어 backfill 대상이 아니다
+DATASETS = {dataset.name: dataset for dataset in (FundingRateBackfill, OpenInterestBackfill, TradeVolumeBackfill)}
+
+
+def get_datasets(names=None):
+    return [DATASETS[name]() for name in (names or DATASETS)]
+
+
+def find_gaps(dataset, start, end, symbols=None):
+    """[start, end) 에서 연속 행 간격이 threshold를 넘는 구간 [(symbol, gap_start, gap_end)].
+
+    (symbol, 시각) 인덱스 순서로 LAG window를 계산하므로 테이블 전체를 정렬하지 않는다.
+    구간 앞뒤 가장자리의 빈 곳도 gap으로 본다. symbols를 주면 행이 하나도 없는 심볼은 구간 전체가 gap이다.
+    gap 양 끝은 기존 행 시각(제외)이고, 가장자리는 start 자체도 채우도록 1ms 앞에서 시작한다.
+    """
+    field = dataset.time_field
+    threshold = dataset.threshold
+    queryset = dataset.queryset().filter(**{f'{field}__gte': start, f'{field}__lt': end})
+    if symbols:
+        queryset = queryset.filter(symbol__in=symbols)
+
+    gaps = list(
+        queryset.annotate(previous=Window(Lag(field), partition_by=[F('symbol')], order_by=F(field).asc()))
+        .annotate(gap=ExpressionWrapper(F(field) - F('previous'), output_field=DurationField()))
+        .filter(gap__gt=threshold)
+        .values_list('symbol', 'previous', field)
+    )
+    edge = start - timedelta(milliseconds=1)
+    seen = set()
+    for symbol, first, last in queryset.values('symbol').annotate(first=Min(field), last=Max(field)).values_list('symbol', 'first', 'last'):
+        seen.add(symbol)
+        if first - start > threshold:
+            gaps.append((symbol, edge, first))
+        if end - last > threshold:
+            gaps.append((symbol, last, end))
+    if end - start > threshold:
+        gaps.extend((symbol, edge, end) for symbol in symbols or () if symbol not in seen)
+    return sorted(gaps)
+
+
+def plan_chunks(dataset, gaps, now=None):
+    """gap을 dataset.chunk 폭의 (symbol, start_ms, end_ms) 작업으로 나눈다 (양 끝 기존 행은 제외)."""
+    now = now or datetime.now(dt_timezone.utc)
+    oldest = now - dataset.max_age if dataset.max_age else None
+    step = int(dataset.chunk.total_seconds() * 1000)
+    for symbol, gap_start, gap_end in gaps:
+        if oldest is not None:
+            gap_start = max(gap_start, oldest)
+        start_ms, end_ms = _ms(gap_start) + 1, min(_ms(gap_end), _ms(now)) - 1
+        while start_ms <= end_ms:
+            yield symbol, start_ms, min(start_ms + step - 1, end_ms)
+            start_ms += step
+
+
+def insert_rows(model, rows):
+    """행을 INSERT 한 번으로 기록한다.
+
+    bulk_create는 auto_now_add인 timestamp를 현재 시각으로 덮어쓰므로 과거 시각을 넣으려면 직접 만든다.
+    """
+    if not rows:
+        return
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+    objs = [model(**row) for row in rows]
+    params = [field.get_db_prep_save(getattr(obj, field.attname), connection) for obj in objs for field in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES {', '.join([placeholder] * len(objs))}", params,
+        )
+
+
+def ensure_partitions(model, rows):
+    """과거 행이 들어갈 timestamp 파티션이 없으면 만든다 (PostgreSQL 파티션 테이블만)."""
+    table = model._meta.db_table
+    config = settings.TIMESERIES_PARTITIONING.get(table)
+    if connection.vendor != 'postgresql' or config is None or not rows:
+        return
+    timestamps = [row['timestamp'] for row in rows]
+    with connection.cursor() as cursor:
+        if partitions.is_partitioned(cursor, table):
+            partitions.create_partitions(
+                cursor, table, config['interval'], min(timestamps), max(timestamps) + timedelta(microseconds=1),
+            )
+
+
+class _Writer:
+    """이미 있는 key를 빼고 모았다가 BACKFILL_BATCH_SIZE 행씩 INSERT 한다.
+
+    chunk가 겹치면(trade_volume 경계 bar) 같은 행이 아직 INSERT 전인 pending에 있을 수 있으므로
+    DB에 있는 key와 함께 이번 실행에서 받은 key를 심볼별로 기억한다.
+    """
+
+    def __init__(self, dataset, stats):
+        self.dataset = dataset
+        self.stats = stats
+        self.pending = []
+        self.seen = defaultdict(set)  # symbol -> 이번 실행에서 받은 key
+
+    def add(self, symbol, start_ms, end_ms, rows):
+        existing = self.dataset.existing_keys(symbol, _datetime(start_ms), _datetime(end_ms))
+        seen = self.seen[symbol]
+        for row in rows:
+            key = self.dataset.key(row)
+            if key in existing or key in seen:
+                self.stats["skipped"] += 1
+                continue
+            seen.add(key)
+            self.pending.append(row)
+        if len(self.pending) >= settings.BACKFILL_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        batch_size = settings.BACKFILL_BATCH_SIZE
+        ensure_partitions(self.dataset.model, self.pending)
+        with transaction.atomic():
+            for i in range(0, len(self.pending), batch_size):
+                insert_rows(self.dataset.model, self.pending[i:i + batch_size])
+        self.stats["inserted"] += len(self.pending)
+        self.pending = []
+
+
+def run_backfill(datasets, start, end, symbols=None, client=None, concurrency=None, dry_run=False):
+    """gap 조회 -> chunk 병렬 REST 조회 (공유 weight budget) -> 중복 제외 일괄 INSERT.
+
+    REST 호출만 스레드에서 하고 DB 쓰기는 호출한 스레드에서 순서대로 한다.
+    같은 구간을 다시 돌려도 이미 있는 행은 건너뛴다.
+    """
+    if client is None:
+        from data_collection.binance_rest import get_rest_client
+        client = get_rest_client()
+    concurrency = concurrency or settings.BACKFILL_CONCURRENCY
+    results = {}
+    for dataset in datasets:
+        started = time.monotonic()
+        gaps = find_gaps(dataset, start, end, symbols)
+        jobs = list(plan_chunks(dataset, gaps))
+        stats = {
+            "gaps": len(gaps), "symbols": len({gap[0] for gap in gaps}), "chunks": len(jobs),
+            "fetched": 0, "inserted": 0, "skipped": 0, "failed": 0,
+        }
+        results[dataset.name] = stats
+        if dry_run or not jobs:
+            stats["seconds"] = round(time.monotonic() - started, 3)
+            continue
+
+        writer = _Writer(dataset, stats)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(dataset.fetch, client, *job): job for job in jobs}
+            for future in as_completed(futures):
+                symbol, start_ms, end_ms = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    logger.warning(f"Backfill {dataset.name} {symbol} {start_ms}-{end_ms} failed: {e}")
+                    continue
+                stats["fetched"] += len(rows)
+                writer.add(symbol, start_ms, end_ms, rows)
+        writer.flush()
+        stats["seconds"] = round(time.monotonic() - started, 3)
+        logger.info(f"Backfilled {dataset.name}: {stats}")
+    return results
+
+
+def _keep_lock(lock, timeout, stop):
+    """실행이 끝날 때까지 timeout/3 마다 lock 만료를 다시 timeout으로 늘린다."""
+    while not stop.wait(timeout / 3):
+        try:
+            lock.reacquire()
+        except LockNotOwnedError:
+            logger.error("Backfill lock was lost while running")
+            return
+        except Exception as e:
+            logger.warning(f"Backfill lock renewal failed: {e}")
+
+
+@contextmanager
+def backfill_lock(redis_client, timeout=None):
+    """명령과 Celery 태스크가 같은 구간을 동시에 채우지 않도록 하는 Redis lock. 못 잡으면 False.
+
+    redis-py Lock(uuid 토큰 + Lua compare-and-delete)을 쓰고, 잡고 있는 동안은 스레드가 만료를 늘린다.
+    """
+    timeout = timeout or settings.BACKFILL_LOCK_TIMEOUT
+    # 갱신 스레드가 같은 토큰을 써야 하므로 thread_local=False
+    lock = redis_client.lock(BACKFILL_LOCK_KEY, timeout=timeout, thread_local=False)
+    if not lock.acquire(blocking=False):
+        yield False
+        return
+    stop = threading.Event()
+    keeper = threading.Thread(target=_keep_lock, args=(lock, timeout, stop), name='backfill-lock', daemon=True)
+    keeper.start()
+    try:
+        yield True
+    finally:
+        stop.set()
+        keeper.join()
+        try:
+            lock.release()
+        except LockError as e:
+            logger.warning(f"Backfill lock release failed: {e}")
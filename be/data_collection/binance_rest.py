@@ -0,0 +1,290 @@
+# data_collection/binance_rest.py
+import asyncio
+import logging
+import time
+
+import httpx
+import redis
+import redis.asyncio as aioredis
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger('data_collection')
+
+WEIGHT_KEY_PREFIX = 'binance:weight'
+BANNED_UNTIL_KEY = 'binance:banned_until'
+
+# 요청한 used weight가 현재 값보다 클 때만 갱신 (여러 프로세스가 동시에 관측)
+_OBSERVE_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+return current
+"""
+
+# ban 확인 + 남은 weight 확인 + 예약(INCRBY)을 한 번에 해서 동시 호출이 함께 한도를 넘지 않게 한다
+# 반환: {예약 여부, 예약 전 used, banned_until}
+_ACQUIRE_SCRIPT = """
+local banned_until = redis.call('GET', KEYS[2])
+if banned_until and tonumber(banned_until) > tonumber(ARGV[3]) then
+    return {0, 0, banned_until}
+end
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if used + tonumber(ARGV[1]) > tonumber(ARGV[2]) then
+    return {0, used, ''}
+end
+redis.call('INCRBY', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return {1, used, ''}
+"""
+
+_rest_client = None
+_async_rest_client = None
+
+
+class BinanceAPIError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"Binance API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class RateLimitExceeded(BinanceAPIError):
+    def __init__(self, message, retry_after=None):
+        super().__init__(429, message)
+        self.retry_after = retry_after
+
+
+def request_weight(path, params):
+    """USDⓈ-M 엔드포인트별 request weight"""
+    params = params or {}
+    if path == '/fapi/v1/depth':
+        limit = int(params.get('limit', 500))
+        if limit <= 50:
+            return 2
+        if limit <= 100:
+            return 5
+        if limit <= 500:
+            return 10
+        return 20
+    if path == '/fapi/v1/ticker/24hr':
+        return 1 if params.get('symbol') else 40
+    if path == '/fapi/v1/premiumIndex':
+        return 1 if params.get('symbol') else 10
+    if path == '/fapi/v1/aggTrades':
+        return 20
+    return 1
+
+
+def _window_key(now=None):
+    return f"{WEIGHT_KEY_PREFIX}:{int((now or time.time()) // 60)}"
+
+
+class _BudgetPolicy:
+    def __init__(self, limit=None, policy=None, max_wait=None):
+        self.limit = int((limit or settings.BINANCE_WEIGHT_LIMIT) * settings.BINANCE_WEIGHT_HEADROOM)
+        self.policy = policy or settings.BINANCE_WEIGHT_POLICY
+        self.max_wait = settings.BINANCE_WEIGHT_MAX_WAIT if max_wait is None else max_wait
+
+    def _delay(self, used, weight, banned_until, now):
+        """지금 요청하면 안 되는 경우 기다려야 할 초를 반환한다."""
+        if banned_until and float(banned_until) > now:
+            return float(banned_until) - now
+        if used + weight > self.limit:
+            return 60 - now % 60
+        return 0
+
+    def _acquire_args(self, weight, now):
+        return [_window_key(now), BANNED_UNTIL_KEY], [weight, self.limit, now, 120]
+
+    def _acquire_delay(self, result, weight, now):
+        """_ACQUIRE_SCRIPT 결과 -> 예약됐으면 0, 아니면 기다릴 초"""
+        reserved, used, banned_until = result
+        if reserved:
+            return 0
+        return self._delay(int(used), weight, banned_until or None, now)
+
+    def _check(self, delay, waited):
+        if self.policy == 'shed' or waited + delay > self.max_wait:
+            raise RateLimitExceeded("Request weight budget exhausted", retry_after=delay)
+
+
+class RequestWeightBudget(_BudgetPolicy):
+    """X-MBX-USED-WEIGHT-1M 헤더와 예약 weight를 Redis에 모아 프로세스 간에 공유한다.
+
+    한도에 닿으면 policy='wait'는 다음 분까지 대기, 'shed'는 즉시 RateLimitExceeded.
+    """
+
+    def __init__(self, redis_client, **kwargs):
+        super().__init__(**kwargs)
+        self.redis_client = redis_client
+        self._observe = redis_client.register_script(_OBSERVE_SCRIPT)
+        self._acquire = redis_client.register_script(_ACQUIRE_SCRIPT)
+
+    def acquire(self, weight):
+        waited = 0.0
+        while True:
+            now = time.time()
+            keys, args = self._acquire_args(weight, now)
+            delay = self._acquire_delay(self._acquire(keys=keys, args=args), weight, now)
+            if not delay:
+                return
+            self._check(delay, waited)
+            time.sleep(delay)
+            waited += delay
+
+    def observe(self, used_weight):
+        self._observe(keys=[_window_key()], args=[used_weight, 120])
+
+    def ban(self, retry_after):
+        self.redis_client.set(BANNED_UNTIL_KEY, time.time() + retry_after, ex=int(retry_after) + 1)
+
+
+class AsyncRequestWeightBudget(_BudgetPolicy):
+    def __init__(self, redis_client, **kwargs):
+        super().__init__(**kwargs)
+        self.redis_client = redis_client
+        self._observe = redis_client.register_script(_OBSERVE_SCRIPT)
+        self._acquire = redis_client.register_script(_ACQUIRE_SCRIPT)
+
+    async def acquire(self, weight):
+        waited = 0.0
+        while True:
+            now = time.time()
+            keys, args = self._acquire_args(weight, now)
+            delay = self._acquire_delay(await self._acquire(keys=keys, args=args), weight, now)
+            if not delay:
+                return
+            self._check(delay, waited)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def observe(self, used_weight):
+        await self._observe(keys=[_window_key()], args=[used_weight, 120])
+
+    async def ban(self, retry_after):
+        await self.redis_client.set(BANNED_UNTIL_KEY, time.time() + retry_after, ex=int(retry_after) + 1)
+
+
+def _used_weight(headers):
+    value = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('X-MBX-USED-WEIGHT')
+    return int(value) if value else None
+
+
+def _retry_after(headers):
+    return float(headers.get('Retry-After') or 60)
+
+
+class _EndpointsMixin:
+    """UMFutures와 같은 이름/인자의 엔드포인트 메서드 (sync/async 공용)"""
+
+    def depth(self, symbol, **kwargs):
+        return self.get('/fapi/v1/depth', {'symbol': symbol, **kwargs})
+
+    def exchange_info(self):
+        return self.get('/fapi/v1/exchangeInfo')
+
+    def ticker_24hr_price_change(self, symbol=None):
+        return self.get('/fapi/v1/ticker/24hr', {'symbol': symbol} if symbol else None)
+
+    def mark_price(self, symbol=None):
+        return self.get('/fapi/v1/premiumIndex', {'symbol': symbol} if symbol else None)
+
+    def open_interest(self, symbol):
+        return self.get('/fapi/v1/openInterest', {'symbol': symbol})
+
+    def funding_rate(self, symbol=None, **kwargs):
+        # symbol이 없으면 전 심볼의 최근 정산 기록
+        return self.get('/fapi/v1/fundingRate', {'symbol': symbol, **kwargs} if symbol else kwargs)
+
+    def open_interest_hist(self, symbol, period, **kwargs):
+        return self.get('/futures/data/openInterestHist', {'symbol': symbol, 'period': period, **kwargs})
+
+    def agg_trades(self, symbol, **kwargs):
+        return self.get('/fapi/v1/aggTrades', {'symbol': symbol, **kwargs})
+
+
+class BinanceRestClient(_EndpointsMixin):
+    """keep-alive 커넥션 풀을 쓰는 동기 REST 클라이언트 (Celery 태스크, sync 뷰)"""
+
+    def __init__(self, base_url=None, budget=None, pool_size=None, timeout=None):
+        self.base_url = (base_url or settings.BINANCE_FAPI_BASE_URL).rstrip('/')
+        self.budget = budget or RequestWeightBudget(redis.Redis.from_url(settings.REDIS_URL))
+        self.timeout = timeout or settings.BINANCE_REST_TIMEOUT
+        pool_size = pool_size or settings.BINANCE_REST_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            # 연결 오류만 재시도, 429/418은 budget 쪽에서 처리
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5,
+                              respect_retry_after_header=False),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, path, params=None):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        self.budget.acquire(request_weight(path, params))
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        used_weight = _used_weight(response.headers)
+        if used_weight is not None:
+            self.budget.observe(used_weight)
+        if response.status_code in (418, 429):
+            retry_after = _retry_after(response.headers)
+            self.budget.ban(retry_after)
+            logger.error(f"Binance rate limit hit ({response.status_code}), backing off {retry_after}s")
+            raise RateLimitExceeded(response.text, retry_after=retry_after)
+        if response.status_code >= 400:
+            raise BinanceAPIError(response.status_code, response.text)
+        return response.json()
+
+
+class AsyncBinanceRestClient(_EndpointsMixin):
+    """asyncio 경로(수집기, async 뷰)용 httpx 기반 REST 클라이언트"""
+
+    def __init__(self, base_url=None, budget=None, pool_size=None, timeout=None):
+        self.base_url = (base_url or settings.BINANCE_FAPI_BASE_URL).rstrip('/')
+        self.budget = budget or AsyncRequestWeightBudget(aioredis.Redis.from_url(settings.REDIS_URL))
+        pool_size = pool_size or settings.BINANCE_REST_POOL_SIZE
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout or settings.BINANCE_REST_TIMEOUT,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            transport=httpx.AsyncHTTPTransport(retries=2),
+        )
+
+    async def get(self, path, params=None):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        await self.budget.acquire(request_weight(path, params))
+        response = await self.client.get(path, params=params)
+        used_weight = _used_weight(response.headers)
+        if used_weight is not None:
+            await self.budget.observe(used_weight)
+        if response.status_code in (418, 429):
+            retry_after = _retry_after(response.headers)
+            await self.budget.ban(retry_after)
+            logger.error(f"Binance rate limit hit ({response.status_code}), backing off {retry_after}s")
+            raise RateLimitExceeded(response.text, retry_after=retry_after)
+        if response.status_code >= 400:
+            raise BinanceAPIError(response.status_code, response.text)
+        return response.json()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def get_rest_client():
+    global _rest_client
+    if _rest_client is None:
+        _rest_client = BinanceRestClient()
+    return _rest_client
+
+
+def get_async_rest_client():
+    global _async_rest_client
+    if _async_rest_client is None:
+        _async_rest_client = AsyncBinanceRestClient()
+    return _async_rest_client
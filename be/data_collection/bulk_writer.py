@@ -0,0 +1,150 @@
+# data_collection/bulk_writer.py
+import asyncio
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger('data_collection')
+
+_STOP = object()
+_writers = {}
+
+
+class BulkWriter:
+    """모델별 비동기 쓰기 버퍼.
+
+    행을 bounded queue에 모았다가 batch_size 또는 flush_interval 기준으로
+    bulk_create 한 번에 기록한다. 큐가 가득 차면 add()가 대기하므로
+    Postgres가 밀릴 때 수집 루프에 backpressure가 걸린다.
+    """
+
+    def __init__(self, model, batch_size=None, flush_interval=None, max_pending=None,
+                 stats_interval=None):
+        self.model = model
+        self.batch_size = batch_size or settings.BULK_WRITER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.BULK_WRITER_FLUSH_INTERVAL
+        self.stats_interval = stats_interval or settings.BULK_WRITER_STATS_INTERVAL
+        self.queue = asyncio.Queue(maxsize=max_pending or settings.BULK_WRITER_MAX_PENDING)
+        self._task = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self._window_rows = 0
+        self._window_started = time.monotonic()
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def add(self, **fields):
+        await self.add_obj(self.model(**fields))
+
+    async def add_obj(self, obj):
+        self._ensure_started()
+        await self.queue.put(obj)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+        # 종료 시 큐에 남은 행까지 모두 기록
+        remaining = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+        if remaining:
+            await self._flush(remaining)
+
+    async def _flush(self, batch):
+        started = time.monotonic()
+        try:
+            await sync_to_async(self.model.objects.bulk_create)(batch, batch_size=self.batch_size)
+        except Exception as e:
+            # 어떤 예외든 writer task는 살려 두고 다음 batch를 계속 기록한다
+            self.rows_dropped += len(batch)
+            self.failed_flushes += 1
+            logger.error(f"Bulk insert of {len(batch)} {self.model.__name__} rows failed: {e}", exc_info=True)
+            return
+        latency = time.monotonic() - started
+        self.rows_written += len(batch)
+        self.flushes += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self._window_rows += len(batch)
+        self._report()
+
+    def _report(self):
+        elapsed = time.monotonic() - self._window_started
+        if elapsed < self.stats_interval:
+            return
+        stats = self.stats(elapsed)
+        logger.info(
+            f"{self.model.__name__} bulk writer: {stats['rows_per_sec']:.1f} rows/s, "
+            f"last flush {stats['last_flush_ms']:.1f} ms, max flush {stats['max_flush_ms']:.1f} ms, "
+            f"pending {stats['pending']}, dropped {stats['rows_dropped']}"
+        )
+        self._window_rows = 0
+        self._window_started = time.monotonic()
+        self.max_flush_latency = 0.0
+
+    def stats(self, elapsed=None):
+        if elapsed is None:
+            elapsed = time.monotonic() - self._window_started
+        return {
+            "model": self.model.__name__,
+            "rows_per_sec": self._window_rows / elapsed if elapsed > 0 else 0.0,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "max_flush_ms": self.max_flush_latency * 1000,
+            "pending": self.queue.qsize(),
+        }
+
+    async def close(self):
+        if self._task is None or self._task.done():
+            return
+        await self.queue.put(_STOP)
+        await self._task
+
+
+def get_bulk_writer(model):
+    """프로세스 단위로 공유되는 모델별 BulkWriter를 반환한다."""
+    writer = _writers.get(model)
+    if writer is None:
+        writer = _writers[model] = BulkWriter(model)
+    return writer
+
+
+def bulk_writer_stats():
+    return [writer.stats() for writer in _writers.values()]
+
+
+async def close_bulk_writers():
+    for writer in list(_writers.values()):
+        await writer.close()
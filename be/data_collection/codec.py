@@ -0,0 +1,49 @@
+# data_collection/codec.py
+import json
+import math
+
+# orjson이 설치되어 있으면 쓰고, 없으면 표준 json으로 동작한다
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+# 표준 json과 의미상 같은 결과를 낸다 (바이트까지 같지는 않음: 1e-9 vs 1e-09, NaN/Infinity는 null)
+# datetime은 default로 넘기고, int 등 str이 아닌 dict 키도 허용
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def loads(data):
+    """str/bytes JSON을 파이썬 객체로"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _has_non_finite(obj):
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(value) for value in obj)
+    return False
+
+
+def dumps(obj, default=None, allow_nan=True):
+    """compact JSON bytes (Redis 값, HTTP body용). default/allow_nan은 json.dumps와 같은 의미
+
+    orjson은 NaN/Infinity를 null로 쓰므로 allow_nan=False면 결과에 null이 있을 때만 원본을 검사해 ValueError를 낸다.
+    """
+    if orjson is not None:
+        ret = orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+        if not allow_nan and b'null' in ret and _has_non_finite(obj):
+            raise ValueError("Out of range float values are not JSON compliant")
+        return ret
+    return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False, allow_nan=allow_nan).encode()
+
+
+def dumps_str(obj, default=None):
+    """웹소켓 text frame처럼 str이 필요한 곳"""
+    return dumps(obj, default=default).decode()
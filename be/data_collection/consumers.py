@@ -1,64 +1,203 @@
 # cointracker/be/data_collection/consumers.py
-import json
-import logging
 import asyncio
-import websockets
+import logging
+import time
+import redis
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.utils import timezone
-from asgiref.sync import sync_to_async
-from data_collection.models import OrderBook
-from redis import Redis
-from binance.um_futures import UMFutures
-import requests
+from django.conf import settings
+from data_collection import codec
+from data_collection.async_views import get_async_redis
+from data_collection.delivery import CLIENT_STATS_KEY, DeliveryEncoder, SendQueue, SendQueueOverflow
+from data_collection.fanout import market_group, is_valid_symbol
+from data_collection.freshness import get_freshness_recorder
 
 logger = logging.getLogger('data_collection')
 
-# Redis 클라이언트
-redis_client = Redis.from_url(os.getenv('REDIS_URL'))
+
+def parse_max_rate(value):
+    """구독 메시지의 max_rate (초당 전송 수) -> 전송 간격(초). WS_MAX_RATE를 넘지 않는다."""
+    rate = settings.WS_DEFAULT_MAX_RATE if value is None else float(value)
+    if not rate > 0:
+        raise ValueError(f"Invalid max_rate: {value}")
+    return 1 / min(rate, settings.WS_MAX_RATE)
+
 
 class RealtimeDataConsumer(AsyncWebsocketConsumer):
+    """클라이언트가 구독한 심볼 그룹의 이벤트만 전달한다.
+
+    수집/저장은 FastAPI 수집기가 한 번만 수행하고, 여기서는
+    {"action": "subscribe", "symbols": [...], "max_rate": 4} 메시지에 따라 group_add만 한다.
+    심볼마다 max_rate를 넘지 않도록 stream별 최신 이벤트만 남겨(conflation) 보내고,
+    mode(full/delta)와 encoding(json/msgpack)은 subscribe/configure 메시지로 바꾼다.
+
+    frame은 연결별 bounded SendQueue에 넣고 writer task가 보내므로, 느린 클라이언트가
+    channel layer 수신(다른 이벤트 처리)을 막지 않는다. 큐가 넘치면 WS_OVERFLOW_POLICY를 따른다.
+    """
+
     async def connect(self):
+        self.subscriptions = {}  # symbol -> 전송 간격(초)
+        self.encoder = DeliveryEncoder()
+        self.queue = SendQueue(settings.WS_SEND_QUEUE_SIZE, settings.WS_OVERFLOW_POLICY)
+        self._latest = {}  # symbol -> {stream: event}, 아직 보내지 않은 최신 이벤트
+        self._next_send = {}
+        self._timers = {}
+        self.rate_limited = 0
+        self._overflowed = False
+        self.connected_at = int(time.time() * 1000)
         await self.accept()
-        self.binance = UMFutures(
-            key=os.getenv('BINANCE_API_KEY'),
-            secret=os.getenv('BINANCE_SECRET_KEY')
-        )
-        self.symbols = await self.get_symbols()
-        self.ws_tasks = []
-        for symbol in self.symbols:
-            task = asyncio.create_task(self.stream_data(symbol))
-            self.ws_tasks.append(task)
-
-    async def get_symbols(self):
-        res = requests.get('https://fapi.binance.com/fapi/v1/ticker/24hr')
-        return [item['symbol'] for item in res.json() if item['symbol'].endswith('USDT')]
-
-    async def stream_data(self, symbol):
-        uri = f"wss://fstream.binance.com/ws/{symbol.lower()}@depth"
+        # writer task의 ws_delivery 기록을 이 프로세스에서 주기적으로 flush
+        get_freshness_recorder().ensure_flusher()
+        self._tasks = [asyncio.ensure_future(self._write()), asyncio.ensure_future(self._report_stats())]
+
+    async def _write(self):
+        recorder = get_freshness_recorder()
         try:
-            async with websockets.connect(uri) as websocket:
-                logger.info(f"Connected to WebSocket for {symbol}: {uri}")
-                while True:
-                    data = await websocket.recv()
-                    data_json = json.loads(data)
-                    symbol = data_json.get('s', symbol)  # 심볼 확인
-                    await self.save_to_db_and_redis(symbol, data_json)
-                    await self.send(text_data=json.dumps(data_json))
+            while True:
+                key, text_data, bytes_data, event_time = await self.queue.get()
+                await self.send(text_data=text_data, bytes_data=bytes_data)
+                if key is not None:
+                    recorder.record('ws_delivery', key[0], event_time)
         except Exception as e:
-            logger.error(f"WebSocket error for {symbol}: {e}")
-
-    async def save_to_db_and_redis(self, symbol, data):
-        bids = data.get('b', [])
-        asks = data.get('a', [])
-        redis_client.setex(f"{symbol.lower()}_orderbook", 10, json.dumps(data))
-        await sync_to_async(OrderBook.objects.create)(
-            symbol=symbol,
-            bids=bids,
-            asks=asks,
-        )
-        logger.info(f"Saved orderbook for {symbol} at {timezone.now()}")
+            # writer가 죽으면 큐만 쌓이고 아무것도 보내지 않으므로 연결을 닫는다
+            logger.error(f"WebSocket writer failed for {self.channel_name}, closing: {e}", exc_info=True)
+            await self.close(code=1011)
+
+    def _enqueue(self, key, text_data, bytes_data, event_time=None):
+        try:
+            lost = self.queue.put(key, text_data, bytes_data, event_time)
+        except SendQueueOverflow as e:
+            if not self._overflowed:
+                self._overflowed = True
+                logger.warning(f"Closing slow WebSocket client {self.channel_name}: {e}")
+                # 남은 frame은 보내지 않고 바로 닫는다
+                self._tasks[0].cancel()
+                asyncio.ensure_future(self.close(code=1013))
+            return
+        if lost is not None and lost[1] == 'book' and not (self.queue.policy == 'conflate' and lost == key):
+            # 버려진 delta가 있으면 다음 book은 snapshot으로 (conflate 교체는 이미 snapshot)
+            self.encoder.resync([lost[0]])
+
+    def stats(self):
+        return {
+            "channel": self.channel_name,
+            "connected_at": self.connected_at,
+            "updated": int(time.time() * 1000),
+            "symbols": len(self.subscriptions),
+            "mode": self.encoder.mode,
+            "encoding": self.encoder.encoding,
+            "rate_limited": self.rate_limited,
+            **self.queue.stats(),
+        }
+
+    async def _report_stats(self):
+        # 연결별 큐 깊이/드롭 수를 Redis 해시에 주기적으로 기록 (status/clients/ 에서 조회)
+        while True:
+            try:
+                await get_async_redis().hset(CLIENT_STATS_KEY, self.channel_name, codec.dumps(self.stats()))
+            except redis.RedisError as e:
+                logger.warning(f"WebSocket client stats update failed: {e}")
+            await asyncio.sleep(settings.WS_CLIENT_STATS_INTERVAL)
+
+    async def reply(self, message):
+        text_data, bytes_data = self.encoder.frame(message)
+        self._enqueue(None, text_data, bytes_data)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        try:
+            message = codec.loads(text_data or bytes_data)
+            action = message.get('action')
+            symbols = [s.upper() for s in message.get('symbols', []) if is_valid_symbol(s)]
+            if action == 'subscribe':
+                interval = parse_max_rate(message.get('max_rate'))
+            if action in ('subscribe', 'configure') and ('mode' in message or 'encoding' in message):
+                # 형식이 바뀌면 delta 상태도 처음부터 (다음 book은 snapshot)
+                self.encoder = DeliveryEncoder(
+                    message.get('mode', self.encoder.mode), message.get('encoding', self.encoder.encoding),
+                )
+        except (TypeError, ValueError, AttributeError) as e:
+            await self.reply({"type": "error", "message": str(e) if isinstance(e, ValueError) else "Invalid message"})
+            return
+
+        if action == 'subscribe':
+            for symbol in symbols:
+                if symbol not in self.subscriptions:
+                    await self.channel_layer.group_add(market_group(symbol), self.channel_name)
+                self.subscriptions[symbol] = interval
+            self.encoder.resync(symbols)
+        elif action == 'unsubscribe':
+            for symbol in symbols:
+                if symbol in self.subscriptions:
+                    await self.channel_layer.group_discard(market_group(symbol), self.channel_name)
+                    del self.subscriptions[symbol]
+                    self._drop(symbol)
+        elif action == 'resync':
+            self.encoder.resync(symbols or None)
+        elif action != 'configure':
+            await self.reply({"type": "error", "message": f"Unknown action: {action}"})
+            return
+        await self.reply({
+            "type": "subscriptions",
+            "symbols": sorted(self.subscriptions),
+            "max_rate": {symbol: round(1 / interval, 3) for symbol, interval in sorted(self.subscriptions.items())},
+            "mode": self.encoder.mode,
+            "encoding": self.encoder.encoding,
+        })
+
+    async def market_event(self, event):
+        symbol = event["symbol"]
+        if symbol not in self.subscriptions:
+            return
+        pending = self._latest.setdefault(symbol, {})
+        if event["stream"] in pending:
+            self.rate_limited += 1
+        pending[event["stream"]] = event
+        if symbol in self._timers:
+            return
+        loop = asyncio.get_running_loop()
+        delay = self._next_send.get(symbol, 0) - loop.time()
+        if delay <= 0:
+            self._flush(symbol)
+        else:
+            # 간격이 지나면 그동안 쌓인 최신 이벤트만 보낸다
+            self._timers[symbol] = loop.call_later(delay, self._flush, symbol)
+
+    def _flush(self, symbol):
+        self._timers.pop(symbol, None)
+        events = self._latest.pop(symbol, None)
+        if not events or symbol not in self.subscriptions:
+            return
+        self._next_send[symbol] = asyncio.get_running_loop().time() + self.subscriptions[symbol]
+        for event in events.values():
+            key = (symbol, event["stream"])
+            if event["stream"] == 'book' and self.queue.policy == 'conflate' and key in self.queue:
+                # 큐의 book frame을 교체하므로 클라이언트가 받지 못한 상태 기준 delta가 되지 않게 snapshot으로
+                self.encoder.resync([symbol])
+            text_data, bytes_data = self.encoder.encode(event)
+            self._enqueue(key, text_data, bytes_data, event.get("event_time"))
+
+    def _drop(self, symbol):
+        timer = self._timers.pop(symbol, None)
+        if timer is not None:
+            timer.cancel()
+        self._latest.pop(symbol, None)
+        self._next_send.pop(symbol, None)
+        self.encoder.resync([symbol])
 
     async def disconnect(self, close_code):
-        for task in self.ws_tasks:
+        for task in getattr(self, '_tasks', ()):
             task.cancel()
-        logger.info("WebSocket disconnected")
\ No newline at end of file
+        for symbol in list(getattr(self, 'subscriptions', ())):
+            await self.channel_layer.group_discard(market_group(symbol), self.channel_name)
+            self._drop(symbol)
+        if hasattr(self, 'queue'):
+            stats = self.stats()
+            logger.info(
+                f"WebSocket disconnected ({close_code}): sent={stats['sent']} dropped={stats['dropped']} "
+                f"conflated={stats['conflated']} rate_limited={stats['rate_limited']} max_depth={stats['max_depth']}"
+            )
+            try:
+                await get_async_redis().hdel(CLIENT_STATS_KEY, self.channel_name)
+            except redis.RedisError as e:
+                logger.warning(f"WebSocket client stats cleanup failed: {e}")
+        else:
+            logger.info("WebSocket disconnected")
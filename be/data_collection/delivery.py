@@ -0,0 +1,176 @@
+# data_collection/delivery.py
+import asyncio
+import time
+from collections import deque
+
+import msgpack
+
+from data_collection import codec
+
+MODES = ('full', 'delta')
+ENCODINGS = ('json', 'msgpack')
+# 송신 큐가 가득 찼을 때: 가장 오래된 frame 버림 / 같은 (symbol, stream) frame 교체 후 버림 / 연결 종료
+OVERFLOW_POLICIES = ('drop_oldest', 'conflate', 'disconnect')
+# 연결별 송신 큐 통계 해시 (field = channel name)
+CLIENT_STATS_KEY = 'ws:clients'
+
+
+def diff_levels(previous, levels):
+    """이전에 보낸 {price: qty}와 새 [[price, qty], ...]를 비교해 바뀐 호가만 돌려준다 (qty 0 = 삭제)."""
+    current = {price: qty for price, qty in levels}
+    changes = [[price, qty] for price, qty in levels if previous.get(price) != qty]
+    changes.extend([price, 0] for price in previous if price not in current)
+    return changes, current
+
+
+class DeliveryEncoder:
+    """클라이언트 하나의 전송 형식을 만든다.
+
+    full: publisher가 인코딩한 frame을 그대로 보낸다 (json이면 디코딩 없음).
+    delta: book stream은 심볼별 seq와 함께 바뀐 호가만 보내고, 첫 전송과 resync 후에는 snapshot을 보낸다.
+    클라이언트는 seq가 끊기면 {"action": "resync"}로 snapshot을 다시 받는다.
+    """
+
+    def __init__(self, mode='full', encoding='json'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        self.mode = mode
+        self.encoding = encoding
+        self._books = {}  # symbol -> (seq, bids {price: qty}, asks {price: qty})
+
+    def resync(self, symbols=None):
+        """다음 book 전송을 snapshot으로 (symbols가 없으면 전체)"""
+        if symbols is None:
+            self._books.clear()
+        for symbol in symbols or ():
+            self._books.pop(symbol, None)
+
+    def encode(self, event):
+        """channel layer 이벤트 -> (text_data, bytes_data) 중 하나"""
+        if self.mode == 'full' and self.encoding == 'json':
+            return event["text"], None
+        message = codec.loads(event["text"])
+        if self.mode == 'delta' and event["stream"] == 'book':
+            message = self._book_message(event["symbol"], message["data"])
+        return self.frame(message)
+
+    def frame(self, message):
+        if self.encoding == 'msgpack':
+            return None, msgpack.packb(message)
+        return codec.dumps_str(message), None
+
+    def _book_message(self, symbol, data):
+        state = self._books.get(symbol)
+        if state is None:
+            seq, kind = 1, 'snapshot'
+            bids, bid_levels = data["bids"], {price: qty for price, qty in data["bids"]}
+            asks, ask_levels = data["asks"], {price: qty for price, qty in data["asks"]}
+        else:
+            seq, kind = state[0] + 1, 'delta'
+            bids, bid_levels = diff_levels(state[1], data["bids"])
+            asks, ask_levels = diff_levels(state[2], data["asks"])
+        self._books[symbol] = (seq, bid_levels, ask_levels)
+        return {
+            "type": kind,
+            "symbol": symbol,
+            "stream": 'book',
+            "seq": seq,
+            "E": data.get("E"),
+            "u": data.get("u"),
+            "bids": bids,
+            "asks": asks,
+        }
+
+
+class SendQueueOverflow(Exception):
+    pass
+
+
+class SendQueue:
+    """웹소켓 연결 하나의 bounded 송신 큐. consumer는 put만 하고 writer task가 get해서 보낸다.
+
+    항목은 [key, text_data, bytes_data, event_time]이고 key는 (symbol, stream) 또는 None(제어 메시지).
+    conflate 정책은 같은 key의 frame이 아직 큐에 있으면 그 자리에서 교체한다.
+    """
+
+    def __init__(self, maxsize, policy='conflate'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._frames = deque()
+        self._keys = {}
+        self._ready = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __contains__(self, key):
+        """같은 key의 frame이 아직 보내지지 않고 큐에 있는지"""
+        return key in self._keys
+
+    def put(self, key, text_data=None, bytes_data=None, event_time=None):
+        """교체되거나 버려진 frame의 key를 돌려준다. 가득 찼는데 policy가 disconnect면 SendQueueOverflow"""
+        lost = None
+        if self.policy == 'conflate' and key is not None:
+            queued = self._keys.get(key)
+            if queued is not None:
+                queued[1:] = text_data, bytes_data, event_time
+                self.conflated += 1
+                return key
+        if len(self._frames) >= self.maxsize:
+            if self.policy == 'disconnect':
+                raise SendQueueOverflow(f"Send queue full ({self.maxsize} frames)")
+            lost = self._pop()[0]
+            self.dropped += 1
+        entry = [key, text_data, bytes_data, event_time]
+        self._frames.append(entry)
+        if key is not None:
+            self._keys[key] = entry
+        self.max_depth = max(self.max_depth, len(self._frames))
+        self._ready.set()
+        return lost
+
+    async def get(self):
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        self.sent += 1
+        return self._pop()
+
+    def _pop(self):
+        entry = self._frames.popleft()
+        if entry[0] is not None and self._keys.get(entry[0]) is entry:
+            del self._keys[entry[0]]
+        return entry
+
+    def stats(self):
+        return {
+            "depth": len(self._frames),
+            "max_depth": self.max_depth,
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
+
+
+def parse_client_stats(fields, max_age, now_ms=None):
+    """CLIENT_STATS_KEY 해시 -> (연결 목록, max_age초보다 오래돼 지울 field 목록)"""
+    now_ms = now_ms or int(time.time() * 1000)
+    clients, expired = [], []
+    for field, value in fields.items():
+        stats = codec.loads(value)
+        if now_ms - stats["updated"] > max_age * 1000:
+            expired.append(field)
+            continue
+        clients.append(stats)
+    clients.sort(key=lambda stats: (-stats["dropped"], -stats["depth"], stats["channel"]))
+    return clients, expired
@@ -0,0 +1,258 @@
+# data_collection/export.py
+import csv
+import io
+import json
+import zlib
+from datetime import timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from data_collection import codec
+from data_collection.models import FundingRate, Liquidation, OpenInterest, OrderBook, TradeVolume
+from data_collection.orderbook_codec import OrderBookStreamDecoder
+
+# dataset -> (model, 내보낼 컬럼)
+EXPORT_DATASETS = {
+    'orderbook': (OrderBook, ['id', 'symbol', 'timestamp', 'bids', 'asks']),
+    'trade_volume': (TradeVolume, [
+        'id', 'symbol', 'timestamp', 'interval', 'bucket_start', 'open', 'high', 'low', 'close',
+        'volume', 'buy_volume', 'sell_volume', 'trade_count',
+    ]),
+    'funding_rate': (FundingRate, ['id', 'symbol', 'timestamp', 'funding_rate', 'funding_time']),
+    'open_interest': (OpenInterest, ['id', 'symbol', 'timestamp', 'open_interest']),
+    'liquidation': (Liquidation, ['id', 'symbol', 'timestamp', 'side', 'quantity', 'price']),
+}
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+COMPRESSIONS = {
+    'none': (None, ''),
+    'gzip': ('application/gzip', '.gz'),
+    'zstd': ('application/zstd', '.zst'),
+}
+# packed 오더북 복원에 필요한 추가 컬럼
+ORDERBOOK_SOURCE_COLUMNS = ['encoding', 'payload']
+
+
+class ExportRequest:
+    def __init__(self, dataset, symbol=None, start=None, end=None, fmt='ndjson', compression='none', chunk_size=None):
+        if dataset not in EXPORT_DATASETS:
+            raise ValueError(f"Unknown dataset: {dataset} (choose from {', '.join(EXPORT_DATASETS)})")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt} (choose from {', '.join(FORMATS)})")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (choose from {', '.join(COMPRESSIONS)})")
+        self.dataset = dataset
+        self.symbol = symbol.upper() if symbol else None
+        self.end = end or timezone.now()
+        self.start = start or self.end - timedelta(days=1)
+        if self.start >= self.end:
+            raise ValueError("start must be earlier than end")
+        self.format = fmt
+        self.compression = compression
+        self.chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+        if fmt == 'parquet':
+            _require('pyarrow', 'parquet export')
+        if compression == 'zstd' and fmt != 'parquet':
+            _require('zstandard', 'zstd compression')
+
+    @property
+    def columns(self):
+        return EXPORT_DATASETS[self.dataset][1]
+
+    @property
+    def content_type(self):
+        if self.format == 'parquet' or self.compression == 'none':
+            return FORMATS[self.format][0]
+        return COMPRESSIONS[self.compression][0]
+
+    @property
+    def filename(self):
+        extension = FORMATS[self.format][1]
+        if self.format != 'parquet':
+            extension += COMPRESSIONS[self.compression][1]
+        span = f"{self.start:%Y%m%dT%H%M%S}_{self.end:%Y%m%dT%H%M%S}"
+        return f"{self.dataset}_{self.symbol or 'all'}_{span}.{extension}"
+
+
+def _require(module, feature):
+    try:
+        __import__(module)
+    except ImportError:
+        raise ValueError(f"{feature} requires the '{module}' package")
+
+
+def iter_rows(request):
+    """서버 사이드 커서로 (start, end) 구간을 시간순 튜플로 읽는다. 오더북은 bids/asks를 복원한다.
+
+    autocommit에서는 Django가 WITH HOLD 커서를 써서 커밋 시점에 결과 전체를 서버에 만들어 두므로
+    트랜잭션 안에서 읽어 첫 청크가 바로 나오게 한다.
+    """
+    with transaction.atomic():
+        yield from _iter_rows(request)
+
+
+def _iter_rows(request):
+    model, columns = EXPORT_DATASETS[request.dataset]
+    queryset = model.objects.filter(timestamp__gte=request.start, timestamp__lt=request.end)
+    if request.symbol:
+        queryset = queryset.filter(symbol=request.symbol)
+    queryset = queryset.order_by('timestamp', 'id')
+    if model is not OrderBook:
+        yield from queryset.values_list(*columns).iterator(chunk_size=request.chunk_size)
+        return
+
+    decoder = OrderBookStreamDecoder()
+    for row_id, symbol, timestamp, bids, asks, encoding, payload in (
+        queryset.values_list(*columns, *ORDERBOOK_SOURCE_COLUMNS).iterator(chunk_size=request.chunk_size)
+    ):
+        if encoding == 'packed':
+            bids, asks = decoder.decode(row_id, symbol, timestamp, payload)
+        yield row_id, symbol, timestamp, bids, asks
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text_value(value):
+    if isinstance(value, list):
+        return json.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(columns, chunks):
+    for chunk in chunks:
+        yield b''.join(codec.dumps(dict(zip(columns, row)), default=_text_value) + b'\n' for row in chunk)
+
+
+def encode_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows([_text_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _DrainableSink(io.RawIOBase):
+    """ParquetWriter가 쓴 bytes를 row group마다 꺼내 갈 수 있는 파일 객체"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def arrow_schema(model, columns):
+    """모델 필드 타입으로 고정 스키마를 만든다 (첫 청크가 null뿐이어도 타입이 흔들리지 않게)."""
+    import pyarrow as pa
+
+    types = {
+        'AutoField': pa.int64(), 'BigAutoField': pa.int64(), 'IntegerField': pa.int64(),
+        'FloatField': pa.float64(), 'CharField': pa.string(), 'BooleanField': pa.bool_(),
+        'DateTimeField': pa.timestamp('us', tz='UTC'),
+        'JSONField': pa.list_(pa.list_(pa.float64())),  # 오더북 [[price, qty], ...]
+    }
+    return pa.schema([
+        (column, types[model._meta.get_field(column).get_internal_type()]) for column in columns
+    ])
+
+
+def encode_parquet(model, columns, chunks, compression):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(model, columns)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    for chunk in chunks:
+        # 청크 하나가 row group 하나
+        writer.write_table(pa.Table.from_pydict({
+            column: [row[index] for row in chunk] for index, column in enumerate(columns)
+        }, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _compress(stream, compression):
+    """청크마다 flush해서 압축하더라도 첫 바이트가 바로 나가게 한다."""
+    if compression == 'gzip':
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for data in stream:
+            yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    elif compression == 'zstd':
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor().compressobj()
+        for data in stream:
+            yield compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        yield compressor.flush()
+    else:
+        yield from stream
+
+
+def iter_export(request):
+    """요청한 형식/압축으로 인코딩된 bytes 청크를 순서대로 내보낸다. 메모리는 chunk_size 행만 쓴다."""
+    chunks = _chunks(iter_rows(request), request.chunk_size)
+    if request.format == 'parquet':
+        # parquet은 파일 내부 컬럼 압축을 쓴다
+        model = EXPORT_DATASETS[request.dataset][0]
+        yield from (data for data in encode_parquet(model, request.columns, chunks, request.compression) if data)
+        return
+    encoder = encode_ndjson if request.format == 'ndjson' else encode_csv
+    yield from (data for data in _compress(encoder(request.columns, chunks), request.compression) if data)
+
+
+_DONE = object()
+
+
+async def aiter_export(request):
+    """iter_export의 async 버전 (ASGI용).
+
+    ASGI에서 StreamingHttpResponse에 동기 iterator를 주면 Django가 전체를 list로 모은 뒤 보낸다.
+    동기 generator를 청크마다 sync_to_async로 한 단계씩 진행해 메모리를 chunk_size 행으로 유지한다.
+    thread_sensitive라 모든 단계가 같은 스레드에서 돌아 DB 커서/트랜잭션이 유지된다.
+    """
+    chunks = iter_export(request)
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await step(chunks, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
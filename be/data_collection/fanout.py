@@ -0,0 +1,37 @@
+# data_collection/fanout.py
+import logging
+
+from channels.layers import get_channel_layer
+
+from data_collection import codec
+
+logger = logging.getLogger('data_collection')
+
+
+def market_group(symbol):
+    """심볼별 channel layer 그룹 이름 (예: market.btcusdt)"""
+    return f"market.{symbol.lower()}"
+
+
+def is_valid_symbol(symbol):
+    return isinstance(symbol, str) and 0 < len(symbol) <= 20 and symbol.isalnum()
+
+
+class MarketEventPublisher:
+    """수집 프로세스가 정규화한 이벤트를 심볼 그룹으로 한 번만 발행한다.
+
+    클라이언트에 보낼 frame은 여기서 한 번만 인코딩하고, consumer는 text를 그대로 전달한다.
+    """
+
+    def __init__(self, channel_layer=None):
+        self.channel_layer = channel_layer or get_channel_layer()
+
+    async def publish(self, symbol, stream, data):
+        symbol = symbol.upper()
+        await self.channel_layer.group_send(market_group(symbol), {
+            "type": "market.event",
+            "symbol": symbol,
+            "stream": stream,
+            "event_time": data.get('E') if isinstance(data, dict) else None,
+            "text": codec.dumps_str({"type": "market", "symbol": symbol, "stream": stream, "data": data}),
+        })
@@ -0,0 +1,153 @@
+# data_collection/freshness.py
+import asyncio
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger('data_collection')
+
+# 수집 경로별 stream 이름. 상태 조회는 이 목록의 해시만 읽는다 (키 스캔 없음)
+STREAMS = ('orderbook', 'funding_rate', 'open_interest', 'trade_volume', 'liquidation', 'ws_delivery')
+
+_recorder = None
+
+
+def stream_key(stream):
+    return f"freshness:{stream}"
+
+
+class FreshnessRecorder:
+    """writer가 심볼별 마지막 갱신 시각, 메시지 수, 지연(lag)을 stream 해시에 기록한다.
+
+    해시 필드는 {SYMBOL}:ts (ms), {SYMBOL}:count, {SYMBOL}:lag (ms).
+    record()는 메모리에만 누적하고 (Redis 호출 없음), flush()가 파이프라인 한 번으로 기록한다.
+    asyncio 프로세스는 run_flusher()가 flush_interval마다 스레드에서 flush 하고,
+    Celery 태스크는 기록 직후 직접 flush() 한다.
+    """
+
+    def __init__(self, redis_client=None, flush_interval=None):
+        self.redis_client = redis_client or redis.Redis.from_url(settings.REDIS_URL)
+        self.flush_interval = settings.FRESHNESS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def record(self, stream, symbol, event_time_ms=None, count=1):
+        now_ms = int(time.time() * 1000)
+        lag = now_ms - int(event_time_ms) if event_time_ms else None
+        with self._lock:
+            entry = self._pending.get((stream, symbol))
+            if entry is None:
+                self._pending[(stream, symbol)] = [now_ms, count, lag]
+            else:
+                entry[0] = now_ms
+                entry[1] += count
+                if lag is not None:
+                    entry[2] = lag
+
+    async def run_flusher(self):
+        # 동기 Redis 파이프라인이 이벤트 루프를 막지 않도록 스레드에서 flush
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await asyncio.to_thread(self.flush)
+
+    def ensure_flusher(self):
+        """현재 이벤트 루프에 run_flusher 태스크가 없으면 띄운다 (Channels consumer용)."""
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not asyncio.get_running_loop():
+            self._flusher = asyncio.ensure_future(self.run_flusher())
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for (stream, symbol), (updated_ms, count, lag) in pending.items():
+                key = stream_key(stream)
+                mapping = {f"{symbol}:ts": updated_ms}
+                if lag is not None:
+                    mapping[f"{symbol}:lag"] = lag
+                pipe.hset(key, mapping=mapping)
+                pipe.hincrby(key, f"{symbol}:count", count)
+            pipe.execute()
+        except redis.RedisError as e:
+            # 상태 기록 실패가 수집을 멈추게 해서는 안 된다
+            logger.warning(f"Freshness flush failed: {e}")
+
+
+def read_freshness(redis_client, streams=STREAMS, now_ms=None):
+    """모든 stream 해시를 파이프라인 한 번으로 읽어 {stream: {symbol: {...}}} 로 반환한다."""
+    pipe = redis_client.pipeline(transaction=False)
+    for stream in streams:
+        pipe.hgetall(stream_key(stream))
+    return parse_freshness(streams, pipe.execute(), now_ms)
+
+
+async def aread_freshness(redis_client, streams=STREAMS, now_ms=None):
+    """read_freshness의 redis.asyncio 버전"""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for stream in streams:
+            pipe.hgetall(stream_key(stream))
+        hashes = await pipe.execute()
+    return parse_freshness(streams, hashes, now_ms)
+
+
+def parse_freshness(streams, hashes, now_ms=None):
+    now_ms = now_ms or int(time.time() * 1000)
+    stale_after = settings.FRESHNESS_STALE_AFTER
+    result = {}
+    for stream, fields in zip(streams, hashes):
+        symbols = {}
+        for field, value in fields.items():
+            symbol, _, name = field.decode().rpartition(':')
+            symbols.setdefault(symbol, {})[name] = int(value)
+        threshold = stale_after.get(stream)
+        entries = {}
+        for symbol, values in sorted(symbols.items()):
+            if 'ts' not in values:
+                continue
+            age = (now_ms - values['ts']) / 1000
+            entries[symbol] = {
+                "last_update": values['ts'],
+                "age_seconds": round(age, 3),
+                "count": values.get('count', 0),
+                "lag_ms": values.get('lag'),
+                "stale": age > threshold if threshold is not None else None,
+            }
+        result[stream] = entries
+    return result
+
+
+def freshness_report(freshness, symbol=None, stale_only=False):
+    """상태 API 응답: stream별 요약과 심볼별 상세, 전체 상태(ok/degraded/warning)"""
+    streams = {}
+    stale_count = 0
+    feed_count = 0
+    for name, entries in freshness.items():
+        if symbol:
+            entries = {s: e for s, e in entries.items() if s == symbol}
+        stale = [s for s, e in entries.items() if e["stale"]]
+        stale_count += len(stale)
+        feed_count += len(entries)
+        if stale_only:
+            entries = {s: entries[s] for s in stale}
+        streams[name] = {"symbols": len(entries), "stale": len(stale), "data": entries}
+
+    if not feed_count:
+        return {"status": "warning", "message": "확인된 데이터가 없습니다.", "streams": streams}
+    return {
+        "status": "degraded" if stale_count else "ok",
+        "message": f"{feed_count}개 피드 중 {stale_count}개가 지연되었습니다.",
+        "streams": streams,
+    }
+
+
+def get_freshness_recorder():
+    global _recorder
+    if _recorder is None:
+        _recorder = FreshnessRecorder()
+    return _recorder
@@ -0,0 +1,58 @@
+# data_collection/http_cache.py
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.http import http_date
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def version_key(key):
+    """데이터 키 옆에 writer가 같이 기록하는 갱신 시각(ms) 키"""
+    return f"{key}:v"
+
+
+def new_version():
+    return int(time.time() * 1000)
+
+
+def make_etag(version):
+    if isinstance(version, bytes):
+        version = version.decode()
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # 약한 비교: W/ 접두사는 무시
+    return etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
+
+def version_headers(version):
+    """버전(ms)으로 ETag / Last-Modified 헤더를 만든다."""
+    if version is None:
+        return {}
+    return {'ETag': make_etag(version), 'Last-Modified': http_date(int(version) / 1000)}
+
+
+def realtime_cache_control(data_type):
+    return f"max-age={settings.REALTIME_CACHE_MAX_AGE.get(data_type, 1)}"
+
+
+def historical_cache_control(end):
+    """backfill이 더 이상 채우지 않는 구간(HISTORICAL_IMMUTABLE_AFTER)만 immutable로 표시한다.
+
+    닫혔지만 backfill 기간 안의 구간은 gap이 채워질 수 있으므로 제한된 max-age 후 재검증하게 한다.
+    """
+    if end is None:
+        return f"max-age={settings.HISTORICAL_CACHE_MAX_AGE}"
+    age = (timezone.now() - end).total_seconds()
+    if age >= settings.HISTORICAL_IMMUTABLE_AFTER:
+        return IMMUTABLE
+    if age >= settings.HISTORICAL_CLOSED_AFTER:
+        return f"public, max-age={settings.HISTORICAL_CLOSED_MAX_AGE}, must-revalidate"
+    return f"max-age={settings.HISTORICAL_CACHE_MAX_AGE}"
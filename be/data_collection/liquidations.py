@@ -0,0 +1,153 @@
+# data_collection/liquidations.py
+import logging
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from data_collection import codec
+from data_collection.bulk_writer import get_bulk_writer
+from data_collection.models import Liquidation
+from data_collection.realtime import liquidation_events_key, store_realtime
+
+logger = logging.getLogger('data_collection')
+
+# 전 심볼 강제 청산 스트림 (소켓 하나)
+ALL_MARKET_STREAM = '!forceOrder@arr'
+
+# 스트림 ID는 XADD 시점의 Redis 서버 시계로 매겨지므로 MINID도 가장 최근 ID 기준으로 계산한다
+# (로컬 시계가 앞서 있어도 방금 넣은 이벤트가 잘리지 않는다)
+_TRIM_SCRIPT = """
+local newest = redis.call('XREVRANGE', KEYS[1], '+', '-', 'COUNT', 1)[1]
+if not newest then
+    return 0
+end
+local newest_ms = tonumber(string.match(newest[1], '^(%d+)'))
+return redis.call('XTRIM', KEYS[1], 'MINID', '~', newest_ms - tonumber(ARGV[1]))
+"""
+
+
+class RollingNotional:
+    """한 구간의 롱/숏 청산 notional 합계. 이벤트 추가와 만료 제거 모두 amortized O(1)."""
+
+    __slots__ = ('width_ms', 'events', 'long_notional', 'short_notional')
+
+    def __init__(self, width_ms):
+        self.width_ms = width_ms
+        self.events = deque()
+        self.long_notional = 0.0
+        self.short_notional = 0.0
+
+    def add(self, ts, notional, is_long):
+        self.events.append((ts, notional, is_long))
+        if is_long:
+            self.long_notional += notional
+        else:
+            self.short_notional += notional
+
+    def expire(self, now_ms):
+        limit = now_ms - self.width_ms
+        events = self.events
+        while events and events[0][0] <= limit:
+            _, notional, is_long = events.popleft()
+            if is_long:
+                self.long_notional -= notional
+            else:
+                self.short_notional -= notional
+        if not events:
+            # 빼기 누적 오차 제거
+            self.long_notional = self.short_notional = 0.0
+
+    def to_dict(self):
+        return {
+            "long_notional": self.long_notional,
+            "short_notional": self.short_notional,
+            "count": len(self.events),
+        }
+
+
+class LiquidationAggregator:
+    """!forceOrder@arr 이벤트를 심볼별로 모았다가 flush마다 한 번에 기록한다.
+
+    - {symbol}_liquidation_events: 최근 이벤트 Redis stream (MAXLEN/MINID로 길이와 나이 제한)
+    - {symbol}_liquidation: 마지막 이벤트 (기존 realtime 키)
+    - {symbol}_liquidation_stats: LIQUIDATION_WINDOWS 구간별 롱/숏 notional
+    - Liquidation 행은 BulkWriter로 일괄 저장
+    """
+
+    def __init__(self, redis_client, metrics_engine=None, freshness=None):
+        self.redis_client = redis_client
+        self.metrics_engine = metrics_engine
+        self.freshness = freshness
+        self.windows = {}
+        self._pending = defaultdict(self._pending_events)
+        self._trim = redis_client.register_script(_TRIM_SCRIPT)
+
+    @staticmethod
+    def _pending_events():
+        # Redis 장애가 길어져도 스트림 MAXLEN 이상은 쌓아 두지 않는다
+        return deque(maxlen=settings.LIQUIDATION_EVENTS_MAX_LENGTH)
+
+    def _get_windows(self, symbol):
+        windows = self.windows.get(symbol)
+        if windows is None:
+            windows = self.windows[symbol] = {
+                name: RollingNotional(seconds * 1000) for name, seconds in settings.LIQUIDATION_WINDOWS.items()
+            }
+        return windows
+
+    async def add(self, event):
+        order = event['o']
+        symbol = order['s']
+        price = float(order['p'])
+        quantity = float(order['q'])
+        is_long = order['S'] == 'SELL'  # 매도 청산 = 롱 포지션 청산
+        ts = order.get('T') or event.get('E')
+        for window in self._get_windows(symbol).values():
+            window.add(ts, price * quantity, is_long)
+        self._pending[symbol].append(event)
+        if self.freshness is not None:
+            self.freshness.record('liquidation', symbol, event.get('E'))
+        if self.metrics_engine is not None:
+            self.metrics_engine.on_liquidation(order)
+        await get_bulk_writer(Liquidation).add(
+            symbol=symbol, side=order['S'], price=price, quantity=quantity,
+            timestamp=datetime.fromtimestamp(ts / 1000, tz=dt_timezone.utc) if ts else timezone.now(),
+        )
+
+    def flush(self, now_ms=None):
+        """대기 중인 이벤트와 갱신된 구간 통계를 파이프라인 한 번으로 기록한다.
+
+        now_ms는 구간 통계 만료 기준 시각(거래소 시각). 기록에 실패하면 이벤트는 다음 flush로 넘긴다.
+        """
+        now_ms = now_ms or int(time.time() * 1000)
+        pending = self._pending
+        pipe = self.redis_client.pipeline()
+        for symbol, events in pending.items():
+            key = liquidation_events_key(symbol)
+            for event in events:
+                pipe.xadd(key, {'data': codec.dumps(event)}, maxlen=settings.LIQUIDATION_EVENTS_MAX_LENGTH, approximate=True)
+            self._trim(keys=[key], args=[settings.LIQUIDATION_EVENTS_MAX_AGE * 1000], client=pipe)
+            pipe.expire(key, settings.LIQUIDATION_EVENTS_MAX_AGE)
+            store_realtime(pipe, 'liquidation', symbol, codec.dumps(events[-1]), settings.LIQUIDATION_EVENTS_MAX_AGE)
+
+        # 새 이벤트가 없어도 구간에 남은 값이 있으면 만료를 반영해 다시 쓴다
+        for symbol, windows in self.windows.items():
+            if symbol not in pending and not any(window.events for window in windows.values()):
+                continue
+            for window in windows.values():
+                window.expire(now_ms)
+            stats = {
+                "symbol": symbol,
+                "timestamp": now_ms,
+                "windows": {name: window.to_dict() for name, window in windows.items()},
+            }
+            store_realtime(pipe, 'liquidation_stats', symbol, codec.dumps(stats), settings.LIQUIDATION_EVENTS_MAX_AGE)
+        if len(pipe):
+            pipe.execute()
+        # 기록에 성공한 뒤에만 비운다 (RedisError면 그대로 남아 다음 flush에서 다시 쓴다)
+        self._pending = defaultdict(self._pending_events)
+        if pending:
+            logger.debug(f"Flushed {sum(len(events) for events in pending.values())} liquidations for {len(pending)} symbols")
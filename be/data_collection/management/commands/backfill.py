@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from data_collection.backfill import DATASETS, backfill_lock, get_datasets, run_backfill
+from data_collection.pagination import parse_time
+
+
+class Command(BaseCommand):
+    help = 'Find gaps in stored funding rate / open interest / trade volume history and fill them from Binance REST'
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*', help=f"Datasets to backfill: {', '.join(DATASETS)} (default: all)")
+        parser.add_argument('--symbols', help='Comma-separated symbols (default: symbols already stored)')
+        parser.add_argument('--start', help='Range start (ISO 8601 or epoch ms)')
+        parser.add_argument('--end', help='Range end (ISO 8601 or epoch ms, default: now)')
+        parser.add_argument('--hours', type=int, default=settings.BACKFILL_LOOKBACK_HOURS,
+                            help='Range length when --start is not given')
+        parser.add_argument('--concurrency', type=int, default=settings.BACKFILL_CONCURRENCY)
+        parser.add_argument('--dry-run', action='store_true', help='Only report gaps and planned chunks')
+
+    def handle(self, *args, **options):
+        try:
+            end = parse_time(options['end'], 'end') or timezone.now()
+            start = parse_time(options['start'], 'start') or end - timedelta(hours=options['hours'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if start >= end or options['concurrency'] <= 0:
+            raise CommandError('start must be before end and concurrency must be positive')
+        unknown = set(options['datasets']) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}")
+        symbols = [s.strip().upper() for s in options['symbols'].split(',')] if options['symbols'] else None
+
+        with backfill_lock(redis.Redis.from_url(settings.REDIS_URL)) as acquired:
+            if not acquired and not options['dry_run']:
+                raise CommandError('Another backfill is running')
+            result = run_backfill(
+                get_datasets(options['datasets']), start, end, symbols,
+                concurrency=options['concurrency'], dry_run=options['dry_run'],
+            )
+
+        self.stdout.write(f"{start.isoformat()} ~ {end.isoformat()}{' (dry run)' if options['dry_run'] else ''}")
+        self.stdout.write(
+            f"{'dataset':<14} {'symbols':>7} {'gaps':>6} {'chunks':>7} {'fetched':>8} {'inserted':>9} "
+            f"{'skipped':>8} {'failed':>7} {'seconds':>8}"
+        )
+        for name, stats in result.items():
+            self.stdout.write(
+                f"{name:<14} {stats['symbols']:>7} {stats['gaps']:>6} {stats['chunks']:>7} {stats['fetched']:>8} "
+                f"{stats['inserted']:>9} {stats['skipped']:>8} {stats['failed']:>7} {stats['seconds']:>8.2f}"
+            )
+        if any(stats['failed'] for stats in result.values()):
+            self.stdout.write(self.style.WARNING('Some chunks failed; rerun to retry them'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Backfill completed'))
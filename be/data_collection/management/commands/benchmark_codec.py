@@ -0,0 +1,89 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from data_collection import codec
+from data_collection.renderers import FastJSONRenderer
+
+
+def _depth_frame(levels):
+    return json.dumps({
+        "stream": "btcusdt@depth",
+        "data": {
+            "e": "depthUpdate", "E": 1700000000123, "T": 1700000000120, "s": "BTCUSDT",
+            "U": 1000, "u": 1010, "pu": 999,
+            "b": [[f"{50000 - i * 0.1:.1f}", f"{0.5 + i:.3f}"] for i in range(levels)],
+            "a": [[f"{50000.1 + i * 0.1:.1f}", f"{0.5 + i:.3f}"] for i in range(levels)],
+        },
+    })
+
+
+def _orderbook_payload(levels):
+    return {
+        "symbol": "BTCUSDT", "timestamp": 1700000000123, "last_update_id": 1010,
+        "bids": [[50000 - i * 0.1, 0.5 + i] for i in range(levels)],
+        "asks": [[50000.1 + i * 0.1, 0.5 + i] for i in range(levels)],
+    }
+
+
+def _serialized_rows(count):
+    return {"symbol": "BTCUSDT", "next_cursor": None, "data": [
+        {"symbol": "BTCUSDT", "timestamp": "2025-01-01T00:00:00Z", "funding_rate": 0.0001 * i, "funding_time": "2025-01-01T00:00:00Z"}
+        for i in range(count)
+    ]}
+
+
+def _per_call(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+class Command(BaseCommand):
+    help = 'Measure per-message JSON CPU cost on the ingest, Redis, websocket and REST paths (stdlib json vs the codec backend)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', '-n', type=int, default=20000)
+        parser.add_argument('--levels', type=int, default=20, help='Order book levels per side')
+        parser.add_argument('--subscribers', type=int, default=10, help='WebSocket clients subscribed to the symbol')
+
+    def handle(self, *args, **options):
+        iterations, levels, subscribers = options['iterations'], options['levels'], options['subscribers']
+        if iterations < 1 or subscribers < 1:
+            raise CommandError('--iterations and --subscribers must be positive')
+
+        frame = _depth_frame(levels)
+        payload = _orderbook_payload(levels)
+        event = json.loads(frame)['data']
+        rows = _serialized_rows(100)
+        message = {"type": "market", "symbol": "BTCUSDT", "stream": "depth", "data": event}
+        renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+
+        def fanout_before():
+            # 이전: consumer마다 이벤트를 다시 인코딩
+            return [json.dumps(message) for _ in range(subscribers)]
+
+        def fanout_after():
+            # 현재: publish에서 한 번 인코딩하고 consumer는 text를 그대로 전달
+            text = codec.dumps_str(message)
+            return [text for _ in range(subscribers)]
+
+        # 이름 -> (이전 구현, 현재 구현)
+        cases = {
+            'ingest: decode depth frame': (lambda: json.loads(frame), lambda: codec.loads(frame)),
+            'redis: encode orderbook': (lambda: json.dumps(payload).encode(), lambda: codec.dumps(payload)),
+            f'ws: fan-out to {subscribers} clients': (fanout_before, fanout_after),
+            'rest: render 100 rows': (lambda: renderer.render(rows), lambda: fast_renderer.render(rows)),
+        }
+
+        self.stdout.write(f"codec backend: {codec.BACKEND}, {iterations} iterations")
+        self.stdout.write(f"{'path':<32} {'before us':>10} {'after us':>10} {'speedup':>8}")
+        for name, (before, after) in cases.items():
+            # 워밍업
+            before(), after()
+            before_us = _per_call(before, iterations)
+            after_us = _per_call(after, iterations)
+            self.stdout.write(f"{name:<32} {before_us:>10.2f} {after_us:>10.2f} {before_us / after_us:>7.1f}x")
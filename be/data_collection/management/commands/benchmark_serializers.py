@@ -0,0 +1,99 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from data_collection.models import FundingRate, Liquidation, OrderBook, TradeVolume
+from data_collection.renderers import FastJSONRenderer
+from data_collection.serializers import (
+    FundingRateSerializer, LiquidationSerializer, OrderBookSerializer, TradeVolumeSerializer, ValuesSerializer,
+)
+
+BENCH_SYMBOL = 'BENCHUSDT'
+
+
+def _funding_rate(i, now):
+    return FundingRate(symbol=BENCH_SYMBOL, funding_rate=0.0001 * (i % 7), funding_time=now - timedelta(hours=8 * i))
+
+
+def _trade_volume(i, now):
+    price = 50000 + i % 100
+    return TradeVolume(
+        symbol=BENCH_SYMBOL, interval='1s', bucket_start=now - timedelta(seconds=i), open=price, high=price + 5,
+        low=price - 5, close=price + 1, volume=3.5, buy_volume=2.0, sell_volume=1.5, trade_count=i % 50,
+    )
+
+
+def _liquidation(i, now):
+    return Liquidation(symbol=BENCH_SYMBOL, side='SELL' if i % 2 else 'BUY', quantity=0.01 * (i % 30 + 1), price=50000.0 + i % 100)
+
+
+def _orderbook(i, now):
+    return OrderBook(
+        symbol=BENCH_SYMBOL,
+        bids=[[50000.0 - level * 0.1, 1.0 + level] for level in range(20)],
+        asks=[[50000.1 + level * 0.1, 1.0 + level] for level in range(20)],
+    )
+
+
+# dataset -> (model, ModelSerializer, 행 생성 함수)
+DATASETS = {
+    'funding_rate': (FundingRate, FundingRateSerializer, _funding_rate),
+    'trade_volume': (TradeVolume, TradeVolumeSerializer, _trade_volume),
+    'liquidation': (Liquidation, LiquidationSerializer, _liquidation),
+    'orderbook': (OrderBook, OrderBookSerializer, _orderbook),
+}
+
+
+def _best_of(repeat, func):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+class Command(BaseCommand):
+    help = 'Compare ModelSerializer against ValuesSerializer (values_list rows, record and columnar output) on historical rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', choices=list(DATASETS), default='trade_volume')
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+
+    def handle(self, *args, **options):
+        if min(options['rows']) < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be positive')
+        model, serializer_class, make_row = DATASETS[options['dataset']]
+        values_serializer = ValuesSerializer(serializer_class)
+        renderer = FastJSONRenderer()
+
+        # 벤치마크 행은 트랜잭션 안에서 만들고 끝나면 롤백한다
+        with transaction.atomic():
+            now = timezone.now()
+            model.objects.bulk_create(
+                (make_row(i, now) for i in range(max(options['rows']))), batch_size=5000,
+            )
+            queryset = model.objects.filter(symbol=BENCH_SYMBOL).order_by('-timestamp', '-id')
+
+            self.stdout.write(f"{options['dataset']}: fetch + serialize + render, best of {options['repeat']} (ms)")
+            self.stdout.write(f"{'rows':>8} {'model':>10} {'values':>10} {'columnar':>10} {'speedup':>8} {'identical':>10}")
+            for count in options['rows']:
+                model_ms, model_body = _best_of(options['repeat'], lambda: renderer.render(
+                    serializer_class(list(queryset[:count]), many=True).data
+                ))
+                values_ms, values_body = _best_of(options['repeat'], lambda: renderer.render(
+                    values_serializer.to_rows(list(queryset.values_list(*values_serializer.columns)[:count]))
+                ))
+                columnar_ms, _ = _best_of(options['repeat'], lambda: renderer.render(
+                    values_serializer.to_columns(list(queryset.values_list(*values_serializer.columns)[:count]))
+                ))
+                self.stdout.write(
+                    f"{count:>8} {model_ms:>10.1f} {values_ms:>10.1f} {columnar_ms:>10.1f} "
+                    f"{model_ms / values_ms:>7.1f}x {str(model_body == values_body):>10}"
+                )
+            transaction.set_rollback(True)
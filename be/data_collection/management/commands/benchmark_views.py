@@ -0,0 +1,102 @@
+import asyncio
+import json
+import time
+
+import httpx
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from data_collection.realtime import store_realtime
+
+# 이름 -> (sync 경로, async 경로)
+ENDPOINTS = {
+    'orderbook': ('/api/realtime/orderbook/?symbol=BTCUSDT', '/api/async/realtime/orderbook/?symbol=BTCUSDT'),
+    'batch': ('/api/realtime/batch/?symbols=BTCUSDT,ETHUSDT', '/api/async/realtime/batch/?symbols=BTCUSDT,ETHUSDT'),
+    'status': ('/api/status/', '/api/async/status/'),
+    'symbols': ('/api/symbols/', '/api/async/symbols/'),
+}
+SEED_SYMBOLS = ('BTCUSDT', 'ETHUSDT')
+
+
+def _percentile(values, pct):
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
+
+
+async def _run(client, path, total, concurrency):
+    """total개 요청을 concurrency개씩 동시에 보내고 (초, 지연 목록, 실패 수)를 돌려준다."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code not in (200, 304):
+                    failures += 1
+            except httpx.HTTPError:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - started, sorted(latencies), failures
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and latency of the sync REST views against their async (redis.asyncio) variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS), help='Endpoint to run (repeatable, default: all)')
+        parser.add_argument('--requests', '-n', type=int, default=2000, help='Requests per endpoint and variant')
+        parser.add_argument('--concurrency', '-c', type=int, default=50)
+        parser.add_argument('--base-url', help='Benchmark a running server (default: in-process ASGI app)')
+        parser.add_argument('--seed', action='store_true', help='Write sample realtime orderbooks to Redis first')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        if options['seed']:
+            self.seed()
+        asyncio.run(self.benchmark(options))
+
+    def seed(self):
+        redis_client = redis.Redis.from_url(settings.REDIS_URL)
+        pipe = redis_client.pipeline()
+        for symbol in SEED_SYMBOLS:
+            value = json.dumps({
+                "symbol": symbol, "timestamp": int(time.time() * 1000),
+                "bids": [[50000.0 - i, 1.0] for i in range(20)], "asks": [[50001.0 + i, 1.0] for i in range(20)],
+            })
+            store_realtime(pipe, 'orderbook', symbol, value, 3600)
+        pipe.execute()
+        self.stdout.write(f"Seeded realtime orderbooks for {', '.join(SEED_SYMBOLS)}")
+
+    async def benchmark(self, options):
+        if options['base_url']:
+            client = httpx.AsyncClient(base_url=options['base_url'], timeout=30)
+            target = options['base_url']
+        else:
+            # 수신 서버 없이 ASGI 앱을 직접 호출 (sync 뷰는 ASGI에서처럼 스레드로 넘어가서 실행된다)
+            from config.asgi import django_asgi_app
+
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=django_asgi_app), base_url='http://localhost')
+            target = 'in-process ASGI'
+
+        total, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(f"{target}: {total} requests per run, concurrency {concurrency}")
+        self.stdout.write(f"{'endpoint':<10} {'variant':<6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        async with client:
+            for name in options['endpoint'] or ENDPOINTS:
+                for variant, path in zip(('sync', 'async'), ENDPOINTS[name]):
+                    # 워밍업 (연결 풀, 레지스트리 캐시)
+                    await _run(client, path, min(total, concurrency), concurrency)
+                    elapsed, latencies, failures = await _run(client, path, total, concurrency)
+                    self.stdout.write(
+                        f"{name:<10} {variant:<6} {total / elapsed:>9.0f} "
+                        f"{_percentile(latencies, 50) * 1000:>8.2f} {_percentile(latencies, 99) * 1000:>8.2f} {failures:>7}"
+                    )
@@ -0,0 +1,142 @@
+import json
+import random
+import time
+
+import msgpack
+from django.core.management.base import BaseCommand, CommandError
+
+from data_collection import codec
+from data_collection.delivery import DeliveryEncoder
+from data_collection.orderbook import LocalOrderBook
+
+
+def _make_book(symbol, rng, levels):
+    book = LocalOrderBook(symbol)
+    book.load_snapshot({
+        'lastUpdateId': 1,
+        'bids': [[f"{50000 - i * 0.1:.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(levels)],
+        'asks': [[f"{50000.1 + i * 0.1:.1f}", f"{rng.uniform(0.1, 5):.3f}"] for i in range(levels)],
+    })
+    return book
+
+
+def _diff(symbol, rng, previous_id, event_time, changes):
+    # 상위 호가 근처 가격 몇 개의 수량 변경 / 삭제
+    def side(base, step):
+        return [
+            [f"{base + step * rng.randrange(40):.1f}", "0.000" if rng.random() < 0.2 else f"{rng.uniform(0.1, 5):.3f}"]
+            for _ in range(changes)
+        ]
+    return {
+        "e": "depthUpdate", "E": event_time, "T": event_time, "s": symbol,
+        "U": previous_id, "u": previous_id + 1, "pu": previous_id,
+        "b": side(50000, -0.1), "a": side(50000.1, 0.1),
+    }
+
+
+def _apply_delta(state, levels):
+    for price, qty in levels:
+        if qty:
+            state[price] = qty
+        else:
+            state.pop(price, None)
+
+
+class Command(BaseCommand):
+    help = 'Simulate a depth stream and compare per-diff websocket delivery against conflated full/delta json/msgpack frames'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', type=int, default=20)
+        parser.add_argument('--seconds', type=int, default=30, help='Simulated stream length')
+        parser.add_argument('--diff-rate', type=float, default=10, help='Depth diffs per symbol per second')
+        parser.add_argument('--max-rate', type=float, default=4, help='Client max updates per symbol per second')
+        parser.add_argument('--depth', type=int, default=20, help='Levels per side sent to the client')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if min(options['symbols'], options['seconds'], options['diff_rate'], options['max_rate'], options['depth']) <= 0:
+            raise CommandError('All options must be positive')
+        rng = random.Random(options['seed'])
+        depth = options['depth']
+        symbols = [f"SYM{i}USDT" for i in range(options['symbols'])]
+        books = {symbol: _make_book(symbol, rng, 500) for symbol in symbols}
+        diff_ms = 1000 / options['diff_rate']
+        send_ms = 1000 / options['max_rate']
+
+        # 이름 -> (DeliveryEncoder 또는 None(이전 방식), 메시지 수, 바이트, 서버 인코딩 초, 클라이언트 디코딩 초)
+        variants = {
+            'legacy per-diff json': [None, 0, 0, 0.0, 0.0],
+            'conflated full json': [DeliveryEncoder('full', 'json'), 0, 0, 0.0, 0.0],
+            'conflated delta json': [DeliveryEncoder('delta', 'json'), 0, 0, 0.0, 0.0],
+            'conflated delta msgpack': [DeliveryEncoder('delta', 'msgpack'), 0, 0, 0.0, 0.0],
+        }
+        # delta를 받은 클라이언트가 재구성한 호가
+        client_books = {name: {} for name in variants if name.startswith('conflated delta')}
+
+        def deliver(name, variant, send):
+            started = time.perf_counter()
+            text_data, bytes_data = send()
+            variant[3] += time.perf_counter() - started
+            frame = text_data.encode() if text_data is not None else bytes_data
+            started = time.perf_counter()
+            message = json.loads(frame) if text_data is not None else msgpack.unpackb(frame)
+            variant[4] += time.perf_counter() - started
+            variant[1] += 1
+            variant[2] += len(frame)
+            if name in client_books and message["type"] in ('snapshot', 'delta'):
+                state = client_books[name].setdefault(message["symbol"], ({}, {}))
+                if message["type"] == 'snapshot':
+                    state[0].clear(), state[1].clear()
+                _apply_delta(state[0], message["bids"])
+                _apply_delta(state[1], message["asks"])
+
+        next_send = dict.fromkeys(symbols, 0)
+        last_sent = {}
+        for step in range(int(options['seconds'] * options['diff_rate'])):
+            now_ms = int(step * diff_ms)
+            for symbol in symbols:
+                diff = _diff(symbol, rng, books[symbol].last_update_id, now_ms, 5)
+                books[symbol].apply(diff)
+
+                # 이전: diff마다 consumer가 json.dumps
+                legacy = {"type": "market", "symbol": symbol, "stream": "depth", "data": diff}
+                deliver('legacy per-diff json', variants['legacy per-diff json'], lambda: (json.dumps(legacy), None))
+
+                if now_ms < next_send[symbol]:
+                    continue  # conflation: 다음 전송 때 최신 상태만
+                next_send[symbol] = now_ms + send_ms
+                book = books[symbol]
+                last_sent[symbol] = (book.bids.top(depth), book.asks.top(depth))
+                # publisher가 그룹당 한 번 인코딩하는 이벤트 (클라이언트 비용에는 포함하지 않음)
+                event = {
+                    "symbol": symbol, "stream": "book", "event_time": now_ms,
+                    "text": codec.dumps_str({"type": "market", "symbol": symbol, "stream": "book", "data": {
+                        "symbol": symbol, "E": now_ms, "u": book.last_update_id,
+                        "bids": last_sent[symbol][0], "asks": last_sent[symbol][1],
+                    }}),
+                }
+                for name, variant in variants.items():
+                    if variant[0] is not None:
+                        deliver(name, variant, lambda: variant[0].encode(event))
+
+        seconds = options['seconds']
+        self.stdout.write(
+            f"{len(symbols)} symbols, {options['diff_rate']:g} diffs/s each, client max_rate {options['max_rate']:g}/s, "
+            f"{depth} levels, {seconds}s simulated (codec backend: {codec.BACKEND})"
+        )
+        self.stdout.write(f"{'delivery':<26} {'msgs/s':>8} {'KB/s':>9} {'server us/s':>12} {'client us/s':>12} {'egress':>7}")
+        legacy_bytes = variants['legacy per-diff json'][2]
+        for name, (_, messages, size, encode_s, decode_s) in variants.items():
+            self.stdout.write(
+                f"{name:<26} {messages / seconds:>8.0f} {size / seconds / 1024:>9.1f} "
+                f"{encode_s / seconds * 1e6:>12.0f} {decode_s / seconds * 1e6:>12.0f} {legacy_bytes / size:>6.1f}x"
+            )
+
+        for name, states in client_books.items():
+            # 마지막 전송 이후의 diff는 아직 보내지 않았으므로 마지막으로 보낸 상태와 비교한다
+            identical = all(
+                sorted(states[symbol][0].items(), reverse=True) == [tuple(level) for level in last_sent[symbol][0]]
+                and sorted(states[symbol][1].items()) == [tuple(level) for level in last_sent[symbol][1]]
+                for symbol in symbols
+            )
+            self.stdout.write(f"{name}: reconstructed book matches last sent state: {identical}")
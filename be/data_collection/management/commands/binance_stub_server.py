@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from data_collection.binance_rest import request_weight
+
+PERIOD_MS = {'5m': 300_000, '15m': 900_000, '30m': 1_800_000, '1h': 3_600_000}
+
+
+class StubError(Exception):
+    """Binance가 4xx로 거부하는 요청 (body는 {"code", "msg"})"""
+
+    def __init__(self, status, code, msg):
+        super().__init__(msg)
+        self.status = status
+        self.body = {"code": code, "msg": msg}
+
+
+class StubState:
+    def __init__(self, symbols, weight_limit):
+        self.symbols = symbols
+        self.weight_limit = weight_limit
+        self.lock = threading.Lock()
+        self.window = None
+        self.used = 0
+
+    def charge(self, weight):
+        with self.lock:
+            window = int(time.time() // 60)
+            if window != self.window:
+                self.window, self.used = window, 0
+            self.used += weight
+            return self.used
+
+
+def _time_range(params, step, default_count=100):
+    limit = int(params.get('limit', default_count))
+    end = int(params.get('endTime', time.time() * 1000))
+    start = int(params.get('startTime', end - step * limit))
+    first = start - start % step + (step if start % step else 0)
+    return [t for t in range(first, end + 1, step)][:limit]
+
+
+def _price(symbol):
+    return float(sum(ord(c) for c in symbol) % 900 + 100)
+
+
+def build_response(path, params, symbols):
+    """Binance USDⓈ-M REST 응답 형태를 흉내낸 결정적(deterministic) 더미 데이터"""
+    now = int(time.time() * 1000)
+    symbol = params.get('symbol')
+    if path == '/fapi/v1/exchangeInfo':
+        return {"serverTime": now, "symbols": [
+            {"symbol": s, "status": "TRADING", "contractType": "PERPETUAL", "baseAsset": s[:-4],
+             "quoteAsset": "USDT", "pricePrecision": 2, "quantityPrecision": 3,
+             "filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.01"},
+                         {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"}]}
+            for s in symbols
+        ]}
+    if path == '/fapi/v1/ticker/24hr':
+        items = [{"symbol": s, "lastPrice": str(_price(s)), "volume": "1000", "closeTime": now} for s in symbols]
+        return next((i for i in items if i['symbol'] == symbol), None) if symbol else items
+    if path == '/fapi/v1/premiumIndex':
+        items = [{"symbol": s, "markPrice": str(_price(s)), "lastFundingRate": "0.00010000",
+                  "nextFundingTime": now - now % 28_800_000 + 28_800_000, "time": now} for s in symbols]
+        return next((i for i in items if i['symbol'] == symbol), None) if symbol else items
+    if path == '/fapi/v1/openInterest':
+        return {"symbol": symbol, "openInterest": "12345.678", "time": now}
+    if path == '/fapi/v1/depth':
+        limit = int(params.get('limit', 500))
+        mid = _price(symbol)
+        return {"lastUpdateId": now, "E": now, "T": now,
+                "bids": [[f"{mid - 0.01 * (i + 1):.2f}", "1.000"] for i in range(limit)],
+                "asks": [[f"{mid + 0.01 * (i + 1):.2f}", "1.000"] for i in range(limit)]}
+    if path == '/fapi/v1/fundingRate':
+        records = [{"symbol": s, "fundingTime": t, "fundingRate": "0.00010000", "markPrice": str(_price(s))}
+                   for s in ([symbol] if symbol else symbols) for t in _time_range(params, 28_800_000)]
+        # symbol이 없으면 전 심볼 기록을 시간순으로 섞어 최근 limit개
+        return sorted(records, key=lambda r: r['fundingTime'])[-int(params.get('limit', 100)):]
+    if path == '/futures/data/openInterestHist':
+        step = PERIOD_MS.get(params.get('period', '5m'), 300_000)
+        return [{"symbol": symbol, "sumOpenInterest": "12345.678", "sumOpenInterestValue": "1234567.8",
+                 "timestamp": t} for t in _time_range(params, step, 30)]
+    if path == '/fapi/v1/aggTrades':
+        if 'startTime' in params and 'endTime' in params and int(params['endTime']) - int(params['startTime']) >= 3_600_000:
+            raise StubError(400, -1127, "More than 1 hours between startTime and endTime.")
+        if 'fromId' in params:
+            # 체결 id = 체결 시각(ms)이므로 fromId부터 이어서 준다
+            params = {'startTime': params['fromId'], 'endTime': int(params['fromId']) + 1000 * 1000, 'limit': params.get('limit', 500)}
+        return [{"a": t, "p": str(_price(symbol)), "q": "0.010", "f": t, "l": t, "T": t, "m": bool(t // 1000 % 2)}
+                for t in _time_range(params, 1000, 500)]
+    return None
+
+
+def make_server(host, port, symbols, weight_limit):
+    """stub HTTP 서버를 만든다 (serve_forever는 호출하는 쪽에서). port=0이면 빈 포트"""
+    state = StubState(symbols, weight_limit)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            used = state.charge(request_weight(url.path, params))
+            if used > state.weight_limit:
+                self._reply(429, {"code": -1003, "msg": "Too many requests"}, used, {'Retry-After': '60'})
+                return
+            try:
+                body = build_response(url.path, params, state.symbols)
+            except StubError as e:
+                self._reply(e.status, e.body, used)
+                return
+            if body is None:
+                self._reply(404, {"code": -1121, "msg": "Invalid endpoint"}, used)
+            else:
+                self._reply(200, body, used)
+
+        def _reply(self, status, body, used, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('X-MBX-USED-WEIGHT-1M', str(used))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+class Command(BaseCommand):
+    help = 'Run a local stub of the Binance USDⓈ-M REST API for offline testing (set BINANCE_FAPI_BASE_URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--symbols', type=int, default=300, help='Number of synthetic USDT symbols')
+        parser.add_argument('--weight-limit', type=int, default=2400, help='Per-minute weight before 429')
+
+    def handle(self, *args, **options):
+        symbols = ['BTCUSDT', 'ETHUSDT'] + [f"SYM{i}USDT" for i in range(max(options['symbols'] - 2, 0))]
+        server = make_server(options['host'], options['port'], symbols, options['weight_limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Binance stub listening on http://{options['host']}:{options['port']} ({len(symbols)} symbols)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
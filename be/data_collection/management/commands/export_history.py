@@ -0,0 +1,51 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from data_collection.export import COMPRESSIONS, EXPORT_DATASETS, FORMATS, ExportRequest, iter_export
+from data_collection.pagination import parse_time
+
+
+class Command(BaseCommand):
+    help = 'Stream historical rows to a file (or stdout) as NDJSON/CSV/Parquet with optional gzip/zstd'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(EXPORT_DATASETS))
+        parser.add_argument('--symbol', help='Trading symbol (default: all symbols)')
+        parser.add_argument('--start', help='Inclusive start time (ISO 8601 or epoch ms, default: end - 1 day)')
+        parser.add_argument('--end', help='Exclusive end time (ISO 8601 or epoch ms, default: now)')
+        parser.add_argument('--format', dest='file_format', choices=list(FORMATS), default='ndjson')
+        parser.add_argument('--compression', choices=list(COMPRESSIONS), default='none')
+        parser.add_argument('--chunk-size', type=int, help='Rows per server-side cursor fetch')
+        parser.add_argument('--output', '-o', help='Output path, "-" for stdout (default: generated file name)')
+
+    def handle(self, *args, **options):
+        try:
+            export = ExportRequest(
+                options['dataset'],
+                symbol=options['symbol'],
+                start=parse_time(options['start'], 'start'),
+                end=parse_time(options['end'], 'end'),
+                fmt=options['file_format'],
+                compression=options['compression'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        output = options['output'] or export.filename
+        started = time.monotonic()
+        written = 0
+        stream = sys.stdout.buffer if output == '-' else open(output, 'wb')
+        try:
+            for data in iter_export(export):
+                stream.write(data)
+                written += len(data)
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+        if output != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f"Exported {export.dataset} to {output} ({written / 1024 / 1024:.1f} MiB in {time.monotonic() - started:.1f}s)"
+            ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from data_collection.partitions import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming time-series partitions and drop partitions past retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list partitions that would be dropped')
+
+    def handle(self, *args, **options):
+        result = maintain_partitions(dry_run=options['dry_run'])
+        if not result:
+            self.stdout.write(self.style.WARNING('No partitioned tables found (PostgreSQL only)'))
+            return
+        for table, info in result.items():
+            self.stdout.write(f"{table}: ensured {info['ensured']} partitions, dropped {len(info['dropped'])}")
+            for name in info['dropped']:
+                self.stdout.write(f"  - {name}")
+        self.stdout.write(self.style.SUCCESS('Partition maintenance completed'))
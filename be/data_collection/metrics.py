@@ -0,0 +1,221 @@
+# data_collection/metrics.py
+import logging
+
+import numpy as np
+from django.conf import settings
+
+from data_collection import codec
+from data_collection.realtime import store_realtime
+
+logger = logging.getLogger('data_collection')
+
+
+class EventRing:
+    """심볼별 이벤트를 컬럼별 NumPy 배열에 담는 고정 크기 ring buffer.
+
+    append는 O(1)이고, 통계는 tick마다 view()로 꺼낸 배열에서 벡터 연산으로 계산한다.
+    가득 차면 가장 오래된 이벤트부터 덮어쓴다.
+    """
+
+    def __init__(self, capacity, dtypes):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, **values):
+        head = self.head
+        for name, value in values.items():
+            self.columns[name][head] = value
+        self.head = (head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def view(self, name):
+        """오래된 순서의 배열 (가득 찬 경우에만 복사)"""
+        column = self.columns[name]
+        if self.count < self.capacity:
+            return column[:self.count]
+        return np.concatenate((column[self.head:], column[:self.head]))
+
+    def oldest(self, name):
+        return self.columns[name][self.head if self.count == self.capacity else 0]
+
+
+class SymbolMetrics:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.trades = EventRing(settings.METRICS_TRADE_BUFFER, {'ts': np.int64, 'price': np.float64, 'qty': np.float64, 'sell': np.bool_})
+        self.liquidations = EventRing(settings.METRICS_LIQUIDATION_BUFFER, {'ts': np.int64, 'price': np.float64, 'qty': np.float64, 'long': np.bool_})
+        self.cvd = 0.0  # 수집 시작 이후 누적 매수 - 매도 거래량
+        self.last_price = None
+        self.last_event_ms = 0
+
+    def add_trade(self, ts, price, qty, is_sell):
+        self.trades.append(ts=ts, price=price, qty=qty, sell=is_sell)
+        self.cvd += -qty if is_sell else qty
+        self.last_price = price
+        self.last_event_ms = max(self.last_event_ms, ts)
+
+    def add_liquidation(self, ts, price, qty, is_long):
+        self.liquidations.append(ts=ts, price=price, qty=qty, long=is_long)
+        self.last_event_ms = max(self.last_event_ms, ts)
+
+    def trade_windows(self, now_ms):
+        """METRICS_WINDOWS 구간별 VWAP / 거래량 / CVD"""
+        if not len(self.trades):
+            return {}
+        ts, price, qty, sell = (self.trades.view(name) for name in ('ts', 'price', 'qty', 'sell'))
+        notional = price * qty
+        signed = np.where(sell, -qty, qty)
+        oldest = int(self.trades.oldest('ts'))
+        windows = {}
+        for name, seconds in settings.METRICS_WINDOWS.items():
+            since = now_ms - seconds * 1000
+            mask = ts > since
+            volume = float(qty[mask].sum())
+            cvd = float(signed[mask].sum())
+            windows[name] = {
+                "vwap": float(notional[mask].sum()) / volume if volume else None,
+                "volume": volume,
+                "buy_volume": (volume + cvd) / 2,
+                "sell_volume": (volume - cvd) / 2,
+                "cvd": cvd,
+                "trade_count": int(mask.sum()),
+                # 버퍼가 가득 차 구간 앞부분이 잘렸으면 False
+                "complete": len(self.trades) < self.trades.capacity or oldest <= since,
+            }
+        return windows
+
+    def liquidation_stats(self, now_ms):
+        """최근 METRICS_LIQUIDATION_WINDOW 초 청산 합계와 가격대별 cluster"""
+        window = settings.METRICS_LIQUIDATION_WINDOW
+        stats = {"window_seconds": window, "count": 0, "long_notional": 0.0, "short_notional": 0.0, "clusters": []}
+        if not len(self.liquidations):
+            return stats
+        ts = self.liquidations.view('ts')
+        mask = ts > now_ms - window * 1000
+        if not mask.any():
+            return stats
+        price = self.liquidations.view('price')[mask]
+        notional = price * self.liquidations.view('qty')[mask]
+        is_long = self.liquidations.view('long')[mask]
+        stats["count"] = int(mask.sum())
+        stats["long_notional"] = float(notional[is_long].sum())
+        stats["short_notional"] = float(notional[~is_long].sum())
+
+        # 기준가의 METRICS_LIQUIDATION_CLUSTER_BPS 폭으로 가격을 묶어 notional 상위 구간을 고른다
+        reference = self.last_price or float(np.median(price))
+        width = reference * settings.METRICS_LIQUIDATION_CLUSTER_BPS / 10_000
+        bins, inverse = np.unique(np.floor(price / width).astype(np.int64), return_inverse=True)
+        totals = np.bincount(inverse, weights=notional)
+        longs = np.bincount(inverse, weights=np.where(is_long, notional, 0.0))
+        counts = np.bincount(inverse)
+        for index in np.argsort(totals)[::-1][:settings.METRICS_LIQUIDATION_CLUSTERS]:
+            stats["clusters"].append({
+                "price": float((bins[index] + 0.5) * width),
+                "notional": float(totals[index]),
+                "long_notional": float(longs[index]),
+                "short_notional": float(totals[index] - longs[index]),
+                "count": int(counts[index]),
+            })
+        return stats
+
+
+def book_metrics(book, levels):
+    """상위 levels 호가로 spread / microprice / imbalance 계산"""
+    if book is None or not book.ready:
+        return None
+    bids = np.asarray(book.bids.top(levels), dtype=np.float64).reshape(-1, 2)
+    asks = np.asarray(book.asks.top(levels), dtype=np.float64).reshape(-1, 2)
+    if not len(bids) or not len(asks):
+        return None
+    (bid, bid_qty), (ask, ask_qty) = bids[0], asks[0]
+    mid = (bid + ask) / 2
+    bid_depth, ask_depth = bids[:, 1].sum(), asks[:, 1].sum()
+    return {
+        "best_bid": float(bid),
+        "best_ask": float(ask),
+        "mid": float(mid),
+        "spread": float(ask - bid),
+        "spread_bps": float((ask - bid) / mid * 10_000),
+        # 최우선 호가 잔량으로 가중한 가격 (매수 잔량이 많을수록 ask 쪽으로)
+        "microprice": float((bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty)),
+        "imbalance": float((bid_depth - ask_depth) / (bid_depth + ask_depth)),
+        "bid_depth": float(bid_depth),
+        "ask_depth": float(ask_depth),
+        "levels": levels,
+    }
+
+
+class MetricsEngine:
+    """수집기 이벤트로 심볼별 파생 지표를 유지하고 tick마다 Redis ({symbol}_metrics)에 기록한다.
+
+    체결/청산은 이벤트당 O(1)로 ring buffer에 쌓고, 구간 통계와 오더북 지표는
+    publish()에서 갱신된 심볼만 벡터 연산으로 계산한다.
+    """
+
+    def __init__(self, redis_client, book_source=None, publisher=None):
+        self.redis_client = redis_client
+        self.book_source = book_source  # symbol -> LocalOrderBook (OrderBookManager.books)
+        self.publisher = publisher
+        self.symbols = {}
+        self._dirty = set()
+
+    def _get(self, symbol):
+        metrics = self.symbols.get(symbol)
+        if metrics is None:
+            metrics = self.symbols[symbol] = SymbolMetrics(symbol)
+        return metrics
+
+    def on_trade(self, trade):
+        self._get(trade['s']).add_trade(trade['T'], float(trade['p']), float(trade['q']), trade['m'])
+        self._dirty.add(trade['s'])
+
+    def on_liquidation(self, order):
+        # 매도 청산(SELL) = 롱 포지션 청산
+        self._get(order['s']).add_liquidation(order['T'], float(order['p']), float(order['q']), order['S'] == 'SELL')
+        self._dirty.add(order['s'])
+
+    def on_book(self, symbol):
+        self._dirty.add(symbol)
+
+    def snapshot(self, symbol, now_ms):
+        metrics = self._get(symbol)
+        book = self.book_source.get(symbol) if self.book_source is not None else None
+        return {
+            "symbol": symbol,
+            "timestamp": now_ms,
+            "book": book_metrics(book, settings.METRICS_BOOK_LEVELS),
+            "trades": {
+                "last_price": metrics.last_price,
+                "cvd": metrics.cvd,
+                "windows": metrics.trade_windows(now_ms),
+            },
+            "liquidations": metrics.liquidation_stats(now_ms),
+        }
+
+    def _due(self, now_ms):
+        # 이벤트가 없어도 구간이 비워질 때까지는 계속 갱신한다
+        horizon = now_ms - max(max(settings.METRICS_WINDOWS.values()), settings.METRICS_LIQUIDATION_WINDOW) * 1000
+        due = set(self._dirty)
+        due.update(symbol for symbol, metrics in self.symbols.items() if metrics.last_event_ms > horizon)
+        self._dirty.clear()
+        return sorted(due)
+
+    async def publish(self, now_ms):
+        symbols = self._due(now_ms)
+        if not symbols:
+            return
+        snapshots = [self.snapshot(symbol, now_ms) for symbol in symbols]
+        pipe = self.redis_client.pipeline()
+        for snapshot in snapshots:
+            store_realtime(pipe, 'metrics', snapshot['symbol'], codec.dumps(snapshot), settings.METRICS_TTL)
+        pipe.execute()
+        if self.publisher is not None:
+            for snapshot in snapshots:
+                await self.publisher.publish(snapshot['symbol'], 'metrics', snapshot)
+        logger.debug(f"Published metrics for {len(snapshots)} symbols")
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0004_alter_orderbook_asks_alter_orderbook_bids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradevolume',
+            name='bucket_start',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='close',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='high',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='interval',
+            field=models.CharField(default='1s', max_length=4),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='low',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='open',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='tradevolume',
+            name='trade_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tradevolume',
+            index=models.Index(fields=['symbol', 'interval', 'bucket_start'], name='data_collec_symbol_245d88_idx'),
+        ),
+    ]
@@ -0,0 +1,147 @@
+# 시계열 테이블을 timestamp 기준 PostgreSQL range 파티션 테이블로 전환
+# 이후 설정/모듈이 바뀌어도 같은 결과가 나오도록 파티션 구성과 변환 SQL을 여기에 고정한다
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import migrations
+
+PARTITION_KEY = 'timestamp'
+# table -> (interval, premake, history)
+# history: 구간별 파티션을 만들 과거 구간 수. 그보다 오래된 행은 {table}_archive 파티션 하나로 모은다
+TABLES = {
+    'data_collection_orderbook': ('hourly', 48, 48),
+    'data_collection_tradevolume': ('daily', 7, 30),
+    'data_collection_liquidation': ('daily', 7, 30),
+    'data_collection_fundingrate': ('daily', 7, 30),
+    'data_collection_openinterest': ('daily', 7, 30),
+}
+INTERVALS = {
+    'hourly': (timedelta(hours=1), '%Y%m%d%H'),
+    'daily': (timedelta(days=1), '%Y%m%d'),
+}
+
+
+def _floor(value, interval):
+    value = value.astimezone(dt_timezone.utc)
+    if interval == 'hourly':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s", [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def _indexes(cursor, table):
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+        [table, '%_pkey']
+    )
+    return cursor.fetchall()
+
+
+def convert_to_partitioned(cursor, table, interval, premake, history):
+    """기존 테이블을 같은 이름의 timestamp range 파티션 테이블로 옮긴다.
+
+    파티션 키가 PK에 포함돼야 하므로 PK는 (id, timestamp)가 되고,
+    id는 별도 시퀀스로 계속 증가한다. 기존 인덱스는 같은 이름으로 다시 만든다.
+    최근 history 구간만 구간별 파티션으로 만들고, 그보다 오래된 행은 archive 파티션 하나에 넣는다
+    (오래된 데이터가 많아도 파티션 수가 늘지 않고, 보존 기간이 지나면 통째로 drop 된다).
+    """
+    legacy = f"{table}_legacy"
+    indexes = _indexes(cursor, table)
+    cursor.execute(f'SELECT min("{PARTITION_KEY}"), max(id) FROM "{table}"')
+    oldest, max_id = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    cursor.execute(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey"')
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_legacy"')
+    cursor.execute(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING STORAGE) '
+        f'PARTITION BY RANGE ("{PARTITION_KEY}")'
+    )
+    cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, "{PARTITION_KEY}")')
+
+    now = datetime.now(dt_timezone.utc)
+    step, fmt = INTERVALS[interval]
+    current = _floor(now, interval) - step * history
+    end = _floor(now, interval) + step * (premake + 1)
+    if oldest is not None and oldest < current:
+        cursor.execute(
+            f'CREATE TABLE "{table}_archive" PARTITION OF "{table}" '
+            f"FOR VALUES FROM (%s) TO (%s)", [_floor(oldest, interval), current]
+        )
+    while current < end:
+        cursor.execute(
+            f'CREATE TABLE "{table}_p{current.strftime(fmt)}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM (%s) TO (%s)", [current, current + step]
+        )
+        current += step
+    cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    cursor.execute(f'DROP TABLE "{legacy}"')
+
+    cursor.execute(f'CREATE SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{table}_id_seq"\')')
+    if max_id:
+        cursor.execute(f"SELECT setval('\"{table}_id_seq\"', %s)", [max_id])
+    for _, definition in indexes:
+        # 파티션 테이블에 만든 인덱스는 모든 파티션에 자동으로 전파된다
+        cursor.execute(definition)
+
+
+def convert_to_plain(cursor, table):
+    legacy = f"{table}_partitioned"
+    indexes = _indexes(cursor, table)
+    cursor.execute(f'SELECT max(id) FROM "{table}"')
+    max_id = cursor.fetchone()[0]
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    cursor.execute(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{table}_pkey" TO "{legacy}_pkey"')
+    for name, _ in indexes:
+        cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name}_partitioned"')
+    cursor.execute(f'ALTER SEQUENCE "{table}_id_seq" OWNED BY NONE')
+    cursor.execute(f'ALTER SEQUENCE "{table}_id_seq" RENAME TO "{table}_id_seq_partitioned"')
+    cursor.execute(f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING STORAGE)')
+    cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    cursor.execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id)')
+    cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    cursor.execute(f'DROP TABLE "{legacy}"')
+    cursor.execute(f'DROP SEQUENCE "{table}_id_seq_partitioned"')
+    if max_id:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), %s)", [max_id])
+    for _, definition in indexes:
+        cursor.execute(definition)
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table, (interval, premake, history) in TABLES.items():
+            if not _is_partitioned(cursor, table):
+                convert_to_partitioned(cursor, table, interval, premake, history)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            if _is_partitioned(cursor, table):
+                convert_to_plain(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0005_tradevolume_bars'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
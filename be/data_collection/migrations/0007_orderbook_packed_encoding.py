@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0006_partition_timeseries_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderbook',
+            name='encoding',
+            field=models.CharField(default='json', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='orderbook',
+            name='is_keyframe',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='orderbook',
+            name='payload',
+            field=models.BinaryField(null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0007_orderbook_packed_encoding'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fundingrate',
+            index=models.Index(fields=['symbol', 'funding_time'], name='data_collec_symbol_fa4528_idx'),
+        ),
+    ]
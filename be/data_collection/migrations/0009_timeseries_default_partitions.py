@@ -0,0 +1,52 @@
+# 이미 파티션으로 전환된 시계열 테이블에 DEFAULT 파티션 추가
+# (premake 범위 밖 timestamp INSERT가 실패하지 않도록)
+
+from django.db import migrations
+
+TABLES = (
+    'data_collection_orderbook',
+    'data_collection_tradevolume',
+    'data_collection_liquidation',
+    'data_collection_fundingrate',
+    'data_collection_openinterest',
+)
+
+
+def _partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s", [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def add_default_partitions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            if _partitioned(cursor, table):
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+
+def remove_default_partitions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            if _partitioned(cursor, table):
+                # 남은 행은 버리지 않도록 범위 파티션이 없으면 되돌리기를 거부한다
+                cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{table}_default"')
+                cursor.execute(f'INSERT INTO "{table}" SELECT * FROM "{table}_default"')
+                cursor.execute(f'DROP TABLE "{table}_default"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0008_fundingrate_funding_time_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_default_partitions, remove_default_partitions),
+    ]
@@ -0,0 +1,21 @@
+# fetch_all_funding_rates가 한동안 premiumIndex의 예상 펀딩률을 다음 정산 시각(funding_time)으로 저장했다.
+# 정산 전에 기록된 행(timestamp < funding_time)은 실제 펀딩률이 아니므로 지우고 backfill로 다시 채운다.
+
+from django.db import migrations
+from django.db.models import F
+
+
+def delete_predicted(apps, schema_editor):
+    FundingRate = apps.get_model('data_collection', 'FundingRate')
+    FundingRate.objects.filter(timestamp__lt=F('funding_time')).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0009_timeseries_default_partitions'),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_predicted, migrations.RunPython.noop),
+    ]
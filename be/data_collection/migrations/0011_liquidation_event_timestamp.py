@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 19:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_collection', '0010_delete_predicted_funding_rates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='liquidation',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
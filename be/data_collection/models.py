@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class FundingRate(models.Model):
     symbol = models.CharField(max_length=20)
@@ -8,13 +9,19 @@ class FundingRate(models.Model):
 
     class Meta:
         db_table = 'data_collection_fundingrate'
-        indexes = [models.Index(fields=['symbol', 'timestamp'])]
+        indexes = [
+            models.Index(fields=['symbol', 'timestamp']),
+            models.Index(fields=['symbol', 'funding_time']),  # backfill gap 조회
+        ]
 
 class OrderBook(models.Model):
     symbol = models.CharField(max_length=20)
     timestamp = models.DateTimeField(auto_now_add=True)
     bids = models.JSONField(default=list)  # 기본값 추가
     asks = models.JSONField(default=list)  # 기본값 추가
+    encoding = models.CharField(max_length=8, default='json')  # json 또는 packed (orderbook_codec)
+    payload = models.BinaryField(null=True)  # packed 인코딩일 때 keyframe/delta 데이터
+    is_keyframe = models.BooleanField(default=True)
 
     class Meta:
         db_table = 'data_collection_orderbook'
@@ -34,7 +41,7 @@ class OpenInterest(models.Model):
 
 class Liquidation(models.Model):
     symbol = models.CharField(max_length=20)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # 청산 주문 시각(T). BulkWriter flush 시각이 아니다
     side = models.CharField(max_length=10)  # LONG or SHORT
     quantity = models.FloatField()
     price = models.FloatField()
@@ -46,10 +53,20 @@ class Liquidation(models.Model):
 class TradeVolume(models.Model):
     symbol = models.CharField(max_length=20)
     timestamp = models.DateTimeField(auto_now_add=True)
+    interval = models.CharField(max_length=4, default='1s')  # 1s, 1m, 5m
+    bucket_start = models.DateTimeField(null=True)  # 거래소 체결 시각 기준 bucket 시작
+    open = models.FloatField(null=True)
+    high = models.FloatField(null=True)
+    low = models.FloatField(null=True)
+    close = models.FloatField(null=True)
     volume = models.FloatField()
     buy_volume = models.FloatField()
     sell_volume = models.FloatField()
+    trade_count = models.IntegerField(default=0)
 
     class Meta:
         db_table = 'data_collection_tradevolume'
-        indexes = [models.Index(fields=['symbol', 'timestamp'])]
\ No newline at end of file
+        indexes = [
+            models.Index(fields=['symbol', 'timestamp']),
+            models.Index(fields=['symbol', 'interval', 'bucket_start']),
+        ]
\ No newline at end of file
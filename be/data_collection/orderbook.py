@@ -0,0 +1,376 @@
+# data_collection/orderbook.py
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+from django.utils import timezone
+
+from data_collection import codec
+from data_collection.binance_rest import get_async_rest_client
+from data_collection.bulk_writer import get_bulk_writer
+from data_collection.models import OrderBook
+from data_collection.orderbook_codec import OrderBookEncoder
+from data_collection.realtime import store_realtime
+
+logger = logging.getLogger('data_collection')
+
+
+class OrderBookOutOfSync(Exception):
+    """@depth diff 시퀀스(U/u/pu)가 끊겨 스냅샷을 다시 받아야 하는 경우"""
+
+
+class BookSide:
+    """한쪽 호가를 가격 -> 수량 dict로 유지하고, 정렬은 top()이 요청한 상위 구간에만 한다.
+
+    diff마다 전체 정렬 배열에 끼워 넣는(O(n)) 대신 dict만 갱신한다. 상위 window개 가격(정렬 키)은
+    따로 캐시하고, 그 구간 밖의 추가/삭제는 캐시를 건드리지 않는다. 구간 안의 가격이 빠지면
+    다음 top()에서 heapq로 다시 고른다. bids는 내림차순이 필요하므로 -price를 정렬 키로 사용한다.
+    """
+
+    def __init__(self, descending=False):
+        self.descending = descending
+        self._levels = {}
+        self._top = []  # 상위 _window개 가격의 정렬 키 (오름차순)
+        self._window = 0  # 지금까지 top()으로 요청된 최대 개수
+        self._stale = True
+
+    def __len__(self):
+        return len(self._levels)
+
+    def _key(self, price):
+        return -price if self.descending else price
+
+    def update(self, price, quantity):
+        levels = self._levels
+        if quantity == 0:
+            if levels.pop(price, None) is not None and not self._stale and self._top \
+                    and self._key(price) <= self._top[-1]:
+                self._stale = True
+            return
+        if price not in levels and not self._stale:
+            key = self._key(price)
+            top = self._top
+            if len(top) < self._window:
+                # 호가 수가 window보다 적으면 모든 가격이 상위 구간에 들어간다
+                bisect.insort(top, key)
+            elif top and key < top[-1]:
+                bisect.insort(top, key)
+                top.pop()
+        levels[price] = quantity
+
+    def apply(self, levels):
+        for price, quantity in levels:
+            self.update(float(price), float(quantity))
+
+    def best(self):
+        levels = self.top(1)
+        return levels[0] if levels else None
+
+    def top(self, n):
+        if n > self._window:
+            self._window = n
+            self._stale = True
+        if self._stale:
+            if self.descending:
+                self._top = [-price for price in heapq.nlargest(self._window, self._levels)]
+            else:
+                self._top = heapq.nsmallest(self._window, self._levels)
+            self._stale = False
+        levels = self._levels
+        return [[price, levels[price]] for price in map(self._key, self._top[:n])]
+
+    def clear(self):
+        self._levels.clear()
+        self._top = []
+        self._stale = True
+
+
+class LocalOrderBook:
+    """REST depth 스냅샷 + @depth diff 스트림으로 유지되는 심볼별 L2 오더북.
+
+    USDⓈ-M 선물 규칙을 따른다:
+    - 스냅샷 전 이벤트는 버퍼링, u < lastUpdateId 인 이벤트는 버림
+    - 첫 이벤트는 U <= lastUpdateId <= u 이어야 함
+    - 이후 이벤트는 pu == 직전 u 이어야 하며, 아니면 재동기화
+    """
+
+    def __init__(self, symbol, max_pending=1000):
+        self.symbol = symbol.upper()
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide()
+        self.last_update_id = None
+        self.event_time = None
+        self.synced = False
+        self._pending = deque(maxlen=max_pending)
+
+    @property
+    def ready(self):
+        return self.last_update_id is not None
+
+    def reset(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.event_time = None
+        self.synced = False
+        self._pending.clear()
+
+    def load_snapshot(self, snapshot):
+        pending = list(self._pending)
+        self.reset()
+        self.bids.apply(snapshot.get('bids', []))
+        self.asks.apply(snapshot.get('asks', []))
+        self.last_update_id = snapshot['lastUpdateId']
+        self.event_time = snapshot.get('E')
+        for event in pending:
+            self.apply(event)
+
+    def apply(self, event):
+        """diff 이벤트를 반영하고 실제로 오더북이 바뀌었으면 True를 반환한다."""
+        if self.last_update_id is None:
+            self._pending.append(event)
+            return False
+
+        first_id, final_id = event['U'], event['u']
+        if self.synced:
+            if final_id <= self.last_update_id:
+                return False  # 이미 반영된 중복 이벤트
+            prev_final_id = event.get('pu')
+            if prev_final_id is not None and prev_final_id != self.last_update_id:
+                raise OrderBookOutOfSync(
+                    f"{self.symbol}: pu={prev_final_id} != last u={self.last_update_id}"
+                )
+        else:
+            if final_id < self.last_update_id:
+                return False
+            if first_id > self.last_update_id:
+                raise OrderBookOutOfSync(
+                    f"{self.symbol}: gap between snapshot {self.last_update_id} and U={first_id}"
+                )
+            self.synced = True
+
+        self.bids.apply(event.get('b', []))
+        self.asks.apply(event.get('a', []))
+        self.last_update_id = final_id
+        self.event_time = event.get('E', self.event_time)
+        return True
+
+    def to_dict(self, depth):
+        return {
+            "symbol": self.symbol,
+            "lastUpdateId": self.last_update_id,
+            "E": self.event_time,
+            "timestamp": timezone.now().isoformat(),
+            "bids": self.bids.top(depth),
+            "asks": self.asks.top(depth),
+        }
+
+
+async def fetch_depth_snapshot(symbol, limit):
+    return await get_async_rest_client().depth(symbol=symbol, limit=limit)
+
+
+class OrderBookManager:
+    """심볼별 LocalOrderBook을 관리하고 상위 N 호가를 일정 주기로 Redis/DB에 기록한다.
+
+    publisher가 있으면 diff마다가 아니라 fanout_interval마다 상위 호가 상태(book)를 웹소켓 그룹으로 발행한다.
+    """
+
+    def __init__(self, redis_client, snapshot_fetcher=fetch_depth_snapshot, depth=None,
+                 snapshot_limit=None, publish_interval=None, persist_interval=None,
+                 publisher=None, fanout_interval=None):
+        self.redis_client = redis_client
+        self.publisher = publisher
+        self.fanout_interval = (
+            settings.ORDERBOOK_FANOUT_INTERVAL if fanout_interval is None else fanout_interval
+        )
+        self.snapshot_fetcher = snapshot_fetcher
+        self.depth = depth or settings.ORDERBOOK_DEPTH_LEVELS
+        self.snapshot_limit = snapshot_limit or settings.ORDERBOOK_SNAPSHOT_LIMIT
+        self.publish_interval = (
+            settings.ORDERBOOK_PUBLISH_INTERVAL if publish_interval is None else publish_interval
+        )
+        self.persist_interval = (
+            settings.ORDERBOOK_PERSIST_INTERVAL if persist_interval is None else persist_interval
+        )
+        self.encoder = (
+            OrderBookEncoder(settings.ORDERBOOK_KEYFRAME_INTERVAL)
+            if settings.ORDERBOOK_STORAGE_FORMAT == 'packed' else None
+        )
+        self.books = {}
+        self._snapshot_tasks = {}
+        self._last_persist = {}
+        self._last_sent = {}  # (kind, 심볼) -> 마지막 발행 시각 (monotonic)
+        self._dirty = set()  # 마지막 발행 이후 바뀐 (kind, 심볼)
+        self._send_tasks = {}  # (kind, 심볼) -> 발행 태스크 (키마다 하나만 돌아 순서가 바뀌지 않는다)
+        self.gaps = Counter()  # 심볼별 U/u/pu 시퀀스 끊김 횟수
+        self.resyncs = Counter()  # 심볼별 재연결 등으로 강제한 스냅샷 재동기화 횟수
+        self._unsynced_since = {}  # 심볼 -> 스냅샷 동기화를 기다리기 시작한 시각 (monotonic)
+        self._recent_resyncs = deque()  # 시퀀스 끊김/강제 재동기화 시각 (monotonic), 첫 동기화는 제외
+
+    def get_book(self, symbol):
+        symbol = symbol.upper()
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LocalOrderBook(symbol)
+            self._unsynced_since[symbol] = time.monotonic()
+        return book
+
+    def _mark_resync(self, symbol):
+        now = time.monotonic()
+        self._unsynced_since.setdefault(symbol, now)
+        self._recent_resyncs.append(now)
+
+    async def handle(self, event):
+        book = self.get_book(event['s'])
+        try:
+            applied = book.apply(event)
+        except OrderBookOutOfSync as e:
+            logger.warning(f"Orderbook out of sync, resyncing: {e}")
+            self.gaps[book.symbol] += 1
+            self._mark_resync(book.symbol)
+            book.reset()
+            applied = book.apply(event)
+
+        if not book.ready:
+            self._ensure_snapshot(book.symbol)
+            return
+        self._unsynced_since.pop(book.symbol, None)
+        if applied:
+            await self._maybe_publish(book)
+
+    def resync(self, symbols):
+        """diff를 놓쳤을 수 있는 심볼(재연결 등)을 비우고 REST 스냅샷부터 다시 맞춘다."""
+        for symbol in symbols:
+            book = self.books.get(symbol.upper())
+            if book is None or not book.ready:
+                continue
+            book.reset()
+            self.resyncs[book.symbol] += 1
+            self._mark_resync(book.symbol)
+            self._ensure_snapshot(book.symbol)
+
+    def status(self, now_ms=None):
+        """동기화 상태. stalled: ORDERBOOK_RESYNC_GRACE초 넘게 스냅샷을 기다리는 심볼,
+        recent_resyncs: 최근 ORDERBOOK_RESYNC_WINDOW초 동안의 재동기화 횟수 (시작 시 첫 동기화 제외).
+        """
+        now_ms = now_ms or int(time.time() * 1000)
+        now = time.monotonic()
+        resyncing = sorted(symbol for symbol, book in self.books.items() if not book.ready)
+        while self._recent_resyncs and now - self._recent_resyncs[0] > settings.ORDERBOOK_RESYNC_WINDOW:
+            self._recent_resyncs.popleft()
+        return {
+            "books": len(self.books),
+            "synced": len(self.books) - len(resyncing),
+            "resyncing": resyncing,
+            "stalled": [
+                symbol for symbol in resyncing
+                if now - self._unsynced_since.get(symbol, now) > settings.ORDERBOOK_RESYNC_GRACE
+            ],
+            "recent_resyncs": len(self._recent_resyncs),
+            "gaps": dict(self.gaps),
+            "resyncs": dict(self.resyncs),
+            # 마지막 diff 이후 가장 오래 조용한 심볼
+            "oldest_event_age": max(
+                ((now_ms - book.event_time) / 1000 for book in self.books.values() if book.event_time), default=None,
+            ),
+        }
+
+    def _ensure_snapshot(self, symbol):
+        if symbol not in self._snapshot_tasks:
+            self._snapshot_tasks[symbol] = asyncio.create_task(self._load_snapshot(symbol))
+
+    async def _load_snapshot(self, symbol):
+        book = self.books[symbol]
+        try:
+            snapshot = await self.snapshot_fetcher(symbol, self.snapshot_limit)
+            book.load_snapshot(snapshot)
+            self._unsynced_since.pop(symbol, None)
+            logger.info(f"Loaded orderbook snapshot for {symbol} (lastUpdateId={book.last_update_id})")
+        except OrderBookOutOfSync as e:
+            # 다음 diff 이벤트에서 스냅샷을 다시 요청한다
+            logger.warning(f"Snapshot replay failed, resyncing: {e}")
+            book.reset()
+        except Exception as e:
+            logger.error(f"Failed to load orderbook snapshot for {symbol}: {e}")
+        finally:
+            self._snapshot_tasks.pop(symbol, None)
+
+    def _schedule(self, kind, book, interval, send):
+        """send(book)를 interval마다 최대 한 번, 읽기 루프 밖의 태스크에서 실행한다.
+
+        쉬고 있었으면 바로 보내고(leading edge), 기다리는 동안 바뀐 상태는 interval 뒤에 한 번 더 보낸다
+        (trailing edge). 그래서 burst가 끝난 뒤의 마지막 상태도 반드시 발행된다.
+        """
+        key = (kind, book.symbol)
+        self._dirty.add(key)
+        if key not in self._send_tasks:
+            self._send_tasks[key] = asyncio.create_task(self._send_loop(key, book, interval, send))
+
+    async def _send_loop(self, key, book, interval, send):
+        try:
+            while key in self._dirty:
+                wait = self._last_sent.get(key, 0) + interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._dirty.discard(key)
+                if not book.ready:
+                    continue  # 기다리는 사이 재동기화에 들어갔으면 다음 diff가 다시 예약한다
+                self._last_sent[key] = time.monotonic()
+                try:
+                    await send(book)
+                except Exception as e:
+                    logger.warning(f"Orderbook {key[0]} failed for {key[1]}: {e}")
+        finally:
+            self._send_tasks.pop(key, None)
+
+    async def _fanout(self, book):
+        await self.publisher.publish(book.symbol, 'book', {
+            "symbol": book.symbol,
+            "E": book.event_time,
+            "u": book.last_update_id,
+            "bids": book.bids.top(self.depth),
+            "asks": book.asks.top(self.depth),
+        })
+
+    async def _store(self, book):
+        # 상태는 루프에서 떠 두고 동기 Redis 쓰기만 스레드로 보낸다
+        await asyncio.to_thread(self._write_realtime, book.symbol, book.to_dict(self.depth))
+
+    def _write_realtime(self, symbol, payload):
+        pipe = self.redis_client.pipeline()
+        store_realtime(pipe, 'orderbook', symbol, codec.dumps(payload), 10)
+        pipe.execute()
+
+    async def _maybe_publish(self, book):
+        now = time.monotonic()
+        symbol = book.symbol
+        if self.publisher is not None:
+            self._schedule('fanout', book, self.fanout_interval, self._fanout)
+        self._schedule('publish', book, self.publish_interval, self._store)
+        if now - self._last_persist.get(symbol, 0) >= self.persist_interval:
+            self._last_persist[symbol] = now
+            bids = book.bids.top(self.depth)
+            asks = book.asks.top(self.depth)
+            if self.encoder is not None:
+                payload, is_keyframe = self.encoder.encode(symbol, bids, asks)
+                await get_bulk_writer(OrderBook).add(
+                    symbol=symbol,
+                    encoding='packed',
+                    payload=payload,
+                    is_keyframe=is_keyframe,
+                )
+            else:
+                await get_bulk_writer(OrderBook).add(symbol=symbol, bids=bids, asks=asks)
+            logger.debug(f"Queued orderbook snapshot for {symbol} at {timezone.now()}")
+
+    async def close(self):
+        for task in self._snapshot_tasks.values():
+            task.cancel()
+        self._snapshot_tasks.clear()
+        # 마지막 상태 발행은 끝까지 기다린다
+        await asyncio.gather(*self._send_tasks.values(), return_exceptions=True)
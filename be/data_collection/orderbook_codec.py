@@ -0,0 +1,211 @@
+# data_collection/orderbook_codec.py
+import struct
+from collections import defaultdict
+
+import numpy as np
+
+from data_collection.models import OrderBook
+
+# version, flags, decimals, base_tick, n_bids, n_asks
+HEADER = struct.Struct('<BBBxqHH')
+VERSION = 1
+FLAG_KEYFRAME = 0x01
+MAX_DECIMALS = 8
+OFFSET_DTYPE = np.dtype('<i4')
+QTY_DTYPE = np.dtype('<f8')
+
+
+def infer_decimals(prices):
+    """가격을 정수 tick으로 바꿀 수 있는 최소 소수 자릿수"""
+    prices = np.asarray(prices, dtype=np.float64)
+    for decimals in range(MAX_DECIMALS + 1):
+        scaled = prices * 10 ** decimals
+        if np.all(np.abs(scaled - np.round(scaled)) < 1e-6):
+            return decimals
+    return MAX_DECIMALS
+
+
+def encode_levels(bids, asks, keyframe):
+    """[[price, qty], ...] 호가를 고정 폭 배열로 묶는다.
+
+    가격은 base_tick 기준 int32 tick offset, 수량은 float64로 저장한다.
+    """
+    bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+    asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+    prices = np.concatenate([bids[:, 0], asks[:, 0]])
+    decimals = infer_decimals(prices) if len(prices) else 0
+    ticks = np.round(prices * 10 ** decimals).astype(np.int64)
+    base_tick = int(ticks.min()) if len(ticks) else 0
+    offsets = (ticks - base_tick).astype(OFFSET_DTYPE)
+    n_bids = len(bids)
+    header = HEADER.pack(VERSION, FLAG_KEYFRAME if keyframe else 0, decimals, base_tick, n_bids, len(asks))
+    return b''.join([
+        header,
+        offsets[:n_bids].tobytes(), bids[:, 1].astype(QTY_DTYPE).tobytes(),
+        offsets[n_bids:].tobytes(), asks[:, 1].astype(QTY_DTYPE).tobytes(),
+    ])
+
+
+def decode_levels(payload):
+    """payload를 (is_keyframe, bids, asks) 로 풀어낸다. bids/asks는 (N, 2) float64 배열."""
+    payload = bytes(payload)
+    version, flags, decimals, base_tick, n_bids, n_asks = HEADER.unpack_from(payload)
+    if version != VERSION:
+        raise ValueError(f"Unsupported orderbook payload version: {version}")
+    scale = 10.0 ** decimals
+    position = HEADER.size
+    sides = []
+    for count in (n_bids, n_asks):
+        offsets = np.frombuffer(payload, dtype=OFFSET_DTYPE, count=count, offset=position)
+        position += count * OFFSET_DTYPE.itemsize
+        quantities = np.frombuffer(payload, dtype=QTY_DTYPE, count=count, offset=position)
+        position += count * QTY_DTYPE.itemsize
+        side = np.empty((count, 2), dtype=np.float64)
+        side[:, 0] = np.round((offsets.astype(np.int64) + base_tick) / scale, decimals)
+        side[:, 1] = quantities
+        sides.append(side)
+    return bool(flags & FLAG_KEYFRAME), sides[0], sides[1]
+
+
+def diff_side(previous, current):
+    """이전 스냅샷 대비 바뀐 레벨만 남긴다. 사라진 레벨은 수량 0으로 표시한다.
+
+    같은 가격이 float 오차로 다른 키가 되지 않도록 MAX_DECIMALS로 반올림해 비교한다.
+    """
+    prev = {round(price, MAX_DECIMALS): qty for price, qty in previous}
+    curr = {round(price, MAX_DECIMALS): qty for price, qty in current}
+    changed = [[price, qty] for price, qty in curr.items() if prev.get(price) != qty]
+    changed.extend([price, 0.0] for price in prev.keys() - curr.keys())
+    return changed
+
+
+def apply_side(levels, delta, descending):
+    book = {price: qty for price, qty in levels}
+    for price, qty in delta:
+        if qty == 0:
+            book.pop(price, None)
+        else:
+            book[price] = qty
+    return sorted(([price, qty] for price, qty in book.items()), reverse=descending)
+
+
+class OrderBookEncoder:
+    """심볼별로 직전 스냅샷을 기억하며 keyframe + delta payload를 만든다."""
+
+    def __init__(self, keyframe_interval):
+        self.keyframe_interval = keyframe_interval
+        self._previous = {}
+        self._frames_since_keyframe = defaultdict(int)
+
+    def encode(self, symbol, bids, asks):
+        previous = self._previous.get(symbol)
+        keyframe = previous is None or self._frames_since_keyframe[symbol] >= self.keyframe_interval - 1
+        if keyframe:
+            payload = encode_levels(bids, asks, keyframe=True)
+            self._frames_since_keyframe[symbol] = 0
+        else:
+            payload = encode_levels(diff_side(previous[0], bids), diff_side(previous[1], asks), keyframe=False)
+            self._frames_since_keyframe[symbol] += 1
+        self._previous[symbol] = (bids, asks)
+        return payload, keyframe
+
+
+def rebuild_packed(symbol, targets):
+    """packed 행 (id, timestamp) 목록의 bids/asks를 복원해 {id: (bids, asks)}로 돌려준다.
+
+    delta 행은 같은 심볼의 직전 keyframe부터 순서대로 적용해야 하므로
+    keyframe ~ 마지막 요청 행 구간을 한 번에 읽어 재구성한다.
+    앞에 keyframe이 없는 행(보존 기간 정리 등으로 잘림)은 복원할 수 없으므로 결과에서 빠진다.
+    """
+    first = min(targets, key=lambda target: (target[1], target[0]))
+    last = max(targets, key=lambda target: (target[1], target[0]))
+    chain = OrderBook.objects.filter(symbol=symbol, encoding='packed')
+    keyframes = chain.filter(is_keyframe=True).values_list('timestamp', flat=True)
+    keyframe = keyframes.filter(timestamp__lte=first[1]).order_by('-timestamp', '-id').first()
+    if keyframe is None:
+        # 첫 요청 행 앞에는 keyframe이 없다: 그 뒤 첫 keyframe부터 복원 가능한 행만
+        keyframe = keyframes.filter(timestamp__gt=first[1], timestamp__lte=last[1]).order_by('timestamp', 'id').first()
+        if keyframe is None:
+            return {}
+    wanted = {row_id for row_id, _ in targets}
+    books = {}
+    bids = asks = None
+    for row_id, payload in (
+        chain.filter(timestamp__gte=keyframe, timestamp__lte=last[1]).order_by('timestamp', 'id').values_list('id', 'payload')
+    ):
+        is_keyframe, frame_bids, frame_asks = decode_levels(payload)
+        if is_keyframe:
+            bids, asks = frame_bids.tolist(), frame_asks.tolist()
+        elif bids is None:
+            continue  # 같은 시각의 keyframe보다 앞선 delta
+        else:
+            bids = apply_side(bids, frame_bids.tolist(), descending=True)
+            asks = apply_side(asks, frame_asks.tolist(), descending=False)
+        if row_id in wanted:
+            books[row_id] = (bids, asks)
+    return books
+
+
+def hydrate_orderbooks(rows):
+    """packed 행의 bids/asks를 복원해 채운다. json 행은 그대로 둔다."""
+    packed = defaultdict(list)
+    for row in rows:
+        if row.encoding == 'packed':
+            packed[row.symbol].append(row)
+    for symbol, targets in packed.items():
+        books = rebuild_packed(symbol, [(row.id, row.timestamp) for row in targets])
+        for row in targets:
+            if row.id in books:
+                row.bids, row.asks = books[row.id]
+    return rows
+
+
+def hydrate_orderbook_values(rows, columns):
+    """values_list() 튜플 버전. columns에 id, symbol, timestamp, bids, asks, encoding이 있어야 한다."""
+    index = {column: position for position, column in enumerate(columns)}
+    row_id, symbol, timestamp = index['id'], index['symbol'], index['timestamp']
+    packed = defaultdict(list)
+    for row in rows:
+        if row[index['encoding']] == 'packed':
+            packed[row[symbol]].append((row[row_id], row[timestamp]))
+    if not packed:
+        return rows
+    books = {}
+    for packed_symbol, targets in packed.items():
+        books.update(rebuild_packed(packed_symbol, targets))
+    hydrated = []
+    for row in rows:
+        book = books.get(row[row_id])
+        if book is not None:
+            row = list(row)
+            row[index['bids']], row[index['asks']] = book
+        hydrated.append(row)
+    return hydrated
+
+
+class OrderBookStreamDecoder:
+    """시간순으로 흘러가는 packed 행을 심볼별 상태를 유지하며 복원한다 (export 등 대량 순회용).
+
+    심볼의 첫 행이 delta이면 그 행만 rebuild_packed로 keyframe부터 재구성한다.
+    """
+
+    def __init__(self):
+        self._books = {}
+
+    def decode(self, row_id, symbol, timestamp, payload):
+        is_keyframe, bids, asks = decode_levels(payload)
+        if is_keyframe:
+            book = (bids.tolist(), asks.tolist())
+        elif symbol in self._books:
+            previous_bids, previous_asks = self._books[symbol]
+            book = (
+                apply_side(previous_bids, bids.tolist(), descending=True),
+                apply_side(previous_asks, asks.tolist(), descending=False),
+            )
+        else:
+            book = rebuild_packed(symbol, [(row_id, timestamp)]).get(row_id)
+            if book is None:
+                # 앞에 keyframe이 없어 복원할 수 없는 delta는 빈 호가로 내보내고 다음 keyframe을 기다린다
+                return [], []
+        self._books[symbol] = book
+        return book
@@ -0,0 +1,97 @@
+# data_collection/pagination.py
+import base64
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def parse_time(value, name):
+    """ISO 8601 문자열 또는 epoch milliseconds를 UTC datetime으로 변환한다."""
+    if value in (None, ''):
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=dt_timezone.utc)
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {name}: {value}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def encode_cursor(timestamp, pk):
+    raw = json.dumps([timestamp.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return parse_time(timestamp, 'cursor'), int(pk)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class HistoricalQuery:
+    """historical 엔드포인트 공통 파라미터 (symbol, start, end, limit, cursor)"""
+
+    def __init__(self, symbol, start, end, limit, cursor):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.limit = limit
+        self.cursor = cursor
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        symbol = params.get('symbol', 'BTCUSDT').upper()
+        try:
+            limit = int(params.get('limit', settings.HISTORICAL_DEFAULT_LIMIT))
+        except ValueError:
+            raise ValueError(f"Invalid limit: {params.get('limit')}")
+        if not 1 <= limit <= settings.HISTORICAL_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {settings.HISTORICAL_MAX_LIMIT}")
+        cursor = params.get('cursor')
+        return cls(
+            symbol=symbol,
+            start=parse_time(params.get('start'), 'start'),
+            end=parse_time(params.get('end'), 'end'),
+            limit=limit,
+            cursor=decode_cursor(cursor) if cursor else None,
+        )
+
+
+def paginate_keyset(queryset, query, time_field='timestamp', columns=None):
+    """(time_field, id) 내림차순 keyset 페이지네이션. OFFSET 없이 다음 페이지 커서를 만든다.
+
+    (symbol, timestamp) 인덱스를 타도록 시간 범위 조건을 항상 같이 건다.
+    columns를 주면 모델 대신 values_list(*columns) 튜플을 돌려준다 (id, time_field 포함).
+    """
+    if query.start is not None:
+        queryset = queryset.filter(**{f'{time_field}__gte': query.start})
+    if query.end is not None:
+        queryset = queryset.filter(**{f'{time_field}__lt': query.end})
+    if query.cursor is not None:
+        timestamp, pk = query.cursor
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, 'id__lt': pk}),
+            **{f'{time_field}__lte': timestamp},
+        )
+    queryset = queryset.order_by(f'-{time_field}', '-id')
+    if columns is not None:
+        queryset = queryset.values_list(*columns)
+    rows = list(queryset[:query.limit + 1])
+    next_cursor = None
+    if len(rows) > query.limit:
+        rows = rows[:query.limit]
+        last = rows[-1]
+        if columns is not None:
+            next_cursor = encode_cursor(last[columns.index(time_field)], last[columns.index('id')])
+        else:
+            next_cursor = encode_cursor(getattr(last, time_field), last.pk)
+    return rows, next_cursor
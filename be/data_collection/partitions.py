@@ -0,0 +1,176 @@
+# data_collection/partitions.py
+import logging
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection as default_connection, transaction
+
+logger = logging.getLogger('data_collection')
+
+PARTITION_KEY = 'timestamp'
+INTERVALS = {
+    'hourly': (timedelta(hours=1), '%Y%m%d%H'),
+    'daily': (timedelta(days=1), '%Y%m%d'),
+}
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def floor_time(value, interval):
+    value = value.astimezone(dt_timezone.utc)
+    if interval == 'hourly':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def partition_name(table, start, interval):
+    return f"{table}_p{start.strftime(INTERVALS[interval][1])}"
+
+
+def _parse_bound(value):
+    return datetime.fromisoformat(value).astimezone(dt_timezone.utc)
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %s", [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def partition_bounds(cursor, table):
+    """범위 파티션의 [(name, start, end)] (시작 시각순, DEFAULT 제외).
+
+    파티션 구간은 이름이 아니라 카탈로그의 실제 경계에서 읽으므로 interval 설정이 바뀌었거나
+    archive 파티션처럼 한 구간보다 넓은 파티션이 있어도 겹치지 않게 새 구간을 만들 수 있다.
+    """
+    cursor.execute(
+        "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s", [table]
+    )
+    bounds = []
+    for name, expr in cursor.fetchall():
+        match = _BOUND_RE.search(expr or '')
+        if match is not None:
+            bounds.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(bounds, key=lambda bound: bound[1])
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def create_default_partition(cursor, table):
+    """범위 파티션이 없는 시각(premake 밖, 과거 행)의 INSERT가 실패하지 않도록 받아 두는 DEFAULT 파티션"""
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS "{default_partition_name(table)}" PARTITION OF "{table}" DEFAULT')
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s)", [f'"{name}"'])
+    return cursor.fetchone()[0] is not None
+
+
+def create_partitions(cursor, table, interval, start, end):
+    """[start, end) 구간을 덮는 파티션을 만든다. 기존 파티션이 덮는 부분은 건너뛴다.
+
+    새 파티션은 interval 경계에서 끊되 기존 파티션 경계와 겹치지 않도록 그 앞에서 자른다.
+    DEFAULT 파티션에 이미 그 구간 행이 있으면 새 파티션으로 옮긴다
+    (그대로 두면 PostgreSQL이 파티션 생성을 거부한다).
+    """
+    step = INTERVALS[interval][0]
+    default = default_partition_name(table)
+    has_default = _table_exists(cursor, default)
+    existing = partition_bounds(cursor, table)
+    created = []
+    current = floor_time(start, interval)
+    while current < end:
+        covering = next((bound for bound in existing if bound[1] <= current < bound[2]), None)
+        if covering is not None:
+            created.append(covering[0])
+            current = covering[2]
+            continue
+        upper = min([floor_time(current, interval) + step] + [b[1] for b in existing if b[1] > current])
+        # 기존 경계에 맞춰 구간 중간에서 시작하면 같은 날의 daily 이름과 겹치지 않게 시 단위 이름을 쓴다
+        name = partition_name(table, current, interval if current == floor_time(current, interval) else 'hourly')
+        bounds = [current, upper]
+        existing.append((name, current, upper))
+        created.append(name)
+        current = upper
+        moved = False
+        if has_default:
+            cursor.execute(
+                f'SELECT 1 FROM "{default}" WHERE "{PARTITION_KEY}" >= %s AND "{PARTITION_KEY}" < %s LIMIT 1', bounds
+            )
+            moved = cursor.fetchone() is not None
+        if not moved:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM (%s) TO (%s)", bounds
+            )
+            continue
+        # DEFAULT를 떼어 낸 상태로 남지 않도록 한 트랜잭션에서 옮긴다
+        with transaction.atomic(using=cursor.db.alias):
+            cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{default}"')
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{table}" FOR VALUES FROM (%s) TO (%s)', bounds)
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM "{default}" WHERE "{PARTITION_KEY}" >= %s AND "{PARTITION_KEY}" < %s '
+                f'RETURNING *) INSERT INTO "{table}" SELECT * FROM moved', bounds
+            )
+            cursor.execute(f'ALTER TABLE "{table}" ATTACH PARTITION "{default}" DEFAULT')
+        logger.info(f"Moved {name} range rows out of {default}")
+    return created
+
+
+def ensure_partitions(table, interval, premake, now=None, connection=None):
+    """현재 구간부터 premake 개 앞까지 파티션을 미리 만든다."""
+    connection = connection or default_connection
+    now = now or datetime.now(dt_timezone.utc)
+    step = INTERVALS[interval][0]
+    with connection.cursor() as cursor:
+        return create_partitions(cursor, table, interval, now, floor_time(now, interval) + step * (premake + 1))
+
+
+def drop_expired_partitions(table, interval, retention, now=None, connection=None, dry_run=False):
+    """상한(실제 파티션 경계)이 보존 기간보다 오래된 파티션을 DETACH 후 DROP 한다 (DELETE 없음)."""
+    if not retention:
+        return []
+    connection = connection or default_connection
+    now = now or datetime.now(dt_timezone.utc)
+    cutoff = now - retention
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, _, end in partition_bounds(cursor, table):
+            if end > cutoff:
+                continue
+            if not dry_run:
+                cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+                cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+    return dropped
+
+
+def maintain_partitions(now=None, dry_run=False, connection=None):
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return {}
+    result = {}
+    for table, config in settings.TIMESERIES_PARTITIONING.items():
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor, table):
+                logger.warning(f"{table} is not partitioned, skipping")
+                continue
+        created = [] if dry_run else ensure_partitions(
+            table, config['interval'], config['premake'], now=now, connection=connection
+        )
+        dropped = drop_expired_partitions(
+            table, config['interval'], config.get('retention'), now=now, connection=connection,
+            dry_run=dry_run,
+        )
+        result[table] = {"ensured": len(created), "dropped": dropped}
+        if dropped:
+            logger.info(f"Dropped {len(dropped)} expired partitions of {table}")
+    return result
+
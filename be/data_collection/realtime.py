@@ -0,0 +1,226 @@
+# data_collection/realtime.py
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+
+from data_collection.fanout import is_valid_symbol
+from data_collection.http_cache import (
+    etag_matches, make_etag, new_version, realtime_cache_control, version_headers, version_key,
+)
+
+# data type -> Redis 키 형식 (수집기/태스크가 JSON으로 저장)
+REALTIME_KEYS = {
+    'orderbook': '{symbol}_orderbook',
+    'funding_rate': '{symbol}_funding_rate',
+    'open_interest': '{symbol}_open_interest',
+    'trade_volume': '{symbol}_realtime_trade_volume',
+    'liquidation': '{symbol}_liquidation',
+    'metrics': '{symbol}_metrics',  # MetricsEngine 파생 지표
+    'liquidation_stats': '{symbol}_liquidation_stats',  # 구간별 롱/숏 청산 notional
+    'orderbook_rest': '{symbol}_orderbook_rest',  # REST depth 스냅샷 (fetch_all_orderbooks, 로컬 오더북이 없는 심볼만)
+}
+
+
+def realtime_key(data_type, symbol):
+    return REALTIME_KEYS[data_type].format(symbol=symbol.lower())
+
+
+def liquidation_events_key(symbol):
+    """심볼별 최근 청산 이벤트 Redis stream (LiquidationAggregator가 길이/나이 제한)"""
+    return f"{symbol.lower()}_liquidation_events"
+
+
+def store_realtime(pipe, data_type, symbol, value, ttl, version=None):
+    """값과 갱신 버전(ms)을 같은 TTL로 기록한다. pipe는 transaction 파이프라인이어야 둘이 함께 바뀐다."""
+    key = realtime_key(data_type, symbol)
+    pipe.setex(key, ttl, value)
+    pipe.setex(version_key(key), ttl, version or new_version())
+
+
+class RawJSONResponse(HttpResponse):
+    """이미 JSON으로 인코딩된 bytes를 디코딩/재인코딩 없이 그대로 내려준다."""
+
+    def __init__(self, content, status=200, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content, status=status, **kwargs)
+
+
+def _with_headers(response, headers):
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def _realtime_result(data_type, raw, version):
+    if raw is None:
+        return None
+    headers = {'Cache-Control': realtime_cache_control(data_type), **version_headers(version)}
+    return _with_headers(RawJSONResponse(raw), headers)
+
+
+def _realtime_not_modified(request, data_type, version):
+    if version is not None and etag_matches(request.headers.get('If-None-Match'), make_etag(version)):
+        headers = {'Cache-Control': realtime_cache_control(data_type), **version_headers(version)}
+        return _with_headers(HttpResponseNotModified(), headers)
+    return None
+
+
+def realtime_response(request, redis_client, data_type, symbol):
+    """Redis 값을 ETag/Last-Modified/Cache-Control과 함께 그대로 돌려준다. 값이 없으면 None.
+
+    If-None-Match가 현재 버전과 같으면 데이터는 읽지 않고 304를 준다.
+    """
+    key = realtime_key(data_type, symbol)
+    if request.headers.get('If-None-Match'):
+        not_modified = _realtime_not_modified(request, data_type, redis_client.get(version_key(key)))
+        if not_modified is not None:
+            return not_modified
+    raw, version = redis_client.mget([key, version_key(key)])
+    return _realtime_result(data_type, raw, version)
+
+
+async def arealtime_response(request, redis_client, data_type, symbol):
+    """realtime_response의 redis.asyncio 버전"""
+    key = realtime_key(data_type, symbol)
+    if request.headers.get('If-None-Match'):
+        not_modified = _realtime_not_modified(request, data_type, await redis_client.get(version_key(key)))
+        if not_modified is not None:
+            return not_modified
+    raw, version = await redis_client.mget([key, version_key(key)])
+    return _realtime_result(data_type, raw, version)
+
+
+def _liquidation_keys(symbol):
+    latest, stats = realtime_key('liquidation', symbol), realtime_key('liquidation_stats', symbol)
+    return [latest, version_key(latest), stats, version_key(stats)]
+
+
+def _liquidation_result(request, values, entries, recent):
+    """마지막 청산, 구간 통계, 최근 이벤트를 저장된 bytes 그대로 이어 붙인다. 둘 다 없으면 None."""
+    latest, latest_version, stats, stats_version = values
+    if latest is None and stats is None:
+        return None
+    # 통계는 새 이벤트 없이도 만료로 바뀌므로 두 버전을 합치고, recent 개수에 따라 본문이 달라 그것도 넣는다
+    etag = make_etag(b'-'.join(version or b'0' for version in (latest_version, stats_version)) + f'-{recent}'.encode())
+    headers = {
+        'Cache-Control': realtime_cache_control('liquidation'),
+        **version_headers(latest_version),
+        'ETag': etag,
+    }
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return _with_headers(HttpResponseNotModified(), headers)
+    body = (
+        b'{"status":"success","data":' + (latest or b'null')
+        + b',"stats":' + (stats or b'null')
+        + b',"recent":[' + b','.join(fields[b'data'] for _, fields in entries) + b']}'
+    )
+    return _with_headers(RawJSONResponse(body), headers)
+
+
+def parse_recent(value):
+    if value in (None, ''):
+        return settings.LIQUIDATION_RECENT_DEFAULT
+    if not value.isdigit() or int(value) > settings.LIQUIDATION_EVENTS_MAX_LENGTH:
+        raise ValueError(f"recent must be between 0 and {settings.LIQUIDATION_EVENTS_MAX_LENGTH}")
+    return int(value)
+
+
+def liquidation_response(request, redis_client, symbol, recent):
+    """마지막 청산 + 롱/숏 notional 통계 + 최근 recent개 이벤트 (파이프라인 한 번)"""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.mget(_liquidation_keys(symbol))
+    if recent:
+        pipe.xrevrange(liquidation_events_key(symbol), count=recent)
+    values, *entries = pipe.execute()
+    return _liquidation_result(request, values, entries[0] if entries else [], recent)
+
+
+async def aliquidation_response(request, redis_client, symbol, recent):
+    """liquidation_response의 redis.asyncio 버전"""
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.mget(_liquidation_keys(symbol))
+        if recent:
+            pipe.xrevrange(liquidation_events_key(symbol), count=recent)
+        values, *entries = await pipe.execute()
+    return _liquidation_result(request, values, entries[0] if entries else [], recent)
+
+
+def parse_batch_query(symbols, types, default_symbols):
+    """batch 요청의 symbols/types 쿼리를 (symbols, data_types)로 정리한다. 잘못된 값은 ValueError.
+
+    symbols가 없으면 default_symbols() 중 키/그룹 이름으로 쓸 수 있는 심볼만 쓰고,
+    키 수 상한(REALTIME_BATCH_MAX_KEYS)은 클라이언트가 직접 지정한 목록에만 적용한다.
+    """
+    explicit = bool(symbols)
+    if explicit:
+        symbols = [s.strip().upper() for s in symbols.split(',') if s.strip()]
+    else:
+        symbols = [s for s in default_symbols() if is_valid_symbol(s)]
+    data_types = [t.strip() for t in types.split(',') if t.strip()] if types else list(REALTIME_KEYS)
+    invalid = [s for s in symbols if not is_valid_symbol(s)] + [t for t in data_types if t not in REALTIME_KEYS]
+    if invalid:
+        raise ValueError(f"Invalid symbols or types: {', '.join(invalid)}")
+    if explicit and len(symbols) * len(data_types) > settings.REALTIME_BATCH_MAX_KEYS:
+        raise ValueError(f"Too many keys: at most {settings.REALTIME_BATCH_MAX_KEYS} per request")
+    return list(dict.fromkeys(symbols)), list(dict.fromkeys(data_types))
+
+
+def batch_keys(symbols, data_types):
+    """MGET할 키 목록: 값 키들 뒤에 같은 순서의 버전 키들"""
+    keys = [realtime_key(data_type, symbol) for symbol in symbols for data_type in data_types]
+    return keys + [version_key(key) for key in keys]
+
+
+def build_batch(symbols, data_types, values):
+    """batch_keys 순서로 읽은 값으로 (응답 body bytes, ETag)를 만든다.
+
+    값은 Redis에 저장된 bytes를 그대로 끼워 넣고, 없는 키는 null로 두고 missing에 기록한다.
+    ETag는 모든 키의 버전을 합친 해시라 하나라도 바뀌면 달라진다.
+    """
+    count = len(symbols) * len(data_types)
+    data, versions = values[:count], values[count:]
+    parts = []
+    missing = []
+    position = 0
+    for symbol in symbols:
+        fields = []
+        for data_type in data_types:
+            value = data[position]
+            position += 1
+            if value is None:
+                missing.append(f'"{symbol}:{data_type}"')
+                value = b'null'
+            fields.append(b'"%s":%s' % (data_type.encode(), value))
+        parts.append(b'"%s":{%s}' % (symbol.encode(), b','.join(fields)))
+    body = b'{"data":{' + b','.join(parts) + b'},"missing":[' + ','.join(missing).encode() + b']}'
+    digest = hashlib.sha1(f"{','.join(symbols)}|{','.join(data_types)}".encode())
+    for value, version in zip(data, versions):
+        # 버전이 없는 (이전 writer가 쓴) 값은 내용으로 구분
+        digest.update(b'|' + (version or value or b'-'))
+    return body, make_etag(digest.hexdigest())
+
+
+def fetch_batch(redis_client, symbols, data_types):
+    keys = batch_keys(symbols, data_types)
+    return build_batch(symbols, data_types, redis_client.mget(keys) if keys else [])
+
+
+def _batch_result(request, data_types, body, etag):
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f"max-age={min(settings.REALTIME_CACHE_MAX_AGE.get(t, 1) for t in data_types)}",
+    }
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return _with_headers(HttpResponseNotModified(), headers)
+    return _with_headers(RawJSONResponse(body), headers)
+
+
+def batch_response(request, redis_client, symbols, data_types):
+    return _batch_result(request, data_types, *fetch_batch(redis_client, symbols, data_types))
+
+
+async def abatch_response(request, redis_client, symbols, data_types):
+    keys = batch_keys(symbols, data_types)
+    values = await redis_client.mget(keys) if keys else []
+    return _batch_result(request, data_types, *build_batch(symbols, data_types, values))
@@ -0,0 +1,32 @@
+# data_collection/renderers.py
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from data_collection import codec
+
+
+class FastJSONRenderer(JSONRenderer):
+    """codec 백엔드(orjson)로 인코딩하는 JSONRenderer. indent 요청(browsable API 등)은 기본 구현을 쓴다."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # STRICT_JSON이면 JSONRenderer처럼 NaN/Infinity를 거부한다 (orjson은 null로 바꿔 버린다)
+        ret = codec.dumps(data, default=self.encoder_class().default, allow_nan=not self.strict)
+        # JSONRenderer와 같이 U+2028/U+2029는 escape (JS 문자열 호환)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return codec.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
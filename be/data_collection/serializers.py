@@ -1,5 +1,6 @@
 # data_collection/serializers.py
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
 from .models import OrderBook, FundingRate, TradeVolume, Liquidation
 
 class OrderBookSerializer(serializers.ModelSerializer):
@@ -15,9 +16,75 @@ class FundingRateSerializer(serializers.ModelSerializer):
 class TradeVolumeSerializer(serializers.ModelSerializer):
     class Meta:
         model = TradeVolume
-        fields = ['symbol', 'buy_volume', 'sell_volume', 'timestamp']
+        fields = ['symbol', 'interval', 'bucket_start', 'open', 'high', 'low', 'close',
+                  'volume', 'buy_volume', 'sell_volume', 'trade_count', 'timestamp']
 
 class LiquidationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Liquidation
-        fields = ['symbol', 'side', 'price', 'quantity', 'timestamp']
\ No newline at end of file
+        fields = ['symbol', 'side', 'price', 'quantity', 'timestamp']
+
+class ValuesSerializer:
+    """ModelSerializer와 같은 출력을 values_list() 튜플에서 바로 만든다.
+
+    모델 인스턴스 생성과 필드별 to_representation 호출을 건너뛰고, 필드 타입별 변환 함수를
+    미리 골라 둔다. 튜플은 (id, *fields) 순서이며 뒤에 추가 컬럼이 붙어 있어도 된다.
+    """
+
+    def __init__(self, serializer_class):
+        fields = serializer_class().fields
+        self.fields = list(fields)
+        self.columns = ['id', *(field.source for field in fields.values())]
+        self._fields = list(fields.values())
+
+    def _converters(self):
+        # DateTimeField는 요청마다 current timezone이 다를 수 있어 호출 시점에 만든다
+        converters = []
+        for position, field in enumerate(self._fields, start=1):
+            if isinstance(field, serializers.DateTimeField):
+                convert = _datetime_converter(field)
+            elif type(field) is serializers.CharField or (type(field) is serializers.JSONField and not field.binary):
+                convert = None  # DB 값이 이미 str / 파이썬 객체
+            elif type(field) is serializers.FloatField:
+                convert = float
+            elif type(field) is serializers.IntegerField:
+                convert = int
+            else:
+                convert = field.to_representation
+            converters.append((position, convert))
+        return converters
+
+    def to_rows(self, rows):
+        """[{field: value}, ...] (ModelSerializer(many=True).data와 같음)"""
+        converters = self._converters()
+        names = self.fields
+        data = []
+        for row in rows:
+            values = []
+            for position, convert in converters:
+                value = row[position]
+                values.append(value if convert is None or value is None else convert(value))
+            data.append(dict(zip(names, values)))
+        return data
+
+    def to_columns(self, rows):
+        """{field: [value, ...]} 열 단위 출력"""
+        data = {}
+        for name, (position, convert) in zip(self.fields, self._converters()):
+            if convert is None:
+                data[name] = [row[position] for row in rows]
+            else:
+                data[name] = [None if row[position] is None else convert(row[position]) for row in rows]
+        return data
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation의 ISO 8601 경로 (timezone 변환 후 +00:00 -> Z)"""
+    timezone = field.default_timezone()
+    if hasattr(field, 'timezone') or getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601 or timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        value = value.astimezone(timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
@@ -0,0 +1,301 @@
+# data_collection/streams.py
+import asyncio
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+
+import websockets
+from django.conf import settings
+
+from data_collection import codec
+from data_collection.supervisor import backoff_delay
+
+logger = logging.getLogger('data_collection')
+
+_manager = None
+
+
+class ExchangeClock:
+    """스트림 이벤트 시각(T/E)으로 추정한 거래소 시각.
+
+    bucket은 거래소 체결 시각 기준이므로 로컬 시계가 앞서 있으면 tick이 bucket을 일찍 닫아
+    늦게 온 체결을 버린다. 마지막으로 본 이벤트 시각 + 그 뒤 흐른 monotonic 시간을 쓰고,
+    이벤트 시각은 수신 시각보다 늦을 수 없으므로 추정값은 실제 거래소 시각을 앞서지 않는다.
+    이벤트를 보기 전에는 로컬 시계를 쓴다.
+    """
+
+    def __init__(self):
+        self._base_ms = None
+        self._base_monotonic = 0.0
+
+    def observe(self, event_ms):
+        if event_ms and (self._base_ms is None or event_ms > self.now_ms()):
+            self._base_ms = int(event_ms)
+            self._base_monotonic = time.monotonic()
+
+    def now_ms(self):
+        if self._base_ms is None:
+            return int(time.time() * 1000)
+        return self._base_ms + int((time.monotonic() - self._base_monotonic) * 1000)
+
+
+class StreamConnection:
+    """하나의 combined stream 소켓 (/stream?streams=a/b/c).
+
+    연결이 이미 열려 있으면 SUBSCRIBE/UNSUBSCRIBE 메시지로 구독을 바꾸고,
+    끊기면 현재 구독 목록으로 URL을 다시 만들어 jitter backoff 후 재연결한다.
+    BINANCE_WS_IDLE_TIMEOUT 동안 메시지가 없으면 끊고, 거래소의 24시간 연결 제한 전에
+    (BINANCE_WS_MAX_CONNECTION_AGE - jitter) 스스로 재연결한다.
+    재연결하면 manager의 reconnect listener에 끊긴 동안의 구독 목록과 시간을 알린다.
+    """
+
+    def __init__(self, manager, index):
+        self.manager = manager
+        self.index = index
+        self.streams = set()
+        self._ws = None
+        self._task = None
+        self._request_ids = itertools.count(1)
+        self._close_reason = None
+        self.last_seen = {}  # stream -> 마지막 메시지 시각 (epoch 초)
+        self.connected_at = None
+        self.disconnected_at = None
+        self.messages = 0
+        self.reconnects = 0
+        self.rotations = 0
+        self.last_error = None
+
+    def __len__(self):
+        return len(self.streams)
+
+    @property
+    def connected(self):
+        return self._ws is not None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def subscribe(self, streams):
+        self.streams.update(streams)
+        if self._ws is not None:
+            await self._send("SUBSCRIBE", streams)
+        self.start()
+
+    async def unsubscribe(self, streams):
+        self.streams.difference_update(streams)
+        if self._ws is not None:
+            await self._send("UNSUBSCRIBE", streams)
+
+    async def _send(self, method, streams):
+        message = {"method": method, "params": list(streams), "id": next(self._request_ids)}
+        try:
+            await self._ws.send(codec.dumps_str(message))
+        except websockets.ConnectionClosed:
+            pass  # 재연결 시 self.streams 기준으로 다시 구독된다
+
+    async def _run(self):
+        attempt = 0
+        while self.streams:
+            connected_streams = set(self.streams)
+            uri = f"{self.manager.base_url}/stream?streams={'/'.join(sorted(connected_streams))}"
+            self._close_reason = None
+            try:
+                async with websockets.connect(uri) as websocket:
+                    self._ws = websocket
+                    self.connected_at = time.time()
+                    logger.info(f"Connected combined stream #{self.index} ({len(connected_streams)} streams)")
+                    if self.disconnected_at is not None:
+                        self.reconnects += 1
+                        self.manager.reconnected(connected_streams, self.connected_at - self.disconnected_at)
+                    watchdog = asyncio.create_task(self._watch(websocket))
+                    try:
+                        # URL 생성 이후 바뀐 구독을 맞춘다
+                        added = self.streams - connected_streams
+                        removed = connected_streams - self.streams
+                        if added:
+                            await self._send("SUBSCRIBE", added)
+                        if removed:
+                            await self._send("UNSUBSCRIBE", removed)
+                        async for raw in websocket:
+                            message = codec.loads(raw)
+                            stream = message.get('stream')
+                            if stream is not None:
+                                self.last_seen[stream] = time.time()
+                                self.messages += 1
+                                attempt = 0
+                                await self.manager.dispatch(stream, message.get('data'))
+                            elif message.get('error'):
+                                logger.error(f"Combined stream #{self.index} error: {message['error']}")
+                    finally:
+                        watchdog.cancel()
+                if self._close_reason == 'rotate':
+                    self.rotations += 1
+                    logger.info(f"Rotated combined stream #{self.index} before the connection age limit")
+                    continue
+                raise ConnectionError(self._close_reason or "closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logger.error(f"Combined stream #{self.index} disconnected: {e}, reconnecting in {delay:.1f}s")
+                self._mark_disconnected()
+                await asyncio.sleep(delay)
+            finally:
+                self._mark_disconnected()
+
+    def _mark_disconnected(self):
+        if self._ws is not None:
+            self._ws = None
+            self.disconnected_at = time.time()
+
+    async def _watch(self, websocket):
+        """메시지가 끊긴 연결과 연결 수명 초과를 감지해 소켓을 닫는다 (닫는 이유는 _close_reason)."""
+        max_age = settings.BINANCE_WS_MAX_CONNECTION_AGE - random.uniform(0, settings.BINANCE_WS_ROTATION_JITTER)
+        idle_timeout = settings.BINANCE_WS_IDLE_TIMEOUT
+        opened = last_count = None
+        while True:
+            await asyncio.sleep(min(idle_timeout, 5))
+            now = time.time()
+            if now - self.connected_at >= max_age:
+                self._close_reason = 'rotate'
+                break
+            if self.messages != last_count:
+                last_count, opened = self.messages, now
+            elif now - opened >= idle_timeout:
+                self._close_reason = f"no message for {idle_timeout:.0f}s"
+                break
+        await websocket.close()
+
+
+class StreamManager:
+    """프로세스 전체가 공유하는 Binance combined stream 관리자.
+
+    같은 스트림을 여러 클라이언트가 구독해도 업스트림 구독은 하나이며,
+    연결당 스트림 수 제한(max_streams)을 넘지 않도록 소켓을 샤딩한다.
+    """
+
+    def __init__(self, base_url=None, max_streams=None):
+        self.base_url = base_url or settings.BINANCE_WS_BASE_URL
+        self.max_streams = max_streams or settings.BINANCE_MAX_STREAMS_PER_CONNECTION
+        self.connections = []
+        self._handlers = defaultdict(set)
+        self._stream_connection = {}
+        self._lock = asyncio.Lock()
+        self._connection_ids = itertools.count()
+        self._reconnect_listeners = []
+
+    async def subscribe(self, streams, handler):
+        """handler(stream, data) 코루틴을 streams에 등록한다."""
+        async with self._lock:
+            new_streams = []
+            for stream in streams:
+                if not self._handlers[stream]:
+                    new_streams.append(stream)
+                self._handlers[stream].add(handler)
+            for connection, chunk in self._assign(new_streams):
+                for stream in chunk:
+                    self._stream_connection[stream] = connection
+                await connection.subscribe(chunk)
+
+    async def unsubscribe(self, streams, handler):
+        async with self._lock:
+            by_connection = defaultdict(list)
+            for stream in streams:
+                handlers = self._handlers.get(stream)
+                if not handlers:
+                    continue
+                handlers.discard(handler)
+                if not handlers:
+                    del self._handlers[stream]
+                    by_connection[self._stream_connection.pop(stream)].append(stream)
+            for connection, chunk in by_connection.items():
+                await connection.unsubscribe(chunk)
+                if not connection.streams:
+                    self.connections.remove(connection)
+                    await connection.stop()
+
+    def _assign(self, streams):
+        """여유 있는 소켓부터 채우고, 모자라면 새 소켓을 만든다."""
+        assignments = []
+        pending = list(streams)
+        for connection in self.connections:
+            if not pending:
+                break
+            room = self.max_streams - len(connection)
+            if room > 0:
+                assignments.append((connection, pending[:room]))
+                pending = pending[room:]
+        while pending:
+            connection = StreamConnection(self, next(self._connection_ids))
+            self.connections.append(connection)
+            assignments.append((connection, pending[:self.max_streams]))
+            pending = pending[self.max_streams:]
+        return assignments
+
+    async def dispatch(self, stream, data):
+        for handler in list(self._handlers.get(stream, ())):
+            try:
+                await handler(stream, data)
+            except Exception as e:
+                logger.error(f"Stream handler error for {stream}: {e}")
+
+    def add_reconnect_listener(self, listener):
+        """listener(streams, downtime초)를 재연결 때마다 호출한다 (예: 오더북 스냅샷 재동기화)."""
+        self._reconnect_listeners.append(listener)
+
+    def reconnected(self, streams, downtime):
+        logger.info(f"Resubscribed {len(streams)} streams after {downtime:.1f}s gap")
+        for listener in self._reconnect_listeners:
+            try:
+                listener(streams, downtime)
+            except Exception as e:
+                logger.error(f"Reconnect listener error: {e}")
+
+    def status(self, now=None):
+        now = now or time.time()
+        stale_after = settings.BINANCE_WS_STREAM_STALE_AFTER
+        shards = []
+        for c in self.connections:
+            # 구독 후 stale_after 동안 메시지가 없는 stream (거래가 드문 심볼도 포함될 수 있다)
+            stale = sorted(
+                stream for stream in c.streams
+                if now - c.last_seen.get(stream, c.connected_at or now) > stale_after
+            )
+            shards.append({
+                "index": c.index,
+                "streams": len(c),
+                "connected": c.connected,
+                "connected_at": c.connected_at,
+                "last_message_age": round(now - max(c.last_seen.values()), 3) if c.last_seen else None,
+                "messages": c.messages,
+                "reconnects": c.reconnects,
+                "rotations": c.rotations,
+                "last_error": c.last_error,
+                "stale_streams": stale,
+            })
+        return {
+            "connections": len(self.connections),
+            "streams": len(self._handlers),
+            "shards": shards,
+        }
+
+
+def get_stream_manager():
+    global _manager
+    if _manager is None:
+        _manager = StreamManager()
+    return _manager
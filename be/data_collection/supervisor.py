@@ -0,0 +1,114 @@
+# data_collection/supervisor.py
+import asyncio
+import logging
+import random
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('data_collection')
+
+# 수집기 상태 (health_reporter가 주기적으로 기록, /api/status/ingest/ 에서 조회)
+INGEST_HEALTH_KEY = 'ingest:health'
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """attempt번째 재시도 대기(초). 지수 증가 상한 cap, 0.5~1배 jitter로 동시 재연결을 흩는다."""
+    base = settings.SUPERVISOR_BACKOFF_BASE if base is None else base
+    cap = settings.SUPERVISOR_BACKOFF_MAX if cap is None else cap
+    return min(cap, base * 2 ** min(attempt, 16)) * random.uniform(0.5, 1)
+
+
+class TaskSupervisor:
+    """수집기 백그라운드 코루틴을 이름별로 소유하고 끝나거나 실패하면 계속 다시 시작한다.
+
+    restart='always': 무한 루프 태스크 (ticker, flusher). 끝나도 다시 시작한다.
+    restart='on_failure': 구독처럼 한 번 성공하면 끝나는 태스크. 실패할 때만 다시 시도한다.
+    stable_after초 이상 돌다가 실패하면 backoff를 처음부터 다시 센다.
+    """
+
+    def __init__(self, stable_after=None):
+        self.stable_after = settings.SUPERVISOR_STABLE_AFTER if stable_after is None else stable_after
+        self._specs = {}
+        self._tasks = {}
+        self.health = {}
+
+    def add(self, name, factory, restart='always'):
+        if restart not in ('always', 'on_failure'):
+            raise ValueError(f"Unknown restart policy: {restart}")
+        self._specs[name] = (factory, restart)
+        self.health[name] = {
+            "state": 'pending', "restarts": 0, "failures": 0,
+            "started_at": None, "last_error": None, "last_error_at": None,
+        }
+
+    def start(self):
+        for name in self._specs:
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = asyncio.create_task(self._supervise(name))
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _supervise(self, name):
+        try:
+            await self._run(name)
+        finally:
+            if self.health[name]["state"] != 'done':
+                self.health[name]["state"] = 'stopped'
+
+    async def _run(self, name):
+        factory, restart = self._specs[name]
+        health = self.health[name]
+        attempt = 0
+        while True:
+            health["state"] = 'running'
+            health["started_at"] = time.time()
+            started = time.monotonic()
+            try:
+                await factory()
+            except Exception as e:
+                health["failures"] += 1
+                health["last_error"] = f"{type(e).__name__}: {e}"
+                health["last_error_at"] = time.time()
+                if time.monotonic() - started >= self.stable_after:
+                    attempt = 0
+                delay = backoff_delay(attempt)
+                attempt += 1
+                logger.error(f"Ingest task {name} failed ({e}), restarting in {delay:.1f}s")
+            else:
+                if restart == 'on_failure':
+                    health["state"] = 'done'
+                    return
+                attempt = 0
+                delay = backoff_delay(0)
+                logger.warning(f"Ingest task {name} exited, restarting in {delay:.1f}s")
+            health["state"] = 'backoff'
+            await asyncio.sleep(delay)
+            health["restarts"] += 1
+
+    def status(self):
+        return {name: dict(health) for name, health in self.health.items()}
+
+
+def health_report(tasks, streams, orderbooks, now=None):
+    """supervisor/StreamManager/OrderBookManager 상태를 합쳐 전체 상태(ok/degraded)를 붙인다."""
+    problems = []
+    problems.extend(f"task {name} {health['state']}" for name, health in tasks.items() if health["state"] in ('backoff', 'stopped'))
+    problems.extend(f"stream shard #{shard['index']} disconnected" for shard in streams["shards"] if not shard["connected"])
+    # 시작 시 첫 스냅샷과 가끔 있는 재동기화는 정상이다. 오래 걸리거나 잦을 때만 degraded
+    if orderbooks["stalled"]:
+        problems.append(f"{len(orderbooks['stalled'])} orderbooks resyncing for over {settings.ORDERBOOK_RESYNC_GRACE:g}s")
+    if orderbooks["recent_resyncs"] >= settings.ORDERBOOK_RESYNC_ALERT:
+        problems.append(f"{orderbooks['recent_resyncs']} orderbook resyncs in the last {settings.ORDERBOOK_RESYNC_WINDOW:g}s")
+    return {
+        "status": 'degraded' if problems else 'ok',
+        "problems": problems,
+        "updated": int((now or time.time()) * 1000),
+        "tasks": tasks,
+        "streams": streams,
+        "orderbooks": orderbooks,
+    }
@@ -0,0 +1,175 @@
+# data_collection/symbols.py
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from data_collection.binance_rest import get_async_rest_client, get_rest_client
+
+logger = logging.getLogger('data_collection')
+
+REGISTRY_KEY = 'symbols:registry'
+REGISTRY_ETAG_KEY = 'symbols:registry:etag'
+
+_registry = None
+
+
+def _filter_value(filters, filter_type, field):
+    for item in filters:
+        if item.get('filterType') == filter_type:
+            return item.get(field)
+    return None
+
+
+def build_registry(exchange_info):
+    symbols = {}
+    for item in exchange_info.get('symbols', []):
+        filters = item.get('filters', [])
+        symbols[item['symbol']] = {
+            "symbol": item['symbol'],
+            "status": item.get('status'),
+            "contract_type": item.get('contractType'),
+            "base_asset": item.get('baseAsset'),
+            "quote_asset": item.get('quoteAsset'),
+            "tick_size": _filter_value(filters, 'PRICE_FILTER', 'tickSize'),
+            "step_size": _filter_value(filters, 'LOT_SIZE', 'stepSize'),
+            "min_qty": _filter_value(filters, 'LOT_SIZE', 'minQty'),
+        }
+    body = json.dumps(symbols, sort_keys=True)
+    return {
+        "etag": hashlib.sha1(body.encode()).hexdigest(),
+        "updated_at": timezone.now().isoformat(),
+        "symbols": symbols,
+    }
+
+
+class SymbolRegistry:
+    """exchangeInfo 메타데이터를 Redis + 프로세스 메모리에 캐시한다.
+
+    프로세스 캐시는 local_ttl 동안 그대로 쓰고, 이후에는 Redis의 etag만 확인해
+    바뀐 경우에만 전체를 다시 읽는다. 업스트림 호출은 refresh()에서만 한다.
+    """
+
+    def __init__(self, redis_client=None, local_ttl=None):
+        self.redis_client = redis_client or redis.Redis.from_url(settings.REDIS_URL)
+        self.local_ttl = settings.SYMBOL_REGISTRY_LOCAL_TTL if local_ttl is None else local_ttl
+        self._data = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._async_locks = weakref.WeakKeyDictionary()  # 이벤트 루프별 asyncio.Lock
+        self._usdt_cache = {}
+
+    def refresh(self):
+        data = build_registry(get_rest_client().exchange_info())
+        pipe = self.redis_client.pipeline()
+        pipe.set(REGISTRY_KEY, json.dumps(data))
+        pipe.set(REGISTRY_ETAG_KEY, data['etag'])
+        pipe.execute()
+        self._set(data)
+        logger.info(f"Refreshed symbol registry: {len(data['symbols'])} symbols (etag {data['etag'][:8]})")
+        return data
+
+    def _async_lock(self):
+        loop = asyncio.get_running_loop()
+        lock = self._async_locks.get(loop)
+        if lock is None:
+            lock = self._async_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def arefresh(self, redis_client):
+        """refresh의 async 버전 (redis.asyncio + httpx 클라이언트)"""
+        async with self._async_lock():
+            return await self._arefresh(redis_client)
+
+    async def _arefresh(self, redis_client):
+        data = build_registry(await get_async_rest_client().exchange_info())
+        async with redis_client.pipeline() as pipe:
+            await pipe.set(REGISTRY_KEY, json.dumps(data)).set(REGISTRY_ETAG_KEY, data['etag']).execute()
+        self._set(data)
+        logger.info(f"Refreshed symbol registry: {len(data['symbols'])} symbols (etag {data['etag'][:8]})")
+        return data
+
+    def _set(self, data):
+        self._data = data
+        self._checked_at = time.monotonic()
+        self._usdt_cache = {}
+
+    def _is_fresh(self):
+        return self._data is not None and time.monotonic() - self._checked_at < self.local_ttl
+
+    def _load(self):
+        if self._is_fresh():
+            return self._data
+        with self._lock:
+            if self._is_fresh():
+                return self._data
+            etag = self.redis_client.get(REGISTRY_ETAG_KEY)
+            if self._data is not None and etag is not None and etag.decode() == self._data['etag']:
+                self._checked_at = time.monotonic()
+                return self._data
+            raw = self.redis_client.get(REGISTRY_KEY)
+            if raw is not None:
+                self._set(json.loads(raw))
+                return self._data
+        # Redis가 비어 있으면(최초 기동) 한 번만 직접 갱신
+        return self.refresh()
+
+    async def aload(self, redis_client):
+        """async 뷰용 _load. 프로세스 캐시가 유효하면 I/O 없이 반환한다."""
+        if self._is_fresh():
+            return self._data
+        # 캐시가 비었을 때 동시 요청이 모두 exchangeInfo를 부르지 않도록 루프 안에서 한 번만
+        async with self._async_lock():
+            if self._is_fresh():
+                return self._data
+            etag = await redis_client.get(REGISTRY_ETAG_KEY)
+            if self._data is not None and etag is not None and etag.decode() == self._data['etag']:
+                self._checked_at = time.monotonic()
+                return self._data
+            raw = await redis_client.get(REGISTRY_KEY)
+            if raw is not None:
+                self._set(json.loads(raw))
+                return self._data
+            return await self._arefresh(redis_client)
+
+    @property
+    def etag(self):
+        return self._load()['etag']
+
+    @property
+    def updated_at(self):
+        return self._load()['updated_at']
+
+    def get(self, symbol):
+        return self._load()['symbols'].get(symbol.upper())
+
+    def all(self):
+        return self._load()['symbols']
+
+    def usdt_symbols(self, status='TRADING', contract_type='PERPETUAL', data=None):
+        """USDT 마진 심볼. 기본은 무기한 계약만 (분기물 BTCUSDT_251226 등 제외)"""
+        data = data or self._load()
+        cache_key = (status, contract_type)
+        cached = self._usdt_cache.get(cache_key)
+        if cached is None:
+            cached = self._usdt_cache[cache_key] = sorted(
+                symbol for symbol, meta in data['symbols'].items()
+                if meta['quote_asset'] == 'USDT'
+                and (status is None or meta['status'] == status)
+                and (contract_type is None or meta['contract_type'] == contract_type)
+            )
+        return cached
+
+
+def get_symbol_registry():
+    global _registry
+    if _registry is None:
+        _registry = SymbolRegistry()
+    return _registry
@@ -1,15 +1,21 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import timezone as dt_timezone
 from pathlib import Path
 from dotenv import load_dotenv
 import os
 import django
 import redis
-import json
 from celery import shared_task
-from binance.um_futures import UMFutures
+from django.conf import settings
 from django.utils import timezone
 from data_collection.models import FundingRate, OrderBook, OpenInterest
+from data_collection import codec, partitions
+from data_collection.backfill import backfill_lock, funding_rate_rows, get_datasets, insert_rows, run_backfill
+from data_collection.binance_rest import get_rest_client
+from data_collection.symbols import get_symbol_registry
+from data_collection.freshness import get_freshness_recorder
+from data_collection.realtime import realtime_key, store_realtime
 
 logger = logging.getLogger(__name__)
 
@@ -19,10 +25,8 @@ django.setup()
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / '.env')
 
 redis_client = redis.Redis.from_url(os.getenv('REDIS_URL'))
-binance_client = UMFutures(
-    key=os.getenv('BINANCE_API_KEY'),
-    secret=os.getenv('BINANCE_SECRET_KEY')
-)
+# 커넥션 풀 + 프로세스 간 공유 request weight budget을 쓰는 REST 클라이언트
+binance_client = get_rest_client()
 
 @shared_task
 def fetch_funding_rate():
@@ -40,7 +44,10 @@ def fetch_funding_rate():
             funding_rate=funding_rate,
             funding_time=funding_time,
         )
-        redis_client.setex("btcusdt_funding_rate", 3600, json.dumps(funding_data, default=str))
+        pipe = redis_client.pipeline()
+        store_realtime(pipe, 'funding_rate', "BTCUSDT", codec.dumps(funding_data, default=str), 3600)
+        pipe.execute()
+        record_freshness('funding_rate', {"BTCUSDT": None})
         logger.info(f"Saved funding rate for BTCUSDT at {timezone.now()}")
     except Exception as e:
         logger.error(f"Funding rate task failed: {e}", exc_info=True)
@@ -59,7 +66,10 @@ def fetch_open_interest():
             symbol="BTCUSDT",
             open_interest=open_interest,
         )
-        redis_client.setex("btcusdt_open_interest", 3600, json.dumps(oi_data, default=str))
+        pipe = redis_client.pipeline()
+        store_realtime(pipe, 'open_interest', "BTCUSDT", codec.dumps(oi_data, default=str), 3600)
+        pipe.execute()
+        record_freshness('open_interest', {"BTCUSDT": oi_data.get('time')})
         logger.info(f"Saved open interest for BTCUSDT at {timezone.now()}")
     except Exception as e:
         logger.error(f"Open interest task failed: {e}", exc_info=True)
@@ -80,8 +90,164 @@ def fetch_orderbook():
             bids=bids,
             asks=asks,
         )
-        redis_client.setex("btcusdt_orderbook", 3600, json.dumps(orderbook, default=str))
+        pipe = redis_client.pipeline()
+        store_realtime(pipe, 'orderbook_rest', "BTCUSDT", codec.dumps(orderbook, default=str), 3600)
+        pipe.execute()
+        record_freshness('orderbook', {"BTCUSDT": orderbook.get('E')})
         logger.info(f"Saved orderbook for BTCUSDT at {timezone.now()}")
     except Exception as e:
         logger.error(f"Orderbook task failed: {e}", exc_info=True)
-        raise
\ No newline at end of file
+        raise
+
+def record_freshness(stream, event_times):
+    """{symbol: 이벤트 시각(ms)} 를 freshness 레지스트리에 기록하고 바로 flush 한다."""
+    recorder = get_freshness_recorder()
+    for symbol, event_time_ms in event_times.items():
+        recorder.record(stream, symbol, event_time_ms)
+    recorder.flush()
+
+def get_usdt_symbols():
+    return get_symbol_registry().usdt_symbols()
+
+def fetch_parallel(func, symbols, **kwargs):
+    """심볼별 REST 호출을 제한된 동시성으로 병렬 실행한다. 실패한 심볼은 건너뛴다."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=settings.BATCH_TASK_CONCURRENCY) as executor:
+        futures = {executor.submit(func, symbol=symbol, **kwargs): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                logger.warning(f"{func.__name__} failed for {symbol}: {e}")
+    return results
+
+@shared_task
+def fetch_all_funding_rates():
+    logger.debug("Starting fetch_all_funding_rates task")
+    try:
+        # symbol 없이 fundingRate를 호출하면 전 심볼의 최근 정산 기록(실제 적용된 펀딩률)을 받는다
+        records = [r for r in binance_client.funding_rate(limit=1000) if r['symbol'].endswith('USDT')]
+        if not records:
+            logger.error("No funding rate data returned")
+            return
+        latest = {}
+        for record in records:
+            if record['symbol'] not in latest or record['fundingTime'] > latest[record['symbol']]['fundingTime']:
+                latest[record['symbol']] = record
+        # 이미 저장된 정산은 건너뛴다 (5분마다 같은 기록을 다시 받음)
+        rows = funding_rate_rows(records)
+        stored = set(FundingRate.objects.filter(
+            funding_time__gte=min(row['funding_time'] for row in rows),
+        ).values_list('symbol', 'funding_time'))
+        new_rows = [row for row in rows if (row['symbol'], row['funding_time']) not in stored]
+        insert_rows(FundingRate, new_rows)
+
+        # 다음 정산에 적용될 예상 펀딩률은 premiumIndex에서 같이 내려준다
+        predicted = {item['symbol']: item for item in binance_client.mark_price()}
+        # 값과 버전(ETag)이 함께 바뀌도록 MULTI 파이프라인
+        pipe = redis_client.pipeline()
+        for symbol, record in latest.items():
+            payload = dict(record)
+            if symbol in predicted:
+                payload["predictedFundingRate"] = predicted[symbol]['lastFundingRate']
+                payload["nextFundingTime"] = predicted[symbol]['nextFundingTime']
+            store_realtime(pipe, 'funding_rate', symbol, codec.dumps(payload, default=str), 3600)
+        pipe.execute()
+        record_freshness('funding_rate', {symbol: record['fundingTime'] for symbol, record in latest.items()})
+        logger.info(f"Saved {len(new_rows)} funding settlements, realtime for {len(latest)} symbols at {timezone.now()}")
+    except Exception as e:
+        logger.error(f"Batch funding rate task failed: {e}", exc_info=True)
+        raise
+
+@shared_task
+def fetch_all_open_interest():
+    logger.debug("Starting fetch_all_open_interest task")
+    try:
+        results = fetch_parallel(binance_client.open_interest, get_usdt_symbols())
+        if not results:
+            logger.error("No open interest data returned")
+            return
+        OpenInterest.objects.bulk_create([
+            OpenInterest(symbol=symbol, open_interest=float(oi_data['openInterest']))
+            for symbol, oi_data in results.items()
+        ])
+        pipe = redis_client.pipeline()
+        for symbol, oi_data in results.items():
+            store_realtime(pipe, 'open_interest', symbol, codec.dumps(oi_data, default=str), 3600)
+        pipe.execute()
+        record_freshness('open_interest', {symbol: oi_data.get('time') for symbol, oi_data in results.items()})
+        logger.info(f"Saved open interest for {len(results)} symbols at {timezone.now()}")
+    except Exception as e:
+        logger.error(f"Batch open interest task failed: {e}", exc_info=True)
+        raise
+
+@shared_task
+def fetch_all_orderbooks():
+    logger.debug("Starting fetch_all_orderbooks task")
+    try:
+        # 수집기의 로컬 오더북이 유지하는 심볼({symbol}_orderbook, TTL 10초)은 REST로 다시 받지 않는다
+        symbols = get_usdt_symbols()
+        pipe = redis_client.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.exists(realtime_key('orderbook', symbol))
+        symbols = [symbol for symbol, live in zip(symbols, pipe.execute()) if not live]
+        if not symbols:
+            logger.debug("All orderbooks are maintained by the ingester, skipping REST snapshots")
+            return
+        results = fetch_parallel(binance_client.depth, symbols, limit=10)
+        if not results:
+            logger.error("No orderbook data returned")
+            return
+        OrderBook.objects.bulk_create([
+            OrderBook(
+                symbol=symbol,
+                bids=[[float(price), float(quantity)] for price, quantity in orderbook.get('bids', [])],
+                asks=[[float(price), float(quantity)] for price, quantity in orderbook.get('asks', [])],
+            )
+            for symbol, orderbook in results.items()
+        ])
+        pipe = redis_client.pipeline()
+        for symbol, orderbook in results.items():
+            store_realtime(pipe, 'orderbook_rest', symbol, codec.dumps(orderbook, default=str), 3600)
+        pipe.execute()
+        record_freshness('orderbook', {symbol: orderbook.get('E') for symbol, orderbook in results.items()})
+        logger.info(f"Saved orderbooks for {len(results)} symbols at {timezone.now()}")
+    except Exception as e:
+        logger.error(f"Batch orderbook task failed: {e}", exc_info=True)
+        raise
+
+@shared_task
+def refresh_symbol_registry():
+    logger.debug("Starting refresh_symbol_registry task")
+    try:
+        get_symbol_registry().refresh()
+    except Exception as e:
+        logger.error(f"Symbol registry refresh failed: {e}", exc_info=True)
+        raise
+
+@shared_task
+def maintain_partitions():
+    logger.debug("Starting maintain_partitions task")
+    try:
+        result = partitions.maintain_partitions()
+        logger.info(f"Partition maintenance done: {result}")
+    except Exception as e:
+        logger.error(f"Partition maintenance task failed: {e}", exc_info=True)
+        raise
+
+@shared_task
+def backfill_gaps(datasets=None, hours=None, symbols=None):
+    logger.debug("Starting backfill_gaps task")
+    try:
+        end = timezone.now()
+        start = end - timezone.timedelta(hours=hours or settings.BACKFILL_LOOKBACK_HOURS)
+        with backfill_lock(redis_client) as acquired:
+            if not acquired:
+                logger.warning("Backfill already running, skipping")
+                return
+            result = run_backfill(get_datasets(datasets), start, end, symbols, client=binance_client)
+        logger.info(f"Backfill done: {result}")
+    except Exception as e:
+        logger.error(f"Backfill task failed: {e}", exc_info=True)
+        raise
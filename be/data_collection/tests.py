@@ -1,3 +1,793 @@
-from django.test import TestCase
+import asyncio
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Create your tests here.
+import redis
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from data_collection import bulk_writer, codec, partitions, symbols, tasks
+from data_collection.backfill import (
+    BACKFILL_LOCK_KEY, BackfillDataset, TradeVolumeBackfill, backfill_lock, get_datasets, plan_chunks, run_backfill,
+)
+from data_collection.binance_rest import (
+    BinanceAPIError, BinanceRestClient, RateLimitExceeded, RequestWeightBudget, WEIGHT_KEY_PREFIX, _EndpointsMixin,
+)
+from data_collection.consumers import RealtimeDataConsumer
+from data_collection.delivery import DeliveryEncoder, SendQueue
+from data_collection.export import ExportRequest, aiter_export, iter_export
+from data_collection.freshness import FreshnessRecorder
+from data_collection.http_cache import IMMUTABLE, historical_cache_control
+from data_collection.liquidations import LiquidationAggregator
+from data_collection.management.commands.benchmark_serializers import DATASETS as SERIALIZER_DATASETS
+from data_collection.management.commands.binance_stub_server import StubError, build_response, make_server
+from data_collection.models import FundingRate, Liquidation, OpenInterest, OrderBook, TradeVolume
+from data_collection.orderbook import BookSide, LocalOrderBook, OrderBookManager, OrderBookOutOfSync
+from data_collection.orderbook_codec import OrderBookEncoder, apply_side, decode_levels, hydrate_orderbooks, rebuild_packed
+from data_collection.realtime import REALTIME_KEYS, liquidation_response, parse_batch_query
+from data_collection.renderers import FastJSONRenderer
+from data_collection.serializers import ValuesSerializer
+from data_collection.streams import ExchangeClock
+from data_collection.supervisor import TaskSupervisor, backoff_delay, health_report
+from data_collection.symbols import SymbolRegistry, build_registry
+
+
+def make_test_redis():
+    """settings.REDIS_URL의 Redis. 연결할 수 없으면 그 테스트는 건너뛴다."""
+    client = redis.Redis.from_url(settings.REDIS_URL or 'redis://localhost:6379/0')
+    try:
+        client.ping()
+    except redis.RedisError:
+        raise unittest.SkipTest('Redis is not available')
+    return client
+
+
+class StubServerMixin:
+    """binance_stub_server를 빈 포트에 띄운다."""
+    stub_weight_limit = 2400
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = make_server('127.0.0.1', 0, ['BTCUSDT', 'ETHUSDT'], cls.stub_weight_limit)
+        threading.Thread(target=cls.stub.serve_forever, daemon=True).start()
+        cls.stub_url = f"http://127.0.0.1:{cls.stub.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.shutdown()
+        cls.stub.server_close()
+        super().tearDownClass()
+
+
+def depth_event(first_id, final_id, prev_final_id, bids=(), asks=()):
+    return {"e": "depthUpdate", "E": final_id, "U": first_id, "u": final_id, "pu": prev_final_id,
+            "b": list(bids), "a": list(asks)}
+
+
+class LocalOrderBookTests(SimpleTestCase):
+    def setUp(self):
+        self.book = LocalOrderBook('btcusdt')
+        self.snapshot = {"lastUpdateId": 100, "bids": [["99.0", "1"], ["98.0", "2"]], "asks": [["101.0", "1"]]}
+
+    def test_buffers_events_until_snapshot(self):
+        self.assertFalse(self.book.apply(depth_event(95, 105, 94, bids=[["99.0", "5"]])))
+        self.book.load_snapshot(self.snapshot)
+        self.assertTrue(self.book.synced)
+        self.assertEqual(self.book.last_update_id, 105)
+        self.assertEqual(self.book.bids.best(), [99.0, 5.0])
+
+    def test_drops_events_older_than_snapshot(self):
+        self.book.load_snapshot(self.snapshot)
+        self.assertFalse(self.book.apply(depth_event(90, 99, 89, bids=[["99.0", "7"]])))
+        self.assertFalse(self.book.synced)
+        self.assertEqual(self.book.bids.best(), [99.0, 1.0])
+
+    def test_first_event_must_straddle_snapshot(self):
+        self.book.load_snapshot(self.snapshot)
+        with self.assertRaises(OrderBookOutOfSync):
+            self.book.apply(depth_event(101, 110, 100))
+
+    def test_following_events_must_chain_on_pu(self):
+        self.book.load_snapshot(self.snapshot)
+        self.book.apply(depth_event(98, 102, 97))
+        self.assertTrue(self.book.apply(depth_event(103, 104, 102, asks=[["101.0", "0"], ["102.0", "3"]])))
+        self.assertEqual(self.book.asks.top(5), [[102.0, 3.0]])
+        self.assertFalse(self.book.apply(depth_event(103, 104, 102)))  # 중복
+        with self.assertRaises(OrderBookOutOfSync):
+            self.book.apply(depth_event(106, 107, 105))
+
+    def test_book_side_keeps_price_order_through_updates(self):
+        side = BookSide(descending=True)
+        side.apply([["99.0", "1"], ["101.0", "2"], ["100.0", "3"]])
+        self.assertEqual(side.top(2), [[101.0, 2.0], [100.0, 3.0]])
+        side.apply([["101.0", "0"], ["100.0", "5"], ["102.0", "1"], ["98.0", "0"]])
+        self.assertEqual(side.top(5), [[102.0, 1.0], [100.0, 5.0], [99.0, 1.0]])
+        self.assertEqual((len(side), side.best()), (3, [102.0, 1.0]))
+        # 상위 구간 밖 가격의 추가/삭제와 구간 안 가격이 빠진 뒤의 다음 가격
+        side.apply([["97.0", "4"], ["99.0", "0"], ["102.0", "0"]])
+        self.assertEqual(side.top(2), [[100.0, 5.0], [97.0, 4.0]])
+        side.apply([["101.5", "1"]])
+        self.assertEqual(side.top(3), [[101.5, 1.0], [100.0, 5.0], [97.0, 4.0]])
+        asks = BookSide()
+        asks.apply([["101.0", "1"], ["103.0", "1"], ["102.0", "1"]])
+        self.assertEqual(asks.top(2), [[101.0, 1.0], [102.0, 1.0]])
+        asks.apply([["100.5", "2"], ["104.0", "1"]])
+        self.assertEqual(asks.top(2), [[100.5, 2.0], [101.0, 1.0]])
+
+    def test_levels_stay_sorted(self):
+        self.book.load_snapshot(self.snapshot)
+        self.book.apply(depth_event(100, 101, 99, bids=[["98.5", "1"], ["99.0", "0"]], asks=[["100.5", "2"]]))
+        self.assertEqual(self.book.bids.top(3), [[98.5, 1.0], [98.0, 2.0]])
+        self.assertEqual(self.book.asks.top(3), [[100.5, 2.0], [101.0, 1.0]])
+
+
+def random_book(rng, mid, levels=20, tick=0.1):
+    bids = [[round(mid - tick * (i + 1), 1), round(rng.uniform(0.001, 5), 3)] for i in range(levels)]
+    asks = [[round(mid + tick * i, 1), round(rng.uniform(0.001, 5), 3)] for i in range(levels)]
+    return bids, asks
+
+
+class PackedOrderBookCodecTests(SimpleTestCase):
+    def test_keyframe_and_delta_roundtrip(self):
+        rng = random.Random(7)
+        encoder = OrderBookEncoder(keyframe_interval=5)
+        bids, asks = [], []
+        for step in range(12):
+            expected = random_book(rng, 100 + rng.randrange(-3, 4) * 0.1)
+            payload, keyframe = encoder.encode('BTCUSDT', *expected)
+            self.assertEqual(keyframe, step % 5 == 0)
+            is_keyframe, frame_bids, frame_asks = decode_levels(payload)
+            self.assertEqual(is_keyframe, keyframe)
+            if is_keyframe:
+                bids, asks = frame_bids.tolist(), frame_asks.tolist()
+            else:
+                bids = apply_side(bids, frame_bids.tolist(), descending=True)
+                asks = apply_side(asks, frame_asks.tolist(), descending=False)
+            self.assertEqual((bids, asks), expected)
+
+    def test_float_noise_does_not_drop_levels(self):
+        encoder = OrderBookEncoder(keyframe_interval=10)
+        encoder.encode('BTCUSDT', [[99.8, 1.0]], [[100.0, 1.0]])
+        payload, _ = encoder.encode('BTCUSDT', [[99.80000000000001, 1.0]], [[100.0, 2.0]])
+        _, frame_bids, frame_asks = decode_levels(payload)
+        self.assertEqual(apply_side([[99.8, 1.0]], frame_bids.tolist(), descending=True), [[99.8, 1.0]])
+        self.assertEqual(frame_asks.tolist(), [[100.0, 2.0]])
+
+
+class PackedOrderBookHydrateTests(TestCase):
+    def test_hydrate_rebuilds_from_nearest_keyframe(self):
+        rng = random.Random(3)
+        encoder = OrderBookEncoder(keyframe_interval=4)
+        expected = {}
+        for _ in range(10):
+            bids, asks = random_book(rng, 200 + rng.randrange(-2, 3) * 0.1, levels=5)
+            payload, keyframe = encoder.encode('ETHUSDT', bids, asks)
+            row = OrderBook.objects.create(symbol='ETHUSDT', encoding='packed', payload=payload, is_keyframe=keyframe)
+            expected[row.id] = (bids, asks)
+        rows = hydrate_orderbooks(list(OrderBook.objects.order_by('id')[5:]))
+        self.assertEqual({row.id: (row.bids, row.asks) for row in rows}, {k: expected[k] for k in sorted(expected)[5:]})
+
+    def test_rows_without_prior_keyframe_are_left_out(self):
+        rng = random.Random(5)
+        encoder = OrderBookEncoder(keyframe_interval=4)
+        expected = {}
+        for _ in range(10):
+            bids, asks = random_book(rng, 300 + rng.randrange(-2, 3) * 0.1, levels=5)
+            payload, keyframe = encoder.encode('BTCUSDT', bids, asks)
+            row = OrderBook.objects.create(symbol='BTCUSDT', encoding='packed', payload=payload, is_keyframe=keyframe)
+            expected[row.id] = (bids, asks)
+        ids = sorted(expected)
+        OrderBook.objects.filter(id=ids[0]).delete()  # 첫 keyframe이 보존 기간 정리로 사라졌다
+        targets = list(OrderBook.objects.filter(id__in=ids[1:6]).order_by('id').values_list('id', 'timestamp'))
+        # ids[1:4]는 keyframe이 없는 delta, ids[4]는 keyframe, ids[5]는 그 delta
+        self.assertEqual(rebuild_packed('BTCUSDT', targets), {k: expected[k] for k in ids[4:6]})
+        self.assertEqual(rebuild_packed('BTCUSDT', targets[:3]), {})
+
+
+class RequestWeightBudgetTests(StubServerMixin, SimpleTestCase):
+    def setUp(self):
+        self.redis = make_test_redis()
+        for key in self.redis.scan_iter(f'{WEIGHT_KEY_PREFIX}:*'):
+            self.redis.delete(key)
+        self.redis.delete('binance:banned_until')
+        if 60 - time.time() % 60 < 5:
+            time.sleep(60 - time.time() % 60)  # 분 경계를 넘지 않도록
+
+    def test_concurrent_acquire_never_overshoots(self):
+        budget = RequestWeightBudget(self.redis, limit=int(100 / settings.BINANCE_WEIGHT_HEADROOM), policy='shed')
+        client = BinanceRestClient(base_url=self.stub_url, budget=budget)
+
+        def call(_):
+            try:
+                client.mark_price()  # 전 심볼 premiumIndex, weight 10
+                return True
+            except RateLimitExceeded:
+                return False
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(call, range(40)))
+        self.assertEqual(sum(results), budget.limit // 10)
+        self.assertLessEqual(int(self.redis.get(f'{WEIGHT_KEY_PREFIX}:{int(time.time() // 60)}')), budget.limit)
+
+    def test_ban_blocks_until_expiry(self):
+        budget = RequestWeightBudget(self.redis, policy='shed')
+        budget.ban(30)
+        with self.assertRaises(RateLimitExceeded) as raised:
+            budget.acquire(1)
+        self.assertGreater(raised.exception.retry_after, 25)
+
+
+class RecordingRedis:
+    """호출된 명령만 기록하는 Redis 대역"""
+
+    def __init__(self):
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def hset(self, key, mapping):
+        self.commands.append(('hset', key, mapping))
+
+    def hincrby(self, key, field, amount):
+        self.commands.append(('hincrby', key, field, amount))
+
+    def execute(self):
+        self.commands.append(('execute',))
+
+    def register_script(self, script):
+        return lambda keys, args, client=None: self.commands.append(('evalsha', keys, args))
+
+
+class FreshnessRecorderTests(SimpleTestCase):
+    def test_record_never_touches_redis(self):
+        client = RecordingRedis()
+        recorder = FreshnessRecorder(client, flush_interval=0)
+        for _ in range(3):
+            recorder.record('orderbook', 'BTCUSDT', int(time.time() * 1000))
+        self.assertEqual(client.commands, [])
+        recorder.flush()
+        self.assertEqual(client.commands[-2:], [('hincrby', 'freshness:orderbook', 'BTCUSDT:count', 3), ('execute',)])
+
+    def test_run_flusher_flushes_periodically(self):
+        client = RecordingRedis()
+        recorder = FreshnessRecorder(client, flush_interval=0.01)
+
+        async def run():
+            recorder.ensure_flusher()
+            recorder.record('trade_volume', 'ETHUSDT')
+            await asyncio.sleep(0.1)
+            recorder._flusher.cancel()
+
+        asyncio.run(run())
+        self.assertIn(('execute',), client.commands)
+
+
+class AsyncExportTests(TestCase):
+    def test_async_iterator_matches_sync_export(self):
+        now = timezone.now()
+        for i in range(5):
+            FundingRate.objects.create(symbol='BTCUSDT', funding_rate=0.0001 * i, funding_time=now)
+        request = ExportRequest('funding_rate', start=now - timedelta(minutes=1),
+                                end=now + timedelta(minutes=1), chunk_size=2)
+
+        async def collect():
+            return [chunk async for chunk in aiter_export(request)]
+
+        # async_to_sync 안에서는 thread_sensitive 단계가 이 스레드(테스트 트랜잭션)에서 돈다
+        chunks = async_to_sync(collect)()
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks), b''.join(iter_export(request)))
+
+
+class HistoricalCacheControlTests(SimpleTestCase):
+    def test_immutable_only_after_backfill_window(self):
+        now = timezone.now()
+        self.assertEqual(historical_cache_control(now), f"max-age={settings.HISTORICAL_CACHE_MAX_AGE}")
+        # 닫혔지만 backfill이 아직 gap을 채울 수 있는 구간
+        closed = historical_cache_control(now - timedelta(hours=settings.BACKFILL_LOOKBACK_HOURS - 1))
+        self.assertIn('must-revalidate', closed)
+        self.assertNotIn('immutable', closed)
+        self.assertEqual(historical_cache_control(now - timedelta(hours=settings.BACKFILL_LOOKBACK_HOURS + 2)), IMMUTABLE)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_semantically_equivalent_to_json_renderer(self):
+        data = {'price': 1e-9, 'qty': 0.1, 'symbol': 'BTCUSDT', 'levels': [[100.5, 2]], 'missing': None}
+        fast, stock = FastJSONRenderer().render(data), JSONRenderer().render(data)
+        self.assertEqual(codec.loads(fast), codec.loads(stock))
+
+    def test_strict_rejects_nan_like_json_renderer(self):
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({'rows': [{'funding_rate': value}]})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'rows': [{'funding_rate': value}]})
+
+
+class ValuesSerializerTests(TestCase):
+    def assert_matches_model_serializer(self, name):
+        model, serializer_class, make_row = SERIALIZER_DATASETS[name]
+        now = timezone.now()
+        model.objects.bulk_create(make_row(i, now) for i in range(7))
+        queryset = model.objects.order_by('-timestamp', '-id')
+        values_serializer = ValuesSerializer(serializer_class)
+        rows = list(queryset.values_list(*values_serializer.columns))
+        expected = serializer_class(list(queryset), many=True).data
+        self.assertEqual(values_serializer.to_rows(rows), expected)
+        self.assertEqual(FastJSONRenderer().render(values_serializer.to_rows(rows)), FastJSONRenderer().render(expected))
+        self.assertEqual(values_serializer.to_columns(rows),
+                         {field: [row[field] for row in expected] for field in values_serializer.fields})
+
+    def test_matches_model_serializer(self):
+        for name in SERIALIZER_DATASETS:
+            with self.subTest(dataset=name):
+                self.assert_matches_model_serializer(name)
+
+    @override_settings(USE_TZ=True, TIME_ZONE='Asia/Seoul')
+    def test_matches_model_serializer_in_local_timezone(self):
+        self.assert_matches_model_serializer('funding_rate')
+
+    def test_null_values_pass_through(self):
+        model, serializer_class, make_row = SERIALIZER_DATASETS['trade_volume']
+        row = make_row(0, timezone.now())
+        row.open = row.high = row.low = row.close = row.bucket_start = None
+        row.save()
+        values_serializer = ValuesSerializer(serializer_class)
+        self.assertEqual(values_serializer.to_rows(model.objects.values_list(*values_serializer.columns)),
+                         serializer_class(model.objects.all(), many=True).data)
+
+
+class LiquidationAggregatorTests(TestCase):
+    def tearDown(self):
+        bulk_writer._writers.pop(Liquidation, None)  # 이벤트 루프마다 새 writer
+
+    def test_rows_keep_order_time(self):
+        order_time = 1700000000123
+        event = {"e": "forceOrder", "E": order_time + 5000,
+                 "o": {"s": "BTCUSDT", "S": "SELL", "p": "35000.5", "q": "0.2", "T": order_time}}
+
+        async def run():
+            await LiquidationAggregator(RecordingRedis()).add(event)
+            await bulk_writer.close_bulk_writers()
+
+        async_to_sync(run)()
+        row = Liquidation.objects.get()
+        self.assertEqual(int(row.timestamp.timestamp() * 1000), order_time)
+        self.assertEqual((row.side, row.price, row.quantity), ('SELL', 35000.5, 0.2))
+
+
+class LiquidationFlushTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = make_test_redis()
+        self.redis.delete('btcusdt_liquidation_events', 'btcusdt_liquidation', 'btcusdt_liquidation_stats')
+        self.aggregator = LiquidationAggregator(self.redis)
+        event = {"e": "forceOrder", "E": 1700000000000,
+                 "o": {"s": "BTCUSDT", "S": "SELL", "p": "35000", "q": "0.1", "T": 1700000000000}}
+        self.aggregator._pending['BTCUSDT'].append(event)
+
+    def test_failed_flush_keeps_pending_events(self):
+        pipe = self.redis.pipeline()
+        pipe.execute = mock.Mock(side_effect=redis.ConnectionError("connection reset"))
+        with mock.patch.object(self.redis, 'pipeline', return_value=pipe):
+            with self.assertRaises(redis.RedisError):
+                self.aggregator.flush()
+        self.aggregator.flush()
+        self.assertEqual(self.redis.xlen('btcusdt_liquidation_events'), 1)
+
+    def test_trim_follows_stream_ids_not_local_clock(self):
+        # 로컬 시계가 보존 기간보다 크게 앞서 있어도 방금 넣은 이벤트는 남는다
+        self.aggregator.flush(int(time.time() * 1000) + settings.LIQUIDATION_EVENTS_MAX_AGE * 10_000)
+        self.assertEqual(self.redis.xlen('btcusdt_liquidation_events'), 1)
+
+    def test_etag_depends_on_recent(self):
+        self.aggregator.flush()
+        request = RequestFactory().get('/api/realtime/liquidation/')
+        etags = {liquidation_response(request, self.redis, 'BTCUSDT', recent)['ETag'] for recent in (0, 1)}
+        self.assertEqual(len(etags), 2)
+
+
+def book_event(symbol, bids, asks, update_id):
+    data = {"E": update_id, "u": update_id, "bids": bids, "asks": asks}
+    return {"symbol": symbol, "stream": 'book', "text": codec.dumps_str({"stream": 'book', "data": data})}
+
+
+class DeltaClient:
+    """delta 모드 클라이언트: seq가 끊기면 실패한다."""
+
+    def __init__(self):
+        self.seq, self.bids, self.asks = None, {}, {}
+
+    def apply(self, text_data):
+        message = codec.loads(text_data)
+        if message["type"] == 'snapshot':
+            self.bids, self.asks = {}, {}
+        else:
+            assert message["seq"] == self.seq + 1, f"seq gap {self.seq} -> {message['seq']}"
+        for levels, changes in ((self.bids, message["bids"]), (self.asks, message["asks"])):
+            for price, qty in changes:
+                if qty:
+                    levels[price] = qty
+                else:
+                    levels.pop(price, None)
+        self.seq = message["seq"]
+
+
+class ConflateDeltaTests(SimpleTestCase):
+    def test_conflated_book_frame_is_resent_as_snapshot(self):
+        consumer = RealtimeDataConsumer()
+        consumer.subscriptions = {'BTCUSDT': 0}
+        consumer.encoder = DeliveryEncoder(mode='delta')
+        consumer.queue = SendQueue(10, policy='conflate')
+        consumer._latest, consumer._next_send, consumer._timers = {}, {}, {}
+        books = [
+            ([[100.0, 1.0], [99.0, 2.0]], [[101.0, 1.0]]),
+            ([[100.0, 3.0], [99.0, 2.0]], [[101.0, 1.0]]),
+            ([[99.0, 2.0]], [[101.0, 4.0], [102.0, 1.0]]),
+            ([[99.5, 1.0], [99.0, 2.0]], [[102.0, 1.0]]),
+        ]
+        client = DeltaClient()
+
+        async def run():
+            for update_id, (bids, asks) in enumerate(books):
+                await consumer.market_event(book_event('BTCUSDT', bids, asks, update_id))
+                if update_id != 1:  # 두 번째 delta는 보내기 전에 세 번째로 교체된다
+                    client.apply((await consumer.queue.get())[1])
+                    self.assertEqual((client.bids, client.asks), (dict(bids), dict(asks)))
+
+        asyncio.run(run())
+        self.assertEqual(consumer.queue.conflated, 1)
+
+
+class ConsumerWriterTests(SimpleTestCase):
+    def test_send_error_closes_the_connection(self):
+        consumer = RealtimeDataConsumer()
+        consumer.channel_name = 'test.channel'
+        consumer.queue = SendQueue(10)
+        consumer.send = mock.AsyncMock(side_effect=RuntimeError("socket gone"))
+        consumer.close = mock.AsyncMock()
+        consumer.queue.put(('BTCUSDT', 'book'), text_data='{}')
+
+        async def run():
+            await asyncio.wait_for(consumer._write(), timeout=1)
+
+        asyncio.run(run())
+        consumer.close.assert_awaited_once_with(code=1011)
+
+
+class StubClient(_EndpointsMixin):
+    """HTTP 없이 binance_stub_server 응답을 돌려주는 REST 클라이언트 대역"""
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+
+    def get(self, path, params=None):
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        try:
+            return build_response(path, params, self.symbols)
+        except StubError as e:
+            raise BinanceAPIError(e.status, e.body['msg'])
+
+
+class BackfillTests(TestCase):
+    def setUp(self):
+        self.client = StubClient(['BTCUSDT'])
+        self.end = timezone.now().replace(second=17, microsecond=0) - timedelta(minutes=10)
+        self.start = self.end - timedelta(hours=2, minutes=13)
+
+    def test_stub_rejects_agg_trades_ranges_over_one_hour(self):
+        end_ms = int(self.end.timestamp() * 1000)
+        with self.assertRaises(BinanceAPIError):
+            self.client.agg_trades(symbol='BTCUSDT', startTime=end_ms - 3_600_000, endTime=end_ms)
+
+    def test_trade_volume_chunks_stay_within_agg_trades_limit(self):
+        dataset = TradeVolumeBackfill()
+        for job in plan_chunks(dataset, [('BTCUSDT', self.start, self.end)]):
+            self.assertTrue(dataset.fetch(self.client, *job))
+
+    def test_same_gap_twice_inserts_no_duplicates(self):
+        datasets = get_datasets(['trade_volume', 'open_interest'])
+        first = run_backfill(datasets, self.start, self.end, ['BTCUSDT'], client=self.client, concurrency=4)
+        self.assertEqual(first['trade_volume']['failed'], 0)
+        self.assertGreater(first['trade_volume']['skipped'], 0)  # 겹친 chunk의 경계 bar
+        self.assertGreater(first['open_interest']['inserted'], 0)
+        counts = (TradeVolume.objects.count(), OpenInterest.objects.count())
+
+        second = run_backfill(datasets, self.start, self.end, ['BTCUSDT'], client=self.client, concurrency=4)
+        self.assertEqual((second['trade_volume']['inserted'], second['open_interest']['inserted']), (0, 0))
+        self.assertEqual((TradeVolume.objects.count(), OpenInterest.objects.count()), counts)
+
+        # 1s bar만 지워 gap을 다시 만들면 1m/5m bar는 이미 있으므로 1s bar만 다시 채운다
+        hole = TradeVolume.objects.filter(interval='1s', bucket_start__gte=self.start + timedelta(minutes=30),
+                                          bucket_start__lt=self.start + timedelta(minutes=80))
+        removed = hole.delete()[0]
+        third = run_backfill(datasets, self.start, self.end, ['BTCUSDT'], client=self.client, concurrency=4)
+        self.assertEqual(third['trade_volume']['inserted'], removed)
+        self.assertEqual(TradeVolume.objects.count(), counts[0])
+        duplicates = (TradeVolume.objects.values('symbol', 'interval', 'bucket_start')
+                      .annotate(rows=Count('id')).filter(rows__gt=1))
+        self.assertFalse(duplicates.exists())
+
+
+class BackfillLockTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = make_test_redis()
+        self.redis.delete(BACKFILL_LOCK_KEY)
+
+    def test_lock_is_extended_while_running(self):
+        with backfill_lock(self.redis, timeout=1) as acquired:
+            self.assertTrue(acquired)
+            time.sleep(1.5)
+            with backfill_lock(self.redis) as second:
+                self.assertFalse(second)
+        self.assertFalse(self.redis.exists(BACKFILL_LOCK_KEY))
+
+    def test_release_keeps_lock_taken_over_by_another_run(self):
+        with backfill_lock(self.redis, timeout=60) as acquired:
+            self.assertTrue(acquired)
+            self.redis.set(BACKFILL_LOCK_KEY, 'other')  # 만료 후 다른 실행이 잡은 상황
+        self.assertEqual(self.redis.get(BACKFILL_LOCK_KEY), b'other')
+
+    def test_dataset_must_implement_fetch(self):
+        class Incomplete(BackfillDataset):
+            name = 'incomplete'
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+def exchange_info(*symbols):
+    """(symbol, contractType, status) 목록으로 만든 exchangeInfo 응답"""
+    return {"symbols": [
+        {"symbol": symbol, "status": status, "contractType": contract_type, "baseAsset": symbol[:3],
+         "quoteAsset": 'USDT', "filters": []}
+        for symbol, contract_type, status in symbols
+    ]}
+
+
+class SymbolRegistryTests(SimpleTestCase):
+    def test_usdt_symbols_are_perpetual_only_by_default(self):
+        data = build_registry(exchange_info(
+            ('BTCUSDT', 'PERPETUAL', 'TRADING'), ('BTCUSDT_251226', 'CURRENT_QUARTER', 'TRADING'),
+            ('ETHUSDT', 'PERPETUAL', 'TRADING'), ('OLDUSDT', 'PERPETUAL', 'SETTLING'),
+        ))
+        registry = SymbolRegistry(redis_client=RecordingRedis())
+        self.assertEqual(registry.usdt_symbols(data=data), ['BTCUSDT', 'ETHUSDT'])
+        self.assertEqual(registry.usdt_symbols(contract_type=None, data=data), ['BTCUSDT', 'BTCUSDT_251226', 'ETHUSDT'])
+
+
+class RealtimeBatchQueryTests(SimpleTestCase):
+    def test_default_symbols_skip_invalid_names_and_key_cap(self):
+        many = [f'S{i}USDT' for i in range(settings.REALTIME_BATCH_MAX_KEYS)]
+        symbols_, data_types = parse_batch_query(None, None, lambda: ['BTCUSDT', 'BTCUSDT_251226', *many])
+        self.assertEqual(symbols_[:2], ['BTCUSDT', 'S0USDT'])
+        self.assertEqual(data_types, list(REALTIME_KEYS))
+        with self.assertRaises(ValueError):
+            parse_batch_query('BTCUSDT_251226', None, list)
+
+
+class RealtimeBatchDefaultSymbolsTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = make_test_redis()
+        registry = symbols._registry = SymbolRegistry(redis_client=self.redis)
+        registry._set(build_registry(exchange_info(
+            ('BTCUSDT', 'PERPETUAL', 'TRADING'), ('ETHUSDT', 'PERPETUAL', 'TRADING'),
+            ('BTCUSDT_251226', 'CURRENT_QUARTER', 'TRADING'),
+        )))
+        self.addCleanup(setattr, symbols, '_registry', None)
+        self.redis.set('btcusdt_funding_rate', codec.dumps({"symbol": "BTCUSDT", "fundingRate": "0.0001"}))
+
+    def assert_default_batch(self, response):
+        self.assertEqual(response.status_code, 200)
+        body = codec.loads(response.content)
+        self.assertEqual(sorted(body['data']), ['BTCUSDT', 'ETHUSDT'])
+        self.assertEqual(body['data']['BTCUSDT']['funding_rate']['fundingRate'], '0.0001')
+
+    def test_no_parameters_returns_perpetual_symbols(self):
+        self.assert_default_batch(self.client.get('/api/realtime/batch/'))
+
+    async def test_async_no_parameters_returns_perpetual_symbols(self):
+        self.assert_default_batch(await self.async_client.get('/api/async/realtime/batch/'))
+
+    async def test_async_symbols_etag_is_matched_per_tag(self):
+        first = await self.async_client.get('/api/async/symbols/')
+        etag = first.headers['ETag']
+        response = await self.async_client.get('/api/async/symbols/', headers={'If-None-Match': f'"other", W/{etag}'})
+        self.assertEqual(response.status_code, 304)
+        # 부분 문자열이 아니라 태그 단위로 비교한다
+        response = await self.async_client.get('/api/async/symbols/', headers={'If-None-Match': f'"{etag}"'})
+        self.assertEqual(response.status_code, 200)
+
+
+class EmptyAsyncRedis:
+    """비어 있는 redis.asyncio 대역 (get은 None, pipeline 쓰기는 버린다)"""
+
+    async def get(self, key):
+        return None
+
+    def pipeline(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        return self
+
+    async def execute(self):
+        return []
+
+
+class SymbolRegistryLockTests(SimpleTestCase):
+    def test_concurrent_cold_aload_fetches_exchange_info_once(self):
+        calls = []
+
+        class SlowClient:
+            async def exchange_info(self):
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return exchange_info(('BTCUSDT', 'PERPETUAL', 'TRADING'))
+
+        registry = SymbolRegistry(redis_client=RecordingRedis())
+
+        async def run():
+            return await asyncio.gather(*(registry.aload(EmptyAsyncRedis()) for _ in range(10)))
+
+        with mock.patch('data_collection.symbols.get_async_rest_client', SlowClient):
+            results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+class FetchAllOrderbooksTests(TestCase):
+    def test_rest_snapshots_skip_symbols_with_a_local_book(self):
+        client = make_test_redis()
+        for key in ('btcusdt_orderbook', 'btcusdt_orderbook_rest', 'ethusdt_orderbook', 'ethusdt_orderbook_rest'):
+            client.delete(key)
+        local = codec.dumps({"symbol": "BTCUSDT", "lastUpdateId": 1, "bids": [], "asks": []})
+        client.setex('btcusdt_orderbook', 10, local)
+        with mock.patch.object(tasks, 'redis_client', client), \
+                mock.patch.object(tasks, 'binance_client', StubClient(['BTCUSDT', 'ETHUSDT'])), \
+                mock.patch.object(tasks, 'get_usdt_symbols', lambda: ['BTCUSDT', 'ETHUSDT']):
+            tasks.fetch_all_orderbooks()
+        self.assertEqual(client.get('btcusdt_orderbook'), local)
+        self.assertIsNone(client.get('btcusdt_orderbook_rest'))
+        self.assertIsNone(client.get('ethusdt_orderbook'))
+        self.assertEqual(len(codec.loads(client.get('ethusdt_orderbook_rest'))['bids']), 10)
+        self.assertEqual(list(OrderBook.objects.values_list('symbol', flat=True)), ['ETHUSDT'])
+
+
+class ExchangeClockTests(SimpleTestCase):
+    def test_follows_event_time_not_local_clock(self):
+        clock = ExchangeClock()
+        exchange_ms = int(time.time() * 1000) - 5000  # 로컬 시계가 5초 앞서 있다
+        clock.observe(exchange_ms)
+        self.assertLess(clock.now_ms() - exchange_ms, 1000)
+        time.sleep(0.05)
+        self.assertGreaterEqual(clock.now_ms() - exchange_ms, 50)
+
+    def test_never_moves_backwards(self):
+        clock = ExchangeClock()
+        clock.observe(1_700_000_000_000)
+        before = clock.now_ms()
+        clock.observe(1_699_999_999_000)  # 늦게 도착한 이전 이벤트
+        self.assertGreaterEqual(clock.now_ms(), before)
+
+
+class RecordingPublisher:
+    def __init__(self):
+        self.events = []
+
+    async def publish(self, symbol, stream, data):
+        self.events.append(data)
+
+
+class OrderBookFanoutTests(SimpleTestCase):
+    def test_burst_publishes_leading_and_trailing_state(self):
+        redis_client = make_test_redis()
+        publisher = RecordingPublisher()
+        manager = OrderBookManager(redis_client, publisher=publisher, fanout_interval=0.05,
+                                   publish_interval=0.05, persist_interval=10 ** 9)
+
+        async def run():
+            manager.get_book('BTCUSDT').load_snapshot(
+                {"lastUpdateId": 100, "bids": [["99.0", "1"]], "asks": [["101.0", "1"]]})
+            await manager.handle({**depth_event(98, 102, 97), "s": 'BTCUSDT'})
+            for update_id in range(103, 110):
+                await asyncio.sleep(0)  # 읽기 루프가 다음 메시지를 기다리는 지점
+                await manager.handle({**depth_event(update_id, update_id, update_id - 1,
+                                                   bids=[["99.0", str(update_id)]]), "s": 'BTCUSDT'})
+            await manager.close()
+
+        async_to_sync(run)()
+        self.assertEqual([event['u'] for event in publisher.events], [102, 109])
+        self.assertEqual(codec.loads(redis_client.get('btcusdt_orderbook'))['bids'][0], [99.0, 109.0])
+
+
+class SupervisorTests(SimpleTestCase):
+    def test_backoff_delay_is_jittered_and_capped(self):
+        for attempt in range(40):
+            expected = min(60, 2 ** attempt)
+            for _ in range(20):
+                self.assertTrue(expected * 0.5 <= backoff_delay(attempt, base=1, cap=60) <= expected)
+
+    @override_settings(SUPERVISOR_BACKOFF_BASE=0.001, SUPERVISOR_BACKOFF_MAX=0.01)
+    def test_failed_task_is_restarted_until_it_succeeds(self):
+        calls = []
+
+        async def subscribe():
+            calls.append(len(calls))
+            if len(calls) < 3:
+                raise ConnectionError(f"attempt {len(calls)}")
+
+        async def run():
+            supervisor = TaskSupervisor()
+            supervisor.add('subscribe', subscribe, restart='on_failure')
+            supervisor.start()
+            while supervisor.status()['subscribe']['state'] != 'done':
+                await asyncio.sleep(0.001)
+            await supervisor.stop()
+            return supervisor.status()['subscribe']
+
+        health = async_to_sync(run)()
+        self.assertEqual(len(calls), 3)
+        self.assertEqual((health['failures'], health['restarts']), (2, 2))
+        self.assertEqual(health['last_error'], "ConnectionError: attempt 2")
+
+    def report(self, tasks=None, shards=None, orderbooks=None):
+        orderbooks = {"resyncing": [], "stalled": [], "recent_resyncs": 0, **(orderbooks or {})}
+        return health_report(tasks or {}, {"shards": shards or []}, orderbooks)
+
+    def test_health_status(self):
+        self.assertEqual(self.report()['status'], 'ok')
+        # 시작 시 첫 스냅샷을 기다리는 중인 것은 정상
+        self.assertEqual(self.report(orderbooks={"resyncing": ['BTCUSDT']})['status'], 'ok')
+        self.assertEqual(self.report(orderbooks={"resyncing": ['BTCUSDT'], "stalled": ['BTCUSDT']})['status'], 'degraded')
+        self.assertEqual(self.report(orderbooks={"recent_resyncs": settings.ORDERBOOK_RESYNC_ALERT})['status'], 'degraded')
+        self.assertEqual(self.report(tasks={'ticker': {"state": 'backoff'}})['status'], 'degraded')
+        self.assertEqual(self.report(shards=[{"index": 0, "connected": False}])['status'], 'degraded')
+
+    def test_orderbook_waiting_for_snapshot_is_stalled_after_grace(self):
+        manager = OrderBookManager(RecordingRedis())
+        manager.get_book('BTCUSDT')
+        status = manager.status()
+        self.assertEqual((status['resyncing'], status['stalled'], status['recent_resyncs']), (['BTCUSDT'], [], 0))
+        with override_settings(ORDERBOOK_RESYNC_GRACE=-1):
+            self.assertEqual(manager.status()['stalled'], ['BTCUSDT'])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "PostgreSQL 파티션 전용")
+class PartitionBoundsTests(TestCase):
+    table = 'data_collection_orderbook'  # 마이그레이션에서 hourly 파티션으로 만들어진다
+
+    def test_interval_change_does_not_overlap_existing_partitions(self):
+        now = timezone.now()
+        partitions.ensure_partitions(self.table, 'daily', 3, now=now)
+        with connection.cursor() as cursor:
+            bounds = partitions.partition_bounds(cursor, self.table)
+        for (_, _, end), (_, start, _) in zip(bounds, bounds[1:]):
+            self.assertLessEqual(end, start)
+        self.assertEqual(bounds[-1][2], partitions.floor_time(now, 'daily') + timedelta(days=4))
+
+    def test_archive_partition_is_dropped_by_its_upper_bound(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{self.table}_archive" PARTITION OF "{self.table}" '
+                f"FOR VALUES FROM ('2020-01-01 00:00+00') TO ('2020-03-01 00:00+00')"
+            )
+        dropped = partitions.drop_expired_partitions(self.table, 'hourly', timedelta(days=30), dry_run=True)
+        self.assertIn(f'{self.table}_archive', dropped)
@@ -0,0 +1,180 @@
+# data_collection/trade_aggregator.py
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from data_collection import codec
+from data_collection.bulk_writer import get_bulk_writer
+from data_collection.models import TradeVolume
+from data_collection.realtime import store_realtime
+
+logger = logging.getLogger('data_collection')
+
+INTERVAL_MS = {
+    '1s': 1_000,
+    '1m': 60_000,
+    '5m': 300_000,
+}
+
+
+class TradeBar:
+    __slots__ = ('start', 'open', 'high', 'low', 'close', 'buy_volume', 'sell_volume', 'trade_count')
+
+    def __init__(self, start, price):
+        self.start = start
+        self.open = self.high = self.low = self.close = price
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.trade_count = 0
+
+    def add(self, price, quantity, is_sell):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        if is_sell:
+            self.sell_volume += quantity
+        else:
+            self.buy_volume += quantity
+        self.trade_count += 1
+
+    def to_dict(self, symbol, interval):
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "timestamp": datetime.fromtimestamp(self.start / 1000, tz=dt_timezone.utc).isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.buy_volume + self.sell_volume,
+            "buy_volume": self.buy_volume,
+            "sell_volume": self.sell_volume,
+            "trade_count": self.trade_count,
+        }
+
+
+class BarRing:
+    """한 해상도의 열린 bucket들을 담는 고정 크기 ring buffer.
+
+    slot = (bucket_start // width) % size 이며, bucket은 체결 시각이
+    bucket 종료 + grace_ms 를 넘으면 닫힌다. 이미 닫힌 구간의 늦은 체결은 버린다.
+    """
+
+    def __init__(self, width_ms, grace_ms):
+        self.width = width_ms
+        self.grace = grace_ms
+        self.size = grace_ms // width_ms + 2
+        self.slots = [None] * self.size
+        self.closed_until = 0
+        self.late_trades = 0
+
+    def add(self, ts, price, quantity, is_sell):
+        closed = self.close(ts)
+        start = ts - ts % self.width
+        if start < self.closed_until:
+            self.late_trades += 1
+            return closed
+        idx = (start // self.width) % self.size
+        bar = self.slots[idx]
+        if bar is None or bar.start != start:
+            bar = self.slots[idx] = TradeBar(start, price)
+        bar.add(price, quantity, is_sell)
+        return closed
+
+    def close(self, now_ms):
+        limit = now_ms - self.grace
+        closed = []
+        for idx, bar in enumerate(self.slots):
+            if bar is not None and bar.start + self.width <= limit:
+                closed.append(bar)
+                self.slots[idx] = None
+        self.closed_until = max(self.closed_until, limit - limit % self.width)
+        closed.sort(key=lambda bar: bar.start)
+        return closed
+
+
+class TradeAggregator:
+    """체결 스트림을 1s/1m/5m OHLCV + 매수/매도 거래량 bar로 집계한다.
+
+    닫힌 bar는 Redis 파이프라인 한 번으로 최신 값을 갱신하고,
+    BulkWriter를 통해 TradeVolume 행으로 일괄 저장된다.
+    """
+
+    def __init__(self, redis_client, intervals=None, persist_intervals=None, grace_ms=None,
+                 publisher=None):
+        self.redis_client = redis_client
+        self.intervals = intervals or settings.TRADE_AGG_INTERVALS
+        self.persist_intervals = set(
+            settings.TRADE_AGG_PERSIST_INTERVALS if persist_intervals is None else persist_intervals
+        )
+        self.grace_ms = settings.TRADE_AGG_GRACE_MS if grace_ms is None else grace_ms
+        self.publisher = publisher
+        self.rings = {}
+
+    def _get_rings(self, symbol):
+        rings = self.rings.get(symbol)
+        if rings is None:
+            rings = self.rings[symbol] = {
+                interval: BarRing(INTERVAL_MS[interval], self.grace_ms) for interval in self.intervals
+            }
+        return rings
+
+    async def add_trade(self, trade):
+        symbol = trade['s']
+        ts = trade['T']
+        price = float(trade['p'])
+        quantity = float(trade['q'])
+        is_sell = trade['m']  # buyer가 maker면 매도 체결
+        closed = []
+        for interval, ring in self._get_rings(symbol).items():
+            closed.extend((interval, bar) for bar in ring.add(ts, price, quantity, is_sell))
+        if closed:
+            await self._emit(symbol, closed)
+
+    async def tick(self, now_ms):
+        """체결이 뜸한 심볼도 시간이 지나면 bucket이 닫히도록 주기적으로 호출한다."""
+        # _emit 대기 중에 새 심볼이 추가될 수 있으므로 복사본을 순회한다
+        for symbol, rings in list(self.rings.items()):
+            closed = []
+            for interval, ring in rings.items():
+                closed.extend((interval, bar) for bar in ring.close(now_ms))
+            if closed:
+                await self._emit(symbol, closed)
+
+    async def _emit(self, symbol, closed):
+        latest = {}
+        writer = get_bulk_writer(TradeVolume)
+        for interval, bar in closed:
+            data = bar.to_dict(symbol, interval)
+            latest[interval] = data
+            if interval in self.persist_intervals:
+                await writer.add(
+                    symbol=symbol,
+                    interval=interval,
+                    bucket_start=datetime.fromtimestamp(bar.start / 1000, tz=dt_timezone.utc),
+                    open=bar.open,
+                    high=bar.high,
+                    low=bar.low,
+                    close=bar.close,
+                    volume=bar.buy_volume + bar.sell_volume,
+                    buy_volume=bar.buy_volume,
+                    sell_volume=bar.sell_volume,
+                    trade_count=bar.trade_count,
+                )
+
+        pipe = self.redis_client.pipeline()
+        for interval, data in latest.items():
+            ttl = max(10, INTERVAL_MS[interval] // 1000 * 2)
+            value = codec.dumps(data)
+            pipe.setex(f"{symbol.lower()}_trade_bar_{interval}", ttl, value)
+            if interval == '1s':
+                store_realtime(pipe, 'trade_volume', symbol, value, 10)
+        pipe.execute()
+
+        if self.publisher is not None:
+            for data in latest.values():
+                await self.publisher.publish(symbol, 'trade_bar', data)
+        logger.debug(f"Closed {len(closed)} trade bars for {symbol}")
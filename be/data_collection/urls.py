@@ -4,16 +4,31 @@ from .views import (
     RealtimeOrderBookView, RealtimeFundingRateView, RealtimeTradeVolumeView, RealtimeLiquidationView,
     HistoricalOrderBookView, HistoricalFundingRateView, HistoricalTradeVolumeView, HistoricalLiquidationView
 )
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('symbols/', views.SymbolListView.as_view(), name='symbol-list'),
+    path('status/ingest/', views.IngestHealthView.as_view(), name='ingest_health'),
+    path('status/clients/', views.WebSocketClientStatusView.as_view(), name='websocket_client_status'),
     path('realtime/orderbook/', RealtimeOrderBookView.as_view(), name='realtime_orderbook'),
     path('realtime/funding_rate/', RealtimeFundingRateView.as_view(), name='realtime_funding_rate'),
     path('realtime/trade_volume/', RealtimeTradeVolumeView.as_view(), name='realtime_trade_volume'),
     path('realtime/liquidation/', RealtimeLiquidationView.as_view(), name='realtime_liquidation'),
+    path('realtime/batch/', views.RealtimeBatchView.as_view(), name='realtime_batch'),
+    path('realtime/metrics/', views.RealtimeMetricsView.as_view(), name='realtime_metrics'),
     path('historical/orderbook/', HistoricalOrderBookView.as_view(), name='historical_orderbook'),
     path('historical/funding_rate/', HistoricalFundingRateView.as_view(), name='historical_funding_rate'),
     path('historical/trade_volume/', HistoricalTradeVolumeView.as_view(), name='historical_trade_volume'),
     path('historical/liquidation/', HistoricalLiquidationView.as_view(), name='historical_liquidation'),
+    path('historical/aggregate/', views.HistoricalAggregateView.as_view(), name='historical_aggregate'),
+    path('historical/export/', views.HistoricalExportView.as_view(), name='historical_export'),
+    # async 버전 (ASGI 서버에서 redis.asyncio 풀 사용)
+    path('async/symbols/', async_views.AsyncSymbolListView.as_view(), name='async_symbol_list'),
+    path('async/status/', async_views.AsyncDataStatusView.as_view(), name='async_data_status'),
+    path('async/realtime/orderbook/', async_views.AsyncRealtimeView.as_view(data_type='orderbook'), name='async_realtime_orderbook'),
+    path('async/realtime/funding_rate/', async_views.AsyncRealtimeView.as_view(data_type='funding_rate'), name='async_realtime_funding_rate'),
+    path('async/realtime/trade_volume/', async_views.AsyncRealtimeView.as_view(data_type='trade_volume'), name='async_realtime_trade_volume'),
+    path('async/realtime/metrics/', async_views.AsyncRealtimeView.as_view(data_type='metrics'), name='async_realtime_metrics'),
+    path('async/realtime/liquidation/', async_views.AsyncRealtimeLiquidationView.as_view(), name='async_realtime_liquidation'),
+    path('async/realtime/batch/', async_views.AsyncRealtimeBatchView.as_view(), name='async_realtime_batch'),
 ]
\ No newline at end of file
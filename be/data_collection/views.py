@@ -1,27 +1,39 @@
 # data_collection/views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework import serializers
 from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+import functools
 import redis
-import json
 from .models import OrderBook, FundingRate, TradeVolume, Liquidation
-from .serializers import OrderBookSerializer, FundingRateSerializer, TradeVolumeSerializer, LiquidationSerializer
-from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
-from datetime import datetime
-import requests
+from .serializers import OrderBookSerializer, FundingRateSerializer, TradeVolumeSerializer, LiquidationSerializer, ValuesSerializer
+from .orderbook_codec import hydrate_orderbook_values, hydrate_orderbooks
+from .symbols import get_symbol_registry
+from .pagination import HistoricalQuery, paginate_keyset, parse_time
+from .aggregation import BUCKETS, METRICS, aggregate_metric
+from .realtime import REALTIME_KEYS, batch_response, liquidation_response, parse_batch_query, parse_recent, realtime_response
+from .http_cache import etag_matches, historical_cache_control
+from .freshness import STREAMS as FRESHNESS_STREAMS, freshness_report, read_freshness
+from . import codec
+from .delivery import CLIENT_STATS_KEY, parse_client_stats
+from .supervisor import INGEST_HEALTH_KEY
+from .export import COMPRESSIONS as EXPORT_COMPRESSIONS, EXPORT_DATASETS, FORMATS as EXPORT_FORMATS, ExportRequest, aiter_export, iter_export
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter, OpenApiResponse, OpenApiExample
 
 redis_client = redis.Redis.from_url(settings.REDIS_URL)
 
 class RealtimeOrderBookView(APIView):
     @extend_schema(
         summary="Get real-time order book",
-        description="Fetches the latest order book data for the specified symbol (default: BTCUSDT) from Redis.",
+        description="Fetches the top levels of the locally maintained order book for the specified symbol (default: BTCUSDT) from Redis.",
         tags=['realtime', 'orderbook'],
         responses={
             200: OpenApiResponse(description="Order book data", examples=[
                 OpenApiExample(
                     name="Successful response",
-                    value={"bids": [[50000.0, 1.5]], "asks": [[50001.0, 1.2]]},
+                    value={"symbol": "BTCUSDT", "lastUpdateId": 7063958412345, "E": 1745211600000, "timestamp": "2025-04-21T05:00:00+00:00", "bids": [[50000.0, 1.5]], "asks": [[50001.0, 1.2]]},
                     media_type="application/json"
                 )
             ]),
@@ -51,9 +63,9 @@ class RealtimeOrderBookView(APIView):
     )
     def get(self, request):
         symbol = request.query_params.get('symbol', 'BTCUSDT').upper()
-        orderbook = redis_client.get(f"{symbol.lower()}_orderbook")
-        if orderbook:
-            return Response(json.loads(orderbook))
+        response = realtime_response(request, redis_client, 'orderbook', symbol)
+        if response is not None:
+            return response
         return Response({"status": "no_realtime_data", "message": "No orderbook data available"}, status=404)
 
 class RealtimeFundingRateView(APIView):
@@ -95,21 +107,21 @@ class RealtimeFundingRateView(APIView):
     )
     def get(self, request):
         symbol = request.query_params.get('symbol', 'BTCUSDT').upper()
-        funding_rate = redis_client.get(f"{symbol.lower()}_funding_rate")
-        if funding_rate:
-            return Response(json.loads(funding_rate))
+        response = realtime_response(request, redis_client, 'funding_rate', symbol)
+        if response is not None:
+            return response
         return Response({"status": "no_realtime_data", "message": "No funding rate data available"}, status=404)
 
 class RealtimeTradeVolumeView(APIView):
     @extend_schema(
         summary="Get real-time trade volume",
-        description="Fetches the latest real-time trade volume data for the specified symbol (default: BTCUSDT) from Redis.",
+        description="Fetches the latest closed 1-second trade bar (OHLCV with buy/sell volume split) for the specified symbol (default: BTCUSDT) from Redis.",
         tags=['realtime', 'trade_volume'],
         responses={
             200: OpenApiResponse(description="Real-time trade volume data", examples=[
                 OpenApiExample(
                     name="Successful response",
-                    value={"buy_volume": 10.5, "sell_volume": 8.3, "timestamp": "2025-04-21T05:00:00Z"},
+                    value={"symbol": "BTCUSDT", "interval": "1s", "timestamp": "2025-04-21T05:00:00+00:00", "open": 50000.0, "high": 50010.0, "low": 49995.0, "close": 50005.0, "volume": 18.8, "buy_volume": 10.5, "sell_volume": 8.3, "trade_count": 42},
                     media_type="application/json"
                 )
             ]),
@@ -139,21 +151,82 @@ class RealtimeTradeVolumeView(APIView):
     )
     def get(self, request):
         symbol = request.query_params.get('symbol', 'BTCUSDT').upper()
-        trade_volume = redis_client.get(f"{symbol.lower()}_realtime_trade_volume")
-        if trade_volume:
-            return Response(json.loads(trade_volume))
+        response = realtime_response(request, redis_client, 'trade_volume', symbol)
+        if response is not None:
+            return response
         return Response({"status": "no_realtime_data", "message": "No trade volume data available"}, status=404)
 
+class RealtimeMetricsView(APIView):
+    @extend_schema(
+        summary="Get derived real-time market metrics",
+        description=(
+            "Returns the metrics the ingester's MetricsEngine publishes every second: order book spread, microprice and "
+            "imbalance, rolling VWAP / volume / CVD per window, and liquidation totals with the largest price clusters. "
+            "Pass symbols (comma-separated) to get several symbols in one response, in the realtime batch format."
+        ),
+        tags=['realtime', 'metrics'],
+        parameters=[
+            OpenApiParameter('symbol', str, description="Symbol (default: BTCUSDT)"),
+            OpenApiParameter('symbols', str, description="Comma-separated symbols (batch response)"),
+        ],
+        responses={
+            200: OpenApiResponse(description="Metrics snapshot", examples=[
+                OpenApiExample(
+                    name="Successful response",
+                    value={
+                        "symbol": "BTCUSDT", "timestamp": 1745211600000,
+                        "book": {"best_bid": 50000.0, "best_ask": 50000.1, "mid": 50000.05, "spread": 0.1, "spread_bps": 0.02, "microprice": 50000.07, "imbalance": 0.12, "bid_depth": 35.2, "ask_depth": 27.6, "levels": 10},
+                        "trades": {"last_price": 50000.1, "cvd": 152.3, "windows": {"1m": {"vwap": 49998.4, "volume": 310.5, "buy_volume": 170.2, "sell_volume": 140.3, "cvd": 29.9, "trade_count": 2841, "complete": True}}},
+                        "liquidations": {"window_seconds": 300, "count": 4, "long_notional": 120000.0, "short_notional": 0.0, "clusters": [{"price": 49975.0, "notional": 120000.0, "long_notional": 120000.0, "short_notional": 0.0, "count": 4}]},
+                    },
+                    media_type="application/json"
+                )
+            ]),
+            404: OpenApiResponse(description="No metrics published for the symbol"),
+        },
+        extensions={
+            'x-code-samples': [
+                {'lang': 'cURL', 'source': 'curl http://localhost:8000/api/realtime/metrics/?symbol=BTCUSDT'},
+            ]
+        }
+    )
+    def get(self, request):
+        if request.query_params.get('symbols'):
+            try:
+                symbols, data_types = parse_batch_query(request.query_params['symbols'], 'metrics', list)
+            except ValueError as e:
+                return Response({"status": "error", "message": str(e)}, status=400)
+            return batch_response(request, redis_client, symbols, data_types)
+        symbol = request.query_params.get('symbol', 'BTCUSDT').upper()
+        response = realtime_response(request, redis_client, 'metrics', symbol)
+        if response is not None:
+            return response
+        return Response({"status": "no_realtime_data", "message": "No metrics data available"}, status=404)
+
 class RealtimeLiquidationView(APIView):
     @extend_schema(
         summary="Get real-time liquidation data",
-        description="Fetches the latest liquidation data for the specified symbol (default: BTCUSDT) from Redis. If no real-time data is available, returns the latest liquidation from PostgreSQL with a status message.",
+        description=(
+            "Fetches the latest liquidation event, rolling long/short liquidation notional per window and the most recent "
+            "events for the specified symbol (default: BTCUSDT) from Redis. All USDⓈ-M symbols are collected from the "
+            "!forceOrder@arr stream. If no real-time data is available, returns the latest liquidation from PostgreSQL "
+            "with a status message."
+        ),
         tags=['realtime', 'liquidation'],
         responses={
             200: OpenApiResponse(description="Liquidation data or latest historical data", examples=[
                 OpenApiExample(
                     name="Real-time data",
-                    value={"status": "success", "data": {"o": {"S": "BUY", "p": 50000.0, "q": 1.0}}},
+                    value={
+                        "status": "success",
+                        "data": {"e": "forceOrder", "E": 1745211600000, "o": {"s": "BTCUSDT", "S": "SELL", "p": "50000", "q": "1.0", "T": 1745211599990}},
+                        "stats": {"symbol": "BTCUSDT", "timestamp": 1745211600500, "windows": {
+                            "1m": {"long_notional": 50000.0, "short_notional": 0.0, "count": 1},
+                            "5m": {"long_notional": 125000.0, "short_notional": 30000.0, "count": 4},
+                            "1h": {"long_notional": 910000.0, "short_notional": 420000.0, "count": 31},
+                        }},
+                        "recent": [{"e": "forceOrder", "E": 1745211600000, "o": {"s": "BTCUSDT", "S": "SELL", "p": "50000", "q": "1.0", "T": 1745211599990}}],
+                    },
                     media_type="application/json"
                 ),
                 OpenApiExample(
@@ -170,7 +243,8 @@ class RealtimeLiquidationView(APIView):
                 'description': 'Symbol to fetch liquidation for (e.g., BTCUSDT)',
                 'required': False,
                 'type': 'string',
-            }
+            },
+            OpenApiParameter('recent', int, description="Number of most recent events to include (default: 20)"),
         ],
         extensions={
             'x-code-samples': [
@@ -181,9 +255,13 @@ class RealtimeLiquidationView(APIView):
     )
     def get(self, request):
         symbol = request.query_params.get('symbol', 'BTCUSDT').upper()
-        liquidation = redis_client.get(f"{symbol.lower()}_liquidation")
-        if liquidation:
-            return Response({"status": "success", "data": json.loads(liquidation)})
+        try:
+            recent = parse_recent(request.query_params.get('recent'))
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+        response = liquidation_response(request, redis_client, symbol, recent)
+        if response is not None:
+            return response
 
         # Redis 데이터 없으면 PostgreSQL에서 최신 데이터 조회
         last_liquidation = Liquidation.objects.filter(symbol=symbol).order_by('-timestamp').first()
@@ -194,105 +272,360 @@ class RealtimeLiquidationView(APIView):
         }
         return Response(response_data)
 
-# Historical*View와 DataStatusView는 수정 제안이 없으므로 그대로 유지
-class HistoricalOrderBookView(APIView):
+class RealtimeBatchView(APIView):
     @extend_schema(
-        summary="Get historical BTCUSDT order book data",
-        description="Fetches the latest 5 order book records for BTCUSDT from PostgreSQL.",
-        tags=['historical', 'orderbook'],
+        summary="Get real-time data for many symbols at once",
+        description=(
+            "Reads every requested symbol x data type from Redis with a single MGET and returns the stored JSON as-is. "
+            "Keys without data are null in the payload and listed in missing. "
+            "If symbols is omitted, all trading USDT perpetual symbols are returned."
+        ),
+        tags=['realtime'],
+        parameters=[
+            OpenApiParameter('symbols', str, description="Comma-separated symbols (default: all USDT perpetual symbols)"),
+            OpenApiParameter('types', str, description=f"Comma-separated data types: {', '.join(REALTIME_KEYS)} (default: all)"),
+        ],
         responses={
-            200: OrderBookSerializer(many=True),
+            200: OpenApiResponse(description="Batch realtime data", examples=[
+                OpenApiExample(
+                    name="Successful response",
+                    value={
+                        "data": {
+                            "BTCUSDT": {"funding_rate": {"symbol": "BTCUSDT", "fundingRate": "0.00010000", "fundingTime": 1697059200000}, "trade_volume": None},
+                            "ETHUSDT": {"funding_rate": {"symbol": "ETHUSDT", "fundingRate": "0.00008000", "fundingTime": 1697059200000}, "trade_volume": None},
+                        },
+                        "missing": ["BTCUSDT:trade_volume", "ETHUSDT:trade_volume"],
+                    },
+                    media_type="application/json"
+                )
+            ]),
+            400: OpenApiResponse(description="Invalid symbols or types"),
+        },
+        extensions={
+            'x-code-samples': [
+                {'lang': 'cURL', 'source': 'curl "http://localhost:8000/api/realtime/batch/?symbols=BTCUSDT,ETHUSDT&types=funding_rate,trade_volume"'},
+            ]
         }
     )
     def get(self, request):
-        orderbooks = OrderBook.objects.filter(symbol="BTCUSDT").order_by('-timestamp')[:5]
-        serializer = OrderBookSerializer(orderbooks, many=True)
-        return Response(serializer.data)
+        try:
+            symbols, data_types = parse_batch_query(
+                request.query_params.get('symbols'), request.query_params.get('types'),
+                get_symbol_registry().usdt_symbols,
+            )
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+        return batch_response(request, redis_client, symbols, data_types)
 
-class HistoricalFundingRateView(APIView):
-    @extend_schema(
-        summary="Get historical BTCUSDT funding rate data",
-        description="Fetches the latest 5 funding rate records for BTCUSDT from PostgreSQL.",
-        tags=['historical', 'funding_rate'],
+HISTORICAL_PARAMETERS = [
+    OpenApiParameter('symbol', str, description="Trading symbol (default: BTCUSDT)"),
+    OpenApiParameter('start', str, description="Inclusive start time (ISO 8601 or epoch ms)"),
+    OpenApiParameter('end', str, description="Exclusive end time (ISO 8601 or epoch ms)"),
+    OpenApiParameter('limit', int, description="Page size (default: 100, max: 1000)"),
+    OpenApiParameter('cursor', str, description="next_cursor from the previous page"),
+    OpenApiParameter('columnar', bool, description="Return data as {field: [values]} instead of a list of records"),
+]
+
+
+class HistoricalListView(APIView):
+    """(symbol, start, end) 범위를 최신순으로 keyset 페이지네이션하는 공통 뷰
+
+    HISTORICAL_VALUES_SERIALIZATION이 켜져 있으면 모델 대신 values_list() 튜플을 읽어
+    ValuesSerializer로 같은 출력을 만든다. columnar=true면 data를 {field: [...]}로 준다.
+    """
+    model = None
+    serializer_class = None
+    extra_columns = ()  # prepare_values에 필요한 추가 컬럼
+
+    def filter_queryset(self, queryset, request):
+        return queryset
+
+    def prepare_rows(self, rows):
+        return rows
+
+    def prepare_values(self, rows, columns):
+        return rows
+
+    def get(self, request):
+        try:
+            query = HistoricalQuery.from_request(request)
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+        columnar = request.query_params.get('columnar', '').lower() in ('1', 'true')
+        queryset = self.filter_queryset(self.model.objects.filter(symbol=query.symbol), request)
+        if settings.HISTORICAL_VALUES_SERIALIZATION or columnar:
+            serializer = values_serializer(self.serializer_class)
+            columns = serializer.columns + list(self.extra_columns)
+            rows, next_cursor = paginate_keyset(queryset, query, columns=columns)
+            rows = self.prepare_values(rows, columns)
+            data = serializer.to_columns(rows) if columnar else serializer.to_rows(rows)
+        else:
+            rows, next_cursor = paginate_keyset(queryset, query)
+            data = self.serializer_class(self.prepare_rows(rows), many=True).data
+        return Response(
+            {"symbol": query.symbol, "data": data, "next_cursor": next_cursor},
+            headers={'Cache-Control': historical_cache_control(query.end)},
+        )
+
+
+@functools.cache
+def values_serializer(serializer_class):
+    return ValuesSerializer(serializer_class)
+
+
+def historical_schema(summary, tags, serializer_class, extra_parameters=()):
+    return extend_schema(
+        summary=summary,
+        description="Returns records newest first. Pass next_cursor back as cursor to fetch the next page; it is null on the last page.",
+        tags=tags,
+        parameters=HISTORICAL_PARAMETERS + list(extra_parameters),
         responses={
-            200: FundingRateSerializer(many=True),
+            200: inline_serializer(
+                name=f"Paginated{serializer_class.__name__.replace('Serializer', '')}",
+                fields={
+                    "symbol": serializers.CharField(),
+                    "data": serializer_class(many=True),
+                    "next_cursor": serializers.CharField(allow_null=True),
+                },
+            ),
+            400: OpenApiResponse(description="Invalid query parameters"),
         }
     )
+
+
+class HistoricalOrderBookView(HistoricalListView):
+    model = OrderBook
+    serializer_class = OrderBookSerializer
+
+    extra_columns = ('encoding',)
+
+    def prepare_rows(self, rows):
+        return hydrate_orderbooks(rows)
+
+    def prepare_values(self, rows, columns):
+        return hydrate_orderbook_values(rows, columns)
+
+    @historical_schema("Get historical order book data", ['historical', 'orderbook'], OrderBookSerializer)
+    def get(self, request):
+        return super().get(request)
+
+class HistoricalFundingRateView(HistoricalListView):
+    model = FundingRate
+    serializer_class = FundingRateSerializer
+
+    @historical_schema("Get historical funding rate data", ['historical', 'funding_rate'], FundingRateSerializer)
+    def get(self, request):
+        return super().get(request)
+
+class HistoricalTradeVolumeView(HistoricalListView):
+    model = TradeVolume
+    serializer_class = TradeVolumeSerializer
+
+    def filter_queryset(self, queryset, request):
+        interval = request.query_params.get('interval')
+        if interval:
+            queryset = queryset.filter(interval=interval)
+        return queryset
+
+    @historical_schema(
+        "Get historical trade volume data", ['historical', 'trade_volume'], TradeVolumeSerializer,
+        [OpenApiParameter('interval', str, description="Bar interval filter (e.g. 1s, 1m, 5m)")],
+    )
+    def get(self, request):
+        return super().get(request)
+
+class HistoricalLiquidationView(HistoricalListView):
+    model = Liquidation
+    serializer_class = LiquidationSerializer
+
+    @historical_schema("Get historical liquidation data", ['historical', 'liquidation'], LiquidationSerializer)
     def get(self, request):
-        funding_rates = FundingRate.objects.filter(symbol="BTCUSDT").order_by('-timestamp')[:5]
-        serializer = FundingRateSerializer(funding_rates, many=True)
-        return Response(serializer.data)
+        return super().get(request)
 
-class HistoricalTradeVolumeView(APIView):
+class HistoricalAggregateView(APIView):
     @extend_schema(
-        summary="Get historical BTCUSDT trade volume data",
-        description="Fetches the latest 5 trade volume records for BTCUSDT from PostgreSQL.",
-        tags=['historical', 'trade_volume'],
+        summary="Get time-bucketed aggregates for charting",
+        description=(
+            "Aggregates a metric into interval buckets in the database and returns columnar arrays. "
+            "trade_volume: open/high/low/close, volume, buy/sell volume, trade count. "
+            "open_interest: mean/max/min/last. funding_rate: mean/max/last. "
+            "liquidation: long/short notional and counts."
+        ),
+        tags=['historical', 'aggregate'],
+        parameters=[
+            OpenApiParameter('metric', str, required=True, enum=list(METRICS)),
+            OpenApiParameter('interval', str, enum=list(BUCKETS), description="Bucket width (default: 1m)"),
+            OpenApiParameter('symbol', str, description="Trading symbol (default: BTCUSDT)"),
+            OpenApiParameter('start', str, description="Inclusive start time (ISO 8601 or epoch ms)"),
+            OpenApiParameter('end', str, description="Exclusive end time (ISO 8601 or epoch ms, default: now)"),
+        ],
         responses={
-            200: TradeVolumeSerializer(many=True),
+            200: OpenApiResponse(description="Columnar aggregate", examples=[
+                OpenApiExample(
+                    name="Liquidation notional",
+                    value={
+                        "symbol": "BTCUSDT", "metric": "liquidation", "interval": "1h",
+                        "timestamps": [1745208000000, 1745211600000],
+                        "values": {"long_notional": [125000.5, None], "short_notional": [None, 43000.0],
+                                   "long_count": [3, 0], "short_count": [0, 1]},
+                    },
+                    media_type="application/json"
+                )
+            ]),
+            400: OpenApiResponse(description="Invalid query parameters"),
         }
     )
     def get(self, request):
-        trade_volumes = TradeVolume.objects.filter(symbol="BTCUSDT").order_by('-timestamp')[:5]
-        serializer = TradeVolumeSerializer(trade_volumes, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        try:
+            end = parse_time(params.get('end'), 'end')
+            result = aggregate_metric(
+                params.get('metric', ''),
+                params.get('symbol', 'BTCUSDT').upper(),
+                params.get('interval', '1m'),
+                start=parse_time(params.get('start'), 'start'),
+                end=end,
+            )
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+        return Response(result, headers={'Cache-Control': historical_cache_control(end)})
 
-class HistoricalLiquidationView(APIView):
+class HistoricalExportView(APIView):
     @extend_schema(
-        summary="Get historical BTCUSDT liquidation data",
-        description="Fetches the latest 5 liquidation records for BTCUSDT from PostgreSQL.",
-        tags=['historical', 'liquidation'],
-        responses={
-            200: LiquidationSerializer(many=True),
+        summary="Stream a bulk export of historical data",
+        description=(
+            "Streams rows in [start, end) oldest first from a server-side cursor as NDJSON, CSV or Parquet, "
+            "optionally gzip/zstd compressed (Parquet uses the codec for its column chunks). "
+            "Order books are exported with bids/asks restored from packed storage."
+        ),
+        tags=['historical', 'export'],
+        parameters=[
+            OpenApiParameter('dataset', str, required=True, enum=list(EXPORT_DATASETS)),
+            OpenApiParameter('symbol', str, description="Trading symbol (default: all symbols)"),
+            OpenApiParameter('start', str, description="Inclusive start time (ISO 8601 or epoch ms, default: end - 1 day)"),
+            OpenApiParameter('end', str, description="Exclusive end time (ISO 8601 or epoch ms, default: now)"),
+            OpenApiParameter('file_format', str, enum=list(EXPORT_FORMATS), description="Default: ndjson"),
+            OpenApiParameter('compression', str, enum=list(EXPORT_COMPRESSIONS), description="Default: none"),
+        ],
+        responses={200: OpenApiResponse(description="File stream"), 400: OpenApiResponse(description="Invalid query parameters")},
+        extensions={
+            'x-code-samples': [
+                {'lang': 'cURL', 'source': 'curl -o trades.csv.gz "http://localhost:8000/api/historical/export/?dataset=trade_volume&symbol=BTCUSDT&start=2025-04-01&end=2025-04-08&file_format=csv&compression=gzip"'},
+            ]
         }
     )
     def get(self, request):
-        liquidations = Liquidation.objects.filter(symbol="BTCUSDT").order_by('-timestamp')[:5]
-        serializer = LiquidationSerializer(liquidations, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        try:
+            export = ExportRequest(
+                params.get('dataset', ''),
+                symbol=params.get('symbol'),
+                start=parse_time(params.get('start'), 'start'),
+                end=parse_time(params.get('end'), 'end'),
+                # ?format= 은 DRF 렌더러 선택에 쓰이므로 file_format으로 받는다
+                fmt=params.get('file_format', 'ndjson'),
+                compression=params.get('compression', 'none'),
+            )
+        except ValueError as e:
+            return Response({"status": "error", "message": str(e)}, status=400)
+        # ASGI에서는 async iterator여야 Django가 응답 전체를 메모리에 모으지 않는다
+        stream = aiter_export(export) if isinstance(request._request, ASGIRequest) else iter_export(export)
+        response = StreamingHttpResponse(stream, content_type=export.content_type)
+        response['Content-Disposition'] = f'attachment; filename="{export.filename}"'
+        response['Cache-Control'] = historical_cache_control(export.end)
+        return response
 
 class DataStatusView(APIView):
+    @extend_schema(
+        summary="Get ingest freshness for all streams and symbols",
+        description=(
+            "Reads the freshness registry that every writer (Celery tasks, FastAPI ingester, WebSocket consumer) "
+            "maintains in Redis: last update (epoch ms), message count and lag per stream and symbol. "
+            "Feeds older than the stream's threshold are flagged stale."
+        ),
+        tags=['status'],
+        parameters=[
+            OpenApiParameter('stream', str, enum=list(FRESHNESS_STREAMS), description="Only this stream"),
+            OpenApiParameter('symbol', str, description="Only this symbol"),
+            OpenApiParameter('stale', bool, description="Only stale feeds"),
+        ],
+        responses={200: OpenApiResponse(description="Freshness per stream and symbol")},
+    )
+    def get(self, request):
+        stream = request.query_params.get('stream')
+        symbol = request.query_params.get('symbol', '').upper()
+        stale_only = request.query_params.get('stale', '').lower() in ('1', 'true')
+        if stream and stream not in FRESHNESS_STREAMS:
+            return Response({"status": "error", "message": f"Unknown stream: {stream}"}, status=400)
+        try:
+            freshness = read_freshness(redis_client, [stream] if stream else FRESHNESS_STREAMS)
+        except redis.RedisError as e:
+            return Response({"status": "error", "error": str(e)}, status=503)
+
+        return Response(freshness_report(freshness, symbol, stale_only))
+
+class IngestHealthView(APIView):
+    @extend_schema(
+        summary="Get ingester task, stream connection and order book sync health",
+        description=(
+            "The FastAPI ingester stores its health every SUPERVISOR_HEALTH_INTERVAL seconds: supervised task states "
+            "and restart counts, combined stream shards (connected, reconnects, rotations, stale streams) and "
+            "order book sequence gaps and resyncs. Returns 503 when the ingester is degraded or not reporting; "
+            "order books waiting for a snapshot only count once they exceed ORDERBOOK_RESYNC_GRACE, or when "
+            "ORDERBOOK_RESYNC_ALERT resyncs happen within ORDERBOOK_RESYNC_WINDOW."
+        ),
+        tags=['status'],
+        responses={200: OpenApiResponse(description="Ingester health"), 503: OpenApiResponse(description="Degraded or not reporting")},
+    )
+    def get(self, request):
+        try:
+            health = redis_client.get(INGEST_HEALTH_KEY)
+        except redis.RedisError as e:
+            return Response({"status": "error", "error": str(e)}, status=503)
+        if health is None:
+            return Response({"status": "error", "message": "수집기 상태가 없습니다."}, status=503)
+
+        health = codec.loads(health)
+        return Response(health, status=200 if health["status"] == 'ok' else 503)
+
+class WebSocketClientStatusView(APIView):
+    @extend_schema(
+        summary="Get per-connection WebSocket send queue stats",
+        description=(
+            "Every WebSocket connection reports its outbound queue depth, peak depth, sent/dropped/conflated "
+            "frame counts and overflow policy every WS_CLIENT_STATS_INTERVAL seconds. "
+            "Connections with the most drops are listed first; entries not updated for 3 intervals are removed."
+        ),
+        tags=['status'],
+        responses={200: OpenApiResponse(description="Send queue stats per connection")},
+    )
     def get(self, request):
-        response_data = {"status": "ok", "data_details": []}
         try:
-            keys = redis_client.keys("btcusdt_*")
-            if keys:
-                for key in keys:
-                    key_str = key.decode()
-                    data_type = redis_client.type(key).decode()
-                    data_value = redis_client.get(key)
-                    last_update = None
-
-                    # 데이터가 JSON 형태이고 'timestamp' 키를 포함하고 있다면 마지막 업데이트 시간 추출 시도
-                    if data_type == "string":
-                        try:
-                            parsed_data = json.loads(data_value.decode())
-                            if "timestamp" in parsed_data:
-                                # 타임스탬프 형태에 따라 적절히 변환 (예: Unix timestamp)
-                                if isinstance(parsed_data["timestamp"], (int, float)):
-                                    last_update = datetime.fromtimestamp(parsed_data["timestamp"]).isoformat()
-                                elif isinstance(parsed_data["timestamp"], str):
-                                    # ISO 형식 등 다른 문자열 형식이면 그대로 사용하거나 필요에 따라 파싱
-                                    last_update = parsed_data["timestamp"]
-                        except json.JSONDecodeError:
-                            pass  # JSON 형식이 아니면 무시
-
-                    response_data["data_details"].append({
-                        "key": key_str,
-                        "type": data_type,
-                        "last_update": last_update,
-                        # 필요하다면 데이터의 일부를 미리보기 형식으로 포함할 수도 있습니다.
-                        "preview": data_value.decode()[:50] + "..." if data_value else None
-                    })
-                response_data["message"] = f"{len(keys)}개의 데이터 상세 정보입니다."
-                return Response(response_data)
-            else:
-                return Response({"status": "warning", "message": "확인된 데이터가 없습니다."}, status=204)
+            fields = redis_client.hgetall(CLIENT_STATS_KEY)
+            clients, expired = parse_client_stats(fields, settings.WS_CLIENT_STATS_INTERVAL * 3)
+            if expired:
+                redis_client.hdel(CLIENT_STATS_KEY, *expired)
         except redis.RedisError as e:
             return Response({"status": "error", "error": str(e)}, status=503)
 
+        return Response({
+            "status": "success",
+            "clients": len(clients),
+            "queued": sum(client["depth"] for client in clients),
+            "dropped": sum(client["dropped"] for client in clients),
+            "data": clients,
+        })
+
 class SymbolListView(APIView):
     def get(self, request):
-        res = requests.get('https://fapi.binance.com/fapi/v1/ticker/24hr')
-        symbols = [item['symbol'] for item in res.json() if item['symbol'].endswith('USDT')]
-        return Response(symbols)
\ No newline at end of file
+        registry = get_symbol_registry()
+        detail = request.query_params.get('detail', '').lower() in ('1', 'true')
+        etag = f'"{registry.etag}{"-detail" if detail else ""}"'
+        headers = {'ETag': etag, 'Cache-Control': f'max-age={int(settings.SYMBOL_REGISTRY_LOCAL_TTL)}'}
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=304, headers=headers)
+
+        symbols = registry.usdt_symbols()
+        if detail:
+            symbols = [registry.get(symbol) for symbol in symbols]
+        return Response(symbols, headers=headers)
\ No newline at end of file
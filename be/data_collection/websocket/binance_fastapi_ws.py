@@ -1,15 +1,12 @@
 from fastapi import FastAPI, WebSocket
+from fastapi.responses import JSONResponse
 import asyncio
-import json
 import logging
 import redis
 import websockets
 from dotenv import load_dotenv
 from pathlib import Path
-from django.utils import timezone
-from asgiref.sync import sync_to_async
-from collections import defaultdict
-from tenacity import retry, stop_after_attempt, wait_exponential
+from django.conf import settings
 import os
 import django
 
@@ -17,102 +14,153 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
 
-from data_collection.models import OrderBook, Liquidation, TradeVolume
+from data_collection import codec
+from data_collection.orderbook import OrderBookManager
+from data_collection.binance_rest import get_async_rest_client
+from data_collection.bulk_writer import close_bulk_writers
+from data_collection.fanout import MarketEventPublisher
+from data_collection.streams import ExchangeClock, get_stream_manager
+from data_collection.trade_aggregator import TradeAggregator
+from data_collection.symbols import get_symbol_registry
+from data_collection.freshness import FreshnessRecorder
+from data_collection.metrics import MetricsEngine
+from data_collection.liquidations import ALL_MARKET_STREAM, LiquidationAggregator
+from data_collection.supervisor import INGEST_HEALTH_KEY, TaskSupervisor, health_report
 
 logger = logging.getLogger('data_collection')
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent.parent / '.env')
 redis_client = redis.Redis.from_url(os.getenv('REDIS_URL'))
+market_publisher = MarketEventPublisher()
+orderbook_manager = OrderBookManager(redis_client, publisher=market_publisher)
+trade_aggregator = TradeAggregator(redis_client, publisher=market_publisher)
+freshness = FreshnessRecorder(redis_client)
+metrics_engine = MetricsEngine(redis_client, book_source=orderbook_manager.books, publisher=market_publisher)
+liquidation_aggregator = LiquidationAggregator(redis_client, metrics_engine=metrics_engine, freshness=freshness)
+supervisor = TaskSupervisor()
+# tick은 로컬 시계가 아니라 이벤트 시각으로 추정한 거래소 시각으로
+exchange_clock = ExchangeClock()
 
 app = FastAPI()
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=4, max=10))
+async def get_usdt_symbols():
+    if os.getenv('INGEST_SYMBOLS'):
+        return [s.strip().upper() for s in os.getenv('INGEST_SYMBOLS').split(',') if s.strip()]
+    return await asyncio.to_thread(get_symbol_registry().usdt_symbols)
+
+async def on_depth(stream, data_json):
+    exchange_clock.observe(data_json.get('E'))
+    freshness.record('orderbook', data_json['s'], data_json.get('E'))
+    try:
+        # diff를 로컬 오더북에 반영하고, 상위 호가만 주기적으로 Redis/DB에 기록
+        await orderbook_manager.handle(data_json)
+    except redis.RedisError as e:
+        logger.error(f"Redis error: {e}")
+    # 웹소켓 클라이언트에는 OrderBookManager가 상위 호가 상태를 주기적으로 팬아웃한다
+    metrics_engine.on_book(data_json['s'])
+
+def on_reconnect(streams, downtime):
+    # 끊긴 동안의 diff는 복구할 수 없으므로 해당 심볼 오더북은 스냅샷부터 다시 맞춘다
+    orderbook_manager.resync([stream.split('@')[0] for stream in streams if stream.endswith('@depth')])
+
 async def binance_orderbook():
-    uri = "wss://fstream.binance.com/ws/btcusdt@depth"
-    async with websockets.connect(uri) as websocket:
-        logger.info(f"Connected to orderbook WebSocket: {uri}")
-        while True:
-            data = await websocket.recv()
-            data_json = json.loads(data)
-            try:
-                redis_client.setex("btcusdt_orderbook", 10, json.dumps(data_json))
-                await sync_to_async(OrderBook.objects.create)(
-                    symbol="BTCUSDT",
-                    bids=data_json.get("b", []),
-                    asks=data_json.get("a", []),
-                )
-                logger.info(f"Saved orderbook for BTCUSDT at {timezone.now()}")
-            except redis.RedisError as e:
-                logger.error(f"Redis error: {e}")
-
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=4, max=10))
+    symbols = await get_usdt_symbols()
+    streams = [f"{symbol.lower()}@depth" for symbol in symbols]
+    await get_stream_manager().subscribe(streams, on_depth)
+    logger.info(f"Subscribed orderbook streams for {len(streams)} symbols")
+
+async def on_trade(stream, trade_data):
+    exchange_clock.observe(trade_data.get('T'))
+    freshness.record('trade_volume', trade_data['s'], trade_data.get('T'))
+    metrics_engine.on_trade(trade_data)
+    try:
+        # 체결 시각(T) 기준 bucket에 누적, 닫힌 bucket만 Redis/DB에 기록
+        await trade_aggregator.add_trade(trade_data)
+    except redis.RedisError as e:
+        logger.error(f"Redis error: {e}")
+
 async def binance_trades():
-    uri = "wss://fstream.binance.com/ws/btcusdt@trade"
-    buy_volume_buffer = defaultdict(float)
-    sell_volume_buffer = defaultdict(float)
-    async with websockets.connect(uri) as websocket:
-        logger.info(f"Connected to trades WebSocket: {uri}")
-        while True:
-            data = await websocket.recv()
-            trade_data = json.loads(data)
-            is_buyer_maker = trade_data.get('m')
-            quantity = float(trade_data.get('q', 0))
-            timestamp = timezone.now().isoformat()
-            if is_buyer_maker:
-                sell_volume_buffer[timestamp] += quantity
-            else:
-                buy_volume_buffer[timestamp] += quantity
-            if timezone.now().second % 1 == 0:
-                total_buy_volume = sum(buy_volume_buffer.values())
-                total_sell_volume = sum(sell_volume_buffer.values())
-                volume_data = {
-                    "buy_volume": total_buy_volume,
-                    "sell_volume": total_sell_volume,
-                    "timestamp": timestamp
-                }
-                try:
-                    redis_client.setex("btcusdt_realtime_trade_volume", 10, json.dumps(volume_data))
-                    await sync_to_async(TradeVolume.objects.create)(
-                        symbol="BTCUSDT",
-                        volume=total_buy_volume + total_sell_volume,
-                        buy_volume=total_buy_volume,
-                        sell_volume=total_sell_volume,
-                    )
-                    buy_volume_buffer.clear()
-                    sell_volume_buffer.clear()
-                    logger.debug(f"Saved trade volume to Redis: {volume_data}")
-                except redis.RedisError as e:
-                    logger.error(f"Redis error: {e}")
-
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=4, max=10))
+    # 다른 stream과 같은 combined 연결을 써서 재연결/연결 교체를 공유한다
+    await get_stream_manager().subscribe(["btcusdt@trade"], on_trade)
+    logger.info("Subscribed trade stream btcusdt@trade")
+
+async def trade_aggregator_ticker():
+    while True:
+        await asyncio.sleep(1)
+        try:
+            await trade_aggregator.tick(exchange_clock.now_ms())
+        except redis.RedisError as e:
+            logger.error(f"Redis error: {e}")
+
+async def metrics_ticker():
+    # 파생 지표는 이벤트마다가 아니라 주기적으로 한 번에 계산/기록
+    while True:
+        await asyncio.sleep(settings.METRICS_PUBLISH_INTERVAL)
+        try:
+            await metrics_engine.publish(exchange_clock.now_ms())
+        except redis.RedisError as e:
+            logger.error(f"Redis error: {e}")
+
+async def freshness_flusher():
+    # record()는 메모리에만 쌓으므로 주기적으로 스레드에서 flush
+    await freshness.run_flusher()
+
+async def on_liquidation(stream, data_json):
+    exchange_clock.observe(data_json.get('E'))
+    # 전 심볼 청산 이벤트: 메모리에 모으고 liquidation_flusher가 일괄 기록
+    await liquidation_aggregator.add(data_json)
+
 async def binance_liquidation():
-    uri = "wss://fstream.binance.com/ws/btcusdt@forceOrder"
-    async with websockets.connect(uri) as websocket:
-        logger.info(f"Connected to liquidation WebSocket: {uri}")
-        while True:
-            data = await websocket.recv()
-            data_json = json.loads(data)
-            if 'o' in data_json and data_json['o']['s'] == 'BTCUSDT':
-                side = data_json['o'].get('S', 'UNKNOWN')
-                price = float(data_json['o'].get('p', 0))
-                quantity = float(data_json['o'].get('q', 0))
-                try:
-                    redis_client.setex("btcusdt_liquidation", 10, json.dumps(data_json))
-                    await sync_to_async(Liquidation.objects.create)(
-                        symbol="BTCUSDT",
-                        side=side,
-                        price=price,
-                        quantity=quantity,
-                    )
-                    logger.info(f"Saved liquidation for BTCUSDT at {timezone.now()}")
-                except redis.RedisError as e:
-                    logger.error(f"Redis error: {e}")
+    await get_stream_manager().subscribe([ALL_MARKET_STREAM], on_liquidation)
+    logger.info(f"Subscribed all-market liquidation stream {ALL_MARKET_STREAM}")
+
+async def liquidation_flusher():
+    while True:
+        await asyncio.sleep(settings.LIQUIDATION_FLUSH_INTERVAL)
+        try:
+            liquidation_aggregator.flush(exchange_clock.now_ms())
+        except redis.RedisError as e:
+            logger.error(f"Redis error: {e}")
+
+def ingest_health():
+    return health_report(supervisor.status(), get_stream_manager().status(), orderbook_manager.status())
+
+async def health_reporter():
+    # Django 쪽 /api/status/ingest/ 에서 읽도록 Redis에 기록 (수집기가 죽으면 TTL로 사라진다)
+    while True:
+        try:
+            redis_client.set(INGEST_HEALTH_KEY, codec.dumps(ingest_health()), ex=int(settings.SUPERVISOR_HEALTH_INTERVAL * 3) + 1)
+        except redis.RedisError as e:
+            logger.error(f"Redis error: {e}")
+        await asyncio.sleep(settings.SUPERVISOR_HEALTH_INTERVAL)
 
 @app.on_event("startup")
 async def startup_event():
-    # WebSocket 백그라운드 태스크 시작
-    asyncio.create_task(binance_orderbook())
-    asyncio.create_task(binance_trades())
-    asyncio.create_task(binance_liquidation())
+    # 모든 백그라운드 태스크는 supervisor가 소유하고, 실패하면 backoff 후 계속 다시 시작한다
+    get_stream_manager().add_reconnect_listener(on_reconnect)
+    supervisor.add('orderbook', binance_orderbook, restart='on_failure')
+    supervisor.add('trades', binance_trades, restart='on_failure')
+    supervisor.add('liquidation', binance_liquidation, restart='on_failure')
+    supervisor.add('trade_aggregator_ticker', trade_aggregator_ticker)
+    supervisor.add('freshness_flusher', freshness_flusher)
+    supervisor.add('metrics_ticker', metrics_ticker)
+    supervisor.add('liquidation_flusher', liquidation_flusher)
+    supervisor.add('health_reporter', health_reporter)
+    supervisor.start()
+
+@app.get("/health")
+async def health():
+    report = ingest_health()
+    return JSONResponse(report, status_code=200 if report["status"] == 'ok' else 503)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await supervisor.stop()
+    # 버퍼에 남은 행을 DB에 기록
+    liquidation_aggregator.flush(exchange_clock.now_ms())
+    await orderbook_manager.close()
+    await close_bulk_writers()
+    await get_async_rest_client().close()
+    freshness.flush()
 
 @app.websocket("/ws/orderbook")
 async def ws_orderbook(websocket: WebSocket):
@@ -70,13 +70,13 @@ const useRealtimeData = (symbol: string = 'BTCUSDT') => {
 
                 const newRealtimeData = {
                     orderbook: {
-                        b: (orderbookRes.data.b || []).map(([price, quantity]) => [
-                            parseFloat(price || '0'),
-                            parseFloat(quantity || '0'),
+                        b: (orderbookRes.data.bids || orderbookRes.data.b || []).map(([price, quantity]) => [
+                            parseFloat(String(price || '0')),
+                            parseFloat(String(quantity || '0')),
                         ]),
-                        a: (orderbookRes.data.a || []).map(([price, quantity]) => [
-                            parseFloat(price || '0'),
-                            parseFloat(quantity || '0'),
+                        a: (orderbookRes.data.asks || orderbookRes.data.a || []).map(([price, quantity]) => [
+                            parseFloat(String(price || '0')),
+                            parseFloat(String(quantity || '0')),
                         ]),
                     },
                     fundingRate: fundingRateRes.data
@@ -2,14 +2,18 @@
 
 // 호가 데이터 타입
 export interface OrderbookResponse {
-    b?: [string, string][]; // 매수 호가
-    a?: [string, string][]; // 매도 호가
+    bids?: [number | string, number | string][]; // 로컬 오더북 상위 매수 호가
+    asks?: [number | string, number | string][]; // 로컬 오더북 상위 매도 호가
+    b?: [string, string][]; // 매수 호가 (raw diff)
+    a?: [string, string][]; // 매도 호가 (raw diff)
 }
 
 // 펀딩 비율 데이터 타입
 export interface FundingRateResponse {
     fundingRate: string; // 펀딩률 (예: "0.000037")
     fundingTime: string; // 타임스탬프 (예: "1697059200000")
+    predictedFundingRate?: string; // 다음 정산 예상 펀딩률 (실시간 응답만)
+    nextFundingTime?: number; // 다음 정산 시각 (실시간 응답만)
 }
 
 // 거래량 데이터 타입